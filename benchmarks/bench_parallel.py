@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for parallel template-mode generation.
+Run from project root: python -m benchmarks.bench_parallel [-n STORIES]
+"""
+
+import argparse
+import os
+import time
+
+from src.parallel import generate_template_parallel
+
+
+def bench(stories: int, workers: int, chunk_size: int) -> float:
+    """Returns seconds to generate `stories` template stories with `workers` processes."""
+    keywords = ([f"hero{i}", "forest", "sword"] for i in range(stories))
+    start = time.perf_counter()
+    for _ in generate_template_parallel(keywords, workers=workers, chunk_size=chunk_size, seed=0):
+        pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--stories", type=int, default=500_000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+    baseline = None
+    for workers in worker_counts:
+        seconds = bench(args.stories, workers, args.chunk_size)
+        baseline = baseline or seconds
+        print(
+            f"workers={workers:<3} {seconds:7.2f}s "
+            f"{args.stories / seconds:>10,.0f} stories/s  speedup {baseline / seconds:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
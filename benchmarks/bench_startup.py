@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: import time of the CLI entry modules via `python -X importtime`.
+Run from project root: python -m benchmarks.bench_startup [--max-ms MS] [--top N]
+
+Fails (exit 1) if a template-only entry module pulls in the AI stack, or if
+its cumulative import time exceeds --max-ms.
+"""
+
+import argparse
+import subprocess
+import sys
+
+# Entry modules used by template-only CLI runs
+ENTRY_MODULES = ("src.main", "src.batch", "src.parallel")
+
+# Modules that must only load on first AI use
+LAZY_MODULES = ("anthropic", "dotenv", "httpx", "pydantic")
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """
+    Imports module in a fresh interpreter with -X importtime.
+
+    Returns:
+        {imported module name: (self_us, cumulative_us)}
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        # "import time:       123 |        456 |   package.module"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-ms", type=float, default=100.0, help="Cumulative import budget per entry module")
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports to list per entry module")
+    args = parser.parse_args()
+
+    failed = False
+    for module in ENTRY_MODULES:
+        times = import_times(module)
+        total_ms = times[module][1] / 1000
+        eager = sorted({name.split(".")[0] for name in times} & set(LAZY_MODULES))
+        print(f"{module:<14} {total_ms:8.1f} ms")
+        for name, (self_us, _) in sorted(times.items(), key=lambda item: -item[1][0])[:args.top]:
+            print(f"    {self_us / 1000:7.1f} ms  {name}")
+        if eager:
+            print(f"    FAIL: imports {', '.join(eager)} at startup", file=sys.stderr)
+            failed = True
+        if total_ms > args.max_ms:
+            print(f"    FAIL: over the {args.max_ms:g} ms budget", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: str.format vs precompiled template rendering.
+Run from project root: python -m benchmarks.bench_template_render [-n RENDERS]
+"""
+
+import argparse
+import time
+
+from src.template_compiler import COMPILED_TEMPLATES, render
+
+VALUES = {"character": "knight", "place": "forest", "object": "ancient sword"}
+
+
+def bench_format(template_list: list[str], n: int) -> float:
+    """Times n renders with str.format (the original _format_template path)."""
+    count = len(template_list)
+    start = time.perf_counter()
+    for i in range(n):
+        template_list[i % count].format(**VALUES)
+    return time.perf_counter() - start
+
+
+def bench_compiled(template_list: list[str], n: int) -> float:
+    """Times n renders through the precompiled segment path."""
+    compiled_list = [COMPILED_TEMPLATES[t] for t in template_list]
+    count = len(compiled_list)
+    start = time.perf_counter()
+    for i in range(n):
+        render(compiled_list[i % count], VALUES)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--renders", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    template_list = list(COMPILED_TEMPLATES)
+    format_s = bench_format(template_list, args.renders)
+    compiled_s = bench_compiled(template_list, args.renders)
+
+    print(f"renders:    {args.renders:,}")
+    print(f"str.format: {format_s:.3f}s ({args.renders / format_s:,.0f}/s)")
+    print(f"compiled:   {compiled_s:.3f}s ({args.renders / compiled_s:,.0f}/s)")
+    print(f"speedup:    {format_s / compiled_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
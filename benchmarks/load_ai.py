@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Load and failure test for AI mode against the local fake Anthropic API.
+Drives generate_story(mode="ai") from worker threads through the real
+client, rate limiter, hedging and circuit breaker, and reports throughput,
+latency and fallback rates. Run from project root:
+
+    python -m benchmarks.load_ai
+    python -m benchmarks.load_ai -n 500 -c 32 --latency lognormal:0.8,0.5 --error-rate 429=0.05 --error-rate 500=0.02
+    python -m benchmarks.load_ai --deadline 0 --json results.json    # no hedging (batch behaviour)
+
+Client-side rate limits are off unless --rpm/--tpm are given, so the numbers
+show the AI path itself rather than the configured account limits.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from benchmarks.load_test import _name, percentile
+from src import ai_generator
+from src.ai_client import reset_client
+from src.circuit_breaker import get_breaker, set_breaker
+from src.config import AI_HEDGE_DEADLINE, AI_MAX_RETRIES
+from src.fake_anthropic import FakeAnthropicServer
+from src.metrics import get_counter, reset_metrics, snapshot
+from src.rate_limiter import RequestScheduler, get_scheduler, set_scheduler
+from src.story_cache import get_cache, set_cache
+from src.story_generator import generate_story
+
+
+def run_load(
+    server: FakeAnthropicServer,
+    requests: int,
+    concurrency: int,
+    deadline: float | None,
+    distinct: int,
+) -> dict:
+    """
+    Generates `requests` AI stories with `concurrency` threads against server.
+
+    Returns:
+        Results dict (throughput, latency percentiles, fallback rates and causes,
+        upstream requests and statuses, circuit breaker snapshot)
+    """
+    jobs = [[_name(i % distinct), "forest", "sword"] for i in range(requests)]
+    latencies: list[float] = []
+
+    def one(keywords: list[str]) -> None:
+        start = time.perf_counter()
+        generate_story(keywords, "fantasy", mode="ai", deadline=deadline)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, jobs))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    fallbacks = get_counter("story_fallbacks_total")
+    causes = {
+        counter["labels"]["cause"]: counter["value"]
+        for counter in snapshot()["counters"]
+        if counter["name"] == "ai_fallbacks_total"
+    }
+    return {
+        "stories": requests,
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "stories_per_s": requests / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "fallbacks": fallbacks,
+        "fallback_rate": fallbacks / requests if requests else 0.0,
+        "fallback_causes": causes,
+        "hedges": get_counter("ai_hedges_total"),
+        "upstream_requests": server.request_count,
+        "upstream_statuses": {str(status): n for status, n in sorted(server.status_counts.items())},
+        "retries": get_scheduler().stats()["retries"],
+        "circuit": get_breaker().snapshot(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test AI mode against the local fake Anthropic API.")
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--latency", default="lognormal:0.3,0.5", help="Fake API latency spec (see src.fake_anthropic)")
+    parser.add_argument("--error-rate", action="append", default=[], metavar="STATUS=RATE",
+                        help="Inject this HTTP status with this probability (repeatable)")
+    parser.add_argument("--deadline", type=float, default=AI_HEDGE_DEADLINE,
+                        help="generate_story latency budget; 0 = unhedged, wait for the call")
+    parser.add_argument("--distinct", type=int, default=1000, help="Distinct keyword triples")
+    parser.add_argument("--retries", type=int, default=AI_MAX_RETRIES, help="Scheduler retries per request")
+    parser.add_argument("--rpm", type=float, default=1e9, help="Client-side requests/minute limit")
+    parser.add_argument("--tpm", type=float, default=1e12, help="Client-side tokens/minute limit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    try:
+        error_rates = {int(status): float(rate) for status, _, rate in (e.partition("=") for e in args.error_rate)}
+    except ValueError:
+        parser.error("--error-rate takes STATUS=RATE, e.g. 429=0.05")
+
+    previous_scheduler, previous_cache = get_scheduler(), get_cache()
+    set_scheduler(RequestScheduler(requests_per_minute=args.rpm, tokens_per_minute=args.tpm, max_retries=args.retries))
+    set_cache(None)
+    set_breaker(None)
+    reset_client()
+    reset_metrics()
+    try:
+        with FakeAnthropicServer(latency=args.latency, error_rates=error_rates, seed=args.seed,
+                                 output_tokens=None, record_requests=False) as server, \
+                patch.dict(os.environ, {"ANTHROPIC_BASE_URL": server.url}), \
+                patch.object(ai_generator, "ANTHROPIC_API_KEY", "load-test-key"), \
+                patch("builtins.print"):  # silence per-story fallback notices
+            result = run_load(server, args.requests, args.concurrency, args.deadline or None, args.distinct)
+    finally:
+        reset_client()
+        set_scheduler(previous_scheduler)
+        set_cache(previous_cache)
+        set_breaker(None)
+
+    print(
+        f"{result['stories']} stories in {result['elapsed_s']:.2f}s  {result['stories_per_s']:,.1f} stories/s  "
+        f"p50 {result['p50_ms']:.0f} ms  p99 {result['p99_ms']:.0f} ms"
+    )
+    print(
+        f"fallbacks {result['fallbacks']:g} ({result['fallback_rate']:.1%})  causes {result['fallback_causes']}  "
+        f"hedges {result['hedges']:g}  retries {result['retries']}"
+    )
+    print(
+        f"upstream {result['upstream_requests']} requests  statuses {result['upstream_statuses']}  "
+        f"circuit {result['circuit']['state']} (opened {result['circuit']['opened']}x)"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Load test for the HTTP story service: reports p50/p99 latency and RPS.
+Run from project root:
+
+    python -m benchmarks.load_test                         # in-process service
+    python -m benchmarks.load_test --url http://127.0.0.1:8080 --mode ai
+
+AI mode uses ANTHROPIC_API_KEY / ANTHROPIC_BASE_URL as seen by the service;
+without a key every AI request falls back to template mode.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from src.server import StoryService, start_server
+
+
+async def _post(host: str, port: int, path: str, payload: dict) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+def _name(index: int) -> str:
+    """Letters-only keyword for index (keywords may not contain digits)."""
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("a") + rem) + letters
+    return f"hero-{letters}"
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_load(host: str, port: int, mode: str, requests: int, concurrency: int, distinct: int) -> dict:
+    """Fires `requests` POST /story calls with `concurrency` in flight; returns stats."""
+    latencies: list[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait({"keywords": [_name(i % distinct), "forest", "sword"], "mode": mode})
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            payload = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                status = await _post(host, port, "/story", payload)
+            except OSError:
+                status = 0
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def main_async(args) -> list[dict]:
+    service = server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        service = StoryService(template_workers=args.workers)
+        server = await start_server(service, "127.0.0.1", 0)
+        host, port = "127.0.0.1", server.sockets[0].getsockname()[1]
+
+    modes = ["template", "ai"] if args.mode == "both" else [args.mode]
+    try:
+        return [
+            await run_load(host, port, mode, args.requests, args.concurrency, args.distinct)
+            for mode in modes
+        ]
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+            await service.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the HTTP story service.")
+    parser.add_argument("--url", help="Target service URL (default: start one in-process)")
+    parser.add_argument("--mode", choices=["template", "ai", "both"], default="both")
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("--distinct", type=int, default=100, help="Distinct keyword triples (repeats exercise AI coalescing)")
+    parser.add_argument("--workers", type=int, default=4, help="Template workers for the in-process service")
+    args = parser.parse_args()
+
+    for result in asyncio.run(main_async(args)):
+        print(
+            f"{result['mode']:<9} {result['requests']:>7} req  {result['errors']:>5} errors  "
+            f"{result['rps']:>9,.0f} RPS  p50 {result['p50_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
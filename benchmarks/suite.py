@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite with a stored baseline and regression check.
+Run from project root:
+
+    python -m benchmarks.suite --save-baseline     # record benchmarks/baseline.json
+    python -m benchmarks.suite                     # compare against it (exit 1 on regression,
+                                                   # 2 if there is no baseline)
+    python -m benchmarks.suite -k template --quick -o results.json
+
+Each case reports the best per-operation time over several repeats. A case
+regresses when it is slower than the baseline by more than --threshold
+(a fraction, default 0.25). Baselines are machine-specific; record one on
+the machine that runs the comparison.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from unittest.mock import patch
+
+from src import ai_generator
+from src.ai_client import reset_client
+from src.input_handler import parse_batch, parse_keywords, validate_batch, validate_keywords
+from src.rate_limiter import RequestScheduler, get_scheduler, set_scheduler
+from src.story_cache import get_cache, set_cache
+from src.story_generator import _format_template, generate_story, generate_template_story
+from src.templates import GENRES, templates
+from src.fake_anthropic import FakeAnthropicServer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+REPEATS = 5
+
+# Fake API latency for the end-to-end AI case (seconds)
+AI_LATENCY = 0.02
+
+KEYWORDS = ["knight", "forest", "ancient sword"]
+
+
+def _template_story_case(genre: str):
+    def run(n: int) -> None:
+        rng = random.Random(0)
+        for _ in range(n):
+            generate_template_story(KEYWORDS, genre, rng=rng)
+    return run
+
+
+def _format_template_case(n: int) -> None:
+    template = templates["fantasy"]["middle"][0]
+    rng = random.Random(0)
+    for _ in range(n):
+        _format_template(template, "knight", "forest", "sword", rng)
+
+
+# A long comma-separated line, as pasted by a careless user
+LARGE_RAW = ", ".join(f"keyword {'x' * (i % 40)}" for i in range(5000))
+LARGE_KEYWORDS = ["a" * 50, "b" * 50, "c" * 50] + [f"extra {i}" for i in range(5000)]
+
+
+def _parse_keywords_case(n: int) -> None:
+    for _ in range(n):
+        parse_keywords(LARGE_RAW)
+
+
+def _validate_keywords_case(n: int) -> None:
+    for _ in range(n):
+        validate_keywords(LARGE_KEYWORDS)
+
+
+# Typical batch ingestion: many short rows, with repeats
+BATCH_RAW = [f"hero {chr(97 + i % 26)}{chr(97 + i // 26 % 26)}, forest, sword" for i in range(10_000)]
+
+
+def _batch_case(n: int) -> None:
+    for _ in range(n):
+        validate_batch(parse_batch(BATCH_RAW))
+
+
+def _ai_story_case(n: int) -> None:
+    """End-to-end generate_story(mode="ai") against a fake API adding AI_LATENCY per call."""
+    previous_scheduler, previous_cache = get_scheduler(), get_cache()
+    set_scheduler(RequestScheduler(requests_per_minute=1e9, tokens_per_minute=1e12))
+    set_cache(None)
+    reset_client()
+    try:
+        with FakeAnthropicServer(delay=AI_LATENCY) as server, \
+                patch.dict(os.environ, {"ANTHROPIC_BASE_URL": server.url}), \
+                patch.object(ai_generator, "ANTHROPIC_API_KEY", "bench-key"):
+            for _ in range(n):
+                generate_story(KEYWORDS, "fantasy", mode="ai")
+        if len(server.requests) != n:
+            raise RuntimeError("AI case fell back to templates; fake API not reached.")
+    finally:
+        reset_client()
+        set_scheduler(previous_scheduler)
+        set_cache(previous_cache)
+
+
+# name -> (function(n), iterations per repeat, quick iterations)
+CASES = {
+    **{f"template_story[{genre}]": (_template_story_case(genre), 20_000, 2_000) for genre in GENRES},
+    "format_template": (_format_template_case, 200_000, 20_000),
+    "parse_keywords[large]": (_parse_keywords_case, 500, 50),
+    "validate_keywords[large]": (_validate_keywords_case, 2_000, 200),
+    "validate_batch[10k rows]": (_batch_case, 20, 5),
+    "generate_story[ai]": (_ai_story_case, 50, 10),
+}
+
+
+def run_case(fn, n: int, repeats: int = REPEATS) -> dict:
+    """
+    Times fn(n) repeats times.
+
+    Returns:
+        dict with keys "n", "per_op_s" (best repeat / n) and "ops_per_s"
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(n)
+        best = min(best, time.perf_counter() - start)
+    per_op = best / n
+    return {"n": n, "per_op_s": per_op, "ops_per_s": 1 / per_op if per_op else 0.0}
+
+
+def run_suite(pattern: str = "", quick: bool = False) -> dict:
+    """Runs every case whose name contains pattern; returns the results document."""
+    results = {}
+    for name, (fn, n, quick_n) in CASES.items():
+        if pattern in name:
+            results[name] = run_case(fn, quick_n if quick else n, repeats=3 if quick else REPEATS)
+    return {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    Compares per-op times of cases present in both documents.
+
+    Returns:
+        One dict per regressed case with keys "name", "baseline_s", "current_s", "ratio"
+    """
+    regressions = []
+    for name, current in results["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["per_op_s"]:
+            continue
+        ratio = current["per_op_s"] / base["per_op_s"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                {"name": name, "baseline_s": base["per_op_s"], "current_s": current["per_op_s"], "ratio": ratio}
+            )
+    return regressions
+
+
+def _write_json(path: str, document: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and check for regressions.")
+    parser.add_argument("-k", "--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations (smoke run)")
+    parser.add_argument("-o", "--output", help="Write results JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown fraction")
+    args = parser.parse_args()
+
+    results = run_suite(args.filter, args.quick)
+    for name, result in results["results"].items():
+        print(f"{name:<28} {result['per_op_s'] * 1e6:12.2f} us/op  {result['ops_per_s']:>12,.0f} ops/s")
+
+    if args.output:
+        _write_json(args.output, results)
+    if args.save_baseline:
+        _write_json(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        # A missing baseline must not pass the check silently
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.", file=sys.stderr)
+        return 2
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for r in regressions:
+        print(
+            f"REGRESSION {r['name']}: {r['baseline_s'] * 1e6:.2f} -> {r['current_s'] * 1e6:.2f} us/op "
+            f"({(r['ratio'] - 1) * 100:+.0f}%)",
+            file=sys.stderr,
+        )
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} of baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,26 @@
 """
 Run the Automated Micro Story Generator.
 Execute from project root: python run.py
+Batch mode: python run.py batch jobs.jsonl -o stories.jsonl
+HTTP service: python run.py serve --port 8080
+Story archives: python run.py archive export stories.jsonl stories.sta
 """
 
+import sys
+
 from src.main import main
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from src.batch import batch_main
+
+        sys.exit(batch_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "archive":
+        from src.archive import archive_main
+
+        sys.exit(archive_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from src.server import serve_main
+
+        sys.exit(serve_main(sys.argv[2:]))
     main()
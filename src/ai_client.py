@@ -0,0 +1,238 @@
+"""
+Shared Anthropic client for the Automated Micro Story Generator.
+One process-wide client (and connection pool) is reused across calls and threads.
+Hedged calls, which need asyncio to race and cancel requests, use one
+process-wide AsyncAnthropic client that lives on a background event loop.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+import anthropic
+
+from .config import (
+    AI_KEEPALIVE_EXPIRY,
+    AI_MAX_CONNECTIONS,
+    AI_MAX_KEEPALIVE_CONNECTIONS,
+)
+
+_lock = threading.Lock()
+_client: "anthropic.Anthropic | None" = None
+_client_key: str | None = None
+_async_client: "anthropic.AsyncAnthropic | None" = None
+_async_client_key: str | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+
+_stats = {
+    "clients_created": 0,
+    "requests": 0,
+    "connections_opened": 0,
+}
+
+
+def _trace(event_name: str, info: dict) -> None:
+    """Connection-level trace callback; counts newly opened TCP connections."""
+    if event_name == "connection.connect_tcp.complete":
+        with _lock:
+            _stats["connections_opened"] += 1
+
+
+def _on_request(request) -> None:
+    """Request event hook; counts requests and attaches the trace callback."""
+    request.extensions["trace"] = _trace
+    with _lock:
+        _stats["requests"] += 1
+
+
+async def _trace_async(event_name: str, info: dict) -> None:
+    _trace(event_name, info)
+
+
+async def _on_request_async(request) -> None:
+    """Async client variant of _on_request() (httpx awaits async hooks and traces)."""
+    request.extensions["trace"] = _trace_async
+    with _lock:
+        _stats["requests"] += 1
+
+
+def _limits():
+    # The Limits class comes from whichever httpx package the SDK is built on
+    limits_class = type(anthropic.DEFAULT_CONNECTION_LIMITS)
+    return limits_class(
+        max_connections=AI_MAX_CONNECTIONS,
+        max_keepalive_connections=AI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=AI_KEEPALIVE_EXPIRY,
+    )
+
+
+def _build_http_client():
+    """Builds the pooled HTTP client with the configured keep-alive limits."""
+    return anthropic.DefaultHttpxClient(limits=_limits(), event_hooks={"request": [_on_request]})
+
+
+def get_client(api_key: str) -> "anthropic.Anthropic":
+    """
+    Returns the process-wide Anthropic client, creating it on first use.
+    A new client is only built if the API key changes.
+
+    Args:
+        api_key: Anthropic API key
+
+    Returns:
+        Shared anthropic.Anthropic instance (thread-safe to share)
+    """
+    global _client, _client_key
+    client = _client
+    if client is not None and _client_key == api_key:
+        return client
+
+    with _lock:
+        if _client is None or _client_key != api_key:
+            if _client is not None:
+                _close_quietly(_client)
+            # Retries are handled by rate_limiter.RequestScheduler
+            _client = anthropic.Anthropic(
+                api_key=api_key,
+                http_client=_build_http_client(),
+                max_retries=0,
+            )
+            _client_key = api_key
+            _stats["clients_created"] += 1
+        return _client
+
+
+def _client_loop() -> asyncio.AbstractEventLoop:
+    """Returns the background event loop, starting its daemon thread on first use."""
+    global _loop, _loop_thread
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="ai-client-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def _build_async_client(api_key: str) -> "anthropic.AsyncAnthropic":
+    _stats["clients_created"] += 1
+    # Retries are handled by rate_limiter.RequestScheduler
+    return anthropic.AsyncAnthropic(
+        api_key=api_key,
+        http_client=anthropic.DefaultAsyncHttpxClient(limits=_limits(), event_hooks={"request": [_on_request_async]}),
+        max_retries=0,
+    )
+
+
+def new_async_client(api_key: str) -> "anthropic.AsyncAnthropic":
+    """
+    Builds an AsyncAnthropic client with the configured pool limits and
+    connection stats, for a caller that runs its own event loop (the HTTP
+    service). The caller owns it and must close it on that loop.
+
+    Args:
+        api_key: Anthropic API key
+
+    Returns:
+        New anthropic.AsyncAnthropic instance
+    """
+    with _lock:
+        return _build_async_client(api_key)
+
+
+def get_async_client(api_key: str) -> "anthropic.AsyncAnthropic":
+    """
+    Returns the process-wide AsyncAnthropic client, creating it on first use.
+    It shares the pool limits and connection stats of get_client(), and must
+    only be used from coroutines passed to run_async().
+
+    Args:
+        api_key: Anthropic API key
+
+    Returns:
+        Shared anthropic.AsyncAnthropic instance
+    """
+    global _async_client, _async_client_key
+    client = _async_client
+    if client is not None and _async_client_key == api_key:
+        return client
+
+    loop = _client_loop()
+    replaced = None
+    with _lock:
+        if _async_client is None or _async_client_key != api_key:
+            replaced = _async_client
+            _async_client = _build_async_client(api_key)
+            _async_client_key = api_key
+        client = _async_client
+    # Closed outside the lock: the loop thread takes it in request hooks
+    if replaced is not None:
+        _close_async_quietly(replaced, loop)
+    return client
+
+
+def run_async(coro) -> concurrent.futures.Future:
+    """
+    Schedules coro on the background loop that owns get_async_client().
+    Works from any thread, including one that is running its own event loop.
+
+    Returns:
+        concurrent.futures.Future for the result; cancel() cancels the coroutine
+
+    Raises:
+        RuntimeError: If called from the background loop itself (the caller
+            would deadlock waiting for the result)
+    """
+    loop = _client_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_async() called from the AI client loop; await the coroutine instead.")
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+def reset_client() -> None:
+    """Closes and forgets the shared clients and clears connection stats."""
+    global _client, _client_key, _async_client, _async_client_key
+    with _lock:
+        if _client is not None:
+            _close_quietly(_client)
+        async_client = _async_client
+        _client = None
+        _client_key = None
+        _async_client = None
+        _async_client_key = None
+        for name in _stats:
+            _stats[name] = 0
+    if async_client is not None:
+        _close_async_quietly(async_client, _loop)
+
+
+def get_connection_stats() -> dict:
+    """
+    Returns connection reuse counters for the shared client.
+
+    Returns:
+        dict with keys:
+        - "clients_created": int
+        - "requests": int (HTTP requests sent, including SDK retries)
+        - "connections_opened": int (new TCP connections)
+        - "connections_reused": int (requests served on a kept-alive connection)
+    """
+    with _lock:
+        stats = dict(_stats)
+    stats["connections_reused"] = max(0, stats["requests"] - stats["connections_opened"])
+    return stats
+
+
+def _close_quietly(client) -> None:
+    try:
+        client.close()
+    except Exception:
+        pass
+
+
+def _close_async_quietly(client, loop: asyncio.AbstractEventLoop) -> None:
+    try:
+        asyncio.run_coroutine_threadsafe(client.close(), loop).result(timeout=5)
+    except Exception:
+        pass
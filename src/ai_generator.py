@@ -3,19 +3,62 @@ AI-powered story generation via Anthropic Claude API.
 Handles API calls, error handling, and prompt construction.
 """
 
+import asyncio
+import collections
+import math
+import queue
+import re
+import time
+from typing import Iterator
+
 import anthropic
 from anthropic import APIConnectionError, APIStatusError, RateLimitError
 
-from .config import ANTHROPIC_API_KEY, AI_MODEL, MAX_TOKENS
+from .ai_client import get_async_client, get_client, run_async
+from .circuit_breaker import CircuitBreaker, get_breaker
+from .metrics import inc, observe, timed
+from .rate_limiter import DeadlineExceeded, estimate_tokens, get_scheduler
+from .story_cache import cache_key, get_cache
+from .config import (
+    ANTHROPIC_API_KEY,
+    AI_CONCURRENCY,
+    AI_HEDGE_AFTER,
+    AI_HEDGE_DEADLINE,
+    AI_HEDGE_MIN_SAMPLES,
+    AI_HEDGE_WINDOW,
+    AI_MODEL,
+    AI_PACK_MAX,
+    AI_TOKEN_HEADROOM,
+    AI_TOKENS_PER_WORD,
+    MAX_TOKENS,
+    STORY_LENGTH,
+    STORY_LENGTHS,
+)
+
+# Constant instructions, sent as a cached system prefix; only the
+# keyword/genre tail from build_prompt() varies between requests.
+SYSTEM_PROMPT = """You write short, creative micro stories (1-3 paragraphs) from a character, \
+a setting and an object given by the user, in the genre they ask for.
+The story should be engaging, vivid, and self-contained.
+Only output the story text, nothing else."""
+
+SYSTEM_BLOCKS = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+
+# Latencies of recent successful hedged calls, for the hedge threshold
+_recent_latencies: collections.deque = collections.deque(maxlen=AI_HEDGE_WINDOW)
+
+# Output tokens per story seen in packed responses (moving average; None = no data yet)
+_tokens_per_story: float | None = None
 
 
-def build_prompt(keywords: list[str], genre: str = None) -> str:
+def build_prompt(keywords: list[str], genre: str = None, length: str | None = None) -> str:
     """
-    Constructs the prompt for the AI model.
+    Constructs the per-story part of the prompt (the instructions are in SYSTEM_PROMPT).
 
     Args:
         keywords: [character, place, object]
         genre: Optional genre name
+        length: Key of STORY_LENGTHS (default: config STORY_LENGTH)
 
     Returns:
         Formatted prompt string
@@ -23,17 +66,58 @@ def build_prompt(keywords: list[str], genre: str = None) -> str:
     if len(keywords) < 3:
         return ""
 
+    with timed("build_prompt_seconds"):
+        return _prompt_text(keywords, genre, _story_words(length))
+
+
+def _prompt_text(keywords: list[str], genre: str | None, words: int) -> str:
+    return f"Write a micro story of about {words} words using these elements:\n{_elements_text(keywords, genre)}"
+
+
+def _elements_text(keywords: list[str], genre: str | None) -> str:
     character, place, object_ = keywords[:3]
     genre_str = genre if genre else "any"
 
-    return f"""Write a short, creative micro story (1-3 paragraphs) using these elements:
-- Character: {character}
+    return f"""- Character: {character}
 - Setting: {place}
 - Object: {object_}
-Genre: {genre_str}
+Genre: {genre_str}"""
+
+
+def _story_words(length: str | None) -> int:
+    """Target word count for length; unknown lengths fall back to "medium"."""
+    return STORY_LENGTHS.get(length or STORY_LENGTH) or STORY_LENGTHS["medium"]
+
+
+def max_tokens_for(length: str | None = None) -> int:
+    """
+    Output token budget for a story of the given length.
+
+    Args:
+        length: Key of STORY_LENGTHS (default: config STORY_LENGTH)
+
+    Returns:
+        Estimated tokens for the target word count plus headroom, capped at MAX_TOKENS
+    """
+    return min(MAX_TOKENS, math.ceil(_story_words(length) * AI_TOKENS_PER_WORD * AI_TOKEN_HEADROOM))
+
+
+def request_params(prompt: str, length: str | None = None) -> dict:
+    """Messages API parameters for a build_prompt() output: cached system prefix plus the prompt."""
+    return {
+        "model": AI_MODEL,
+        "max_tokens": max_tokens_for(length),
+        "system": SYSTEM_BLOCKS,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+
+
+def _story_cache_key(params: dict) -> str:
+    return cache_key(SYSTEM_PROMPT + "\n" + params["messages"][-1]["content"], params["model"], params["max_tokens"])
 
-The story should be engaging, vivid, and self-contained.
-Only output the story text, nothing else."""
+
+def _estimated_tokens(params: dict) -> int:
+    return estimate_tokens(SYSTEM_PROMPT + params["messages"][-1]["content"], params["max_tokens"])
 
 
 def generate_ai_story(keywords: list[str], genre: str = None) -> str | None:
@@ -51,31 +135,758 @@ def generate_ai_story(keywords: list[str], genre: str = None) -> str | None:
         return None
 
     if not ANTHROPIC_API_KEY:
-        return None
+        return _failed("no_key")
 
     prompt = build_prompt(keywords, genre)
     if not prompt:
         return None
 
+    params = request_params(prompt)
+    cache = get_cache()
+    if cache is not None:
+        key = _story_cache_key(params)
+        cached = cache.get(key)
+        if cached:
+            return cached
+
+    breaker = get_breaker()
+    if not breaker.allow():
+        return _failed("circuit_open")
+
+    attempt = [0.0]
+    try:
+        client = get_client(ANTHROPIC_API_KEY)
+        with timed("ai_request_seconds"):
+            message = get_scheduler().call(
+                _stamped(lambda: client.messages.create(**params), attempt),
+                tokens=_estimated_tokens(params),
+            )
+    except Exception as exc:
+        _report_failure(breaker, exc)
+        return _failed(_failure_cause(exc))
+    breaker.record_success(time.perf_counter() - attempt[0])
+    _record_usage(message)
+
+    story = _extract_text(message)
+    if story and cache is not None:
+        cache.put(key, story)
+    return story or _failed("empty")
+
+
+class StreamInterrupted(Exception):
+    """Raised when an AI stream fails after some text was already yielded."""
+
+
+def stream_ai_story(
+    keywords: list[str],
+    genre: str = None,
+    deadline: float | None = None,
+    hedge_after: float | None = None,
+) -> Iterator[str]:
+    """
+    Streams a generated story from the Claude API as text chunks.
+
+    Time to first token and total latency are recorded in the
+    "ai_stream_ttft_seconds" and "ai_stream_total_seconds" histograms.
+
+    Args:
+        keywords: List of [character, place, object]
+        genre: Optional genre for the story
+        deadline: Latency budget in seconds for the first chunk. If the first
+            stream has not produced text after hedge_after seconds, a second
+            one is opened and the first to produce text wins; if neither has
+            when the budget runs out, nothing is yielded. None waits for one
+            stream without hedging.
+        hedge_after: Seconds before the hedge stream (default: hedge_delay())
+
+    Yields:
+        Text chunks as they arrive. Yields nothing if the stream cannot be
+        started (no key, connection, rate limit, etc.).
+
+    Raises:
+        StreamInterrupted: If the stream fails after text was yielded
+    """
+    if len(keywords) < 3:
+        return
+
+    if not ANTHROPIC_API_KEY:
+        _failed("no_key")
+        return
+
+    prompt = build_prompt(keywords, genre)
+    if not prompt:
+        return
+
+    params = request_params(prompt)
+    cache = get_cache()
+    if cache is not None:
+        key = _story_cache_key(params)
+        cached = cache.get(key)
+        if cached:
+            yield cached
+            return
+
+    if deadline is not None:
+        story = yield from _stream_hedged(params, deadline, hedge_after)
+        if story and cache is not None:
+            cache.put(key, story)
+        return
+
+    breaker = get_breaker()
+    if not breaker.allow():
+        _failed("circuit_open")
+        return
+
+    start = time.perf_counter()
+    attempt = [start]
     try:
-        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-        message = client.messages.create(
-            model=AI_MODEL,
-            max_tokens=MAX_TOKENS,
-            messages=[{"role": "user", "content": prompt}],
+        client = get_client(ANTHROPIC_API_KEY)
+        # Opening the stream sends the request, so only that step is retried
+        stream = get_scheduler().call(
+            _stamped(lambda: client.messages.stream(**params).__enter__(), attempt),
+            tokens=_estimated_tokens(params),
         )
+    except Exception as exc:
+        _report_failure(breaker, exc)
+        _failed(_failure_cause(exc))
+        return
+    # Judged by time to response headers; the body takes as long as the story
+    opened = time.perf_counter() - attempt[0]
+
+    chunks = []
+    try:
+        for text in stream.text_stream:
+            if not text:
+                continue
+            if not chunks:
+                observe("ai_stream_ttft_seconds", time.perf_counter() - start)
+            chunks.append(text)
+            yield text
+        _record_usage(stream.get_final_message())
+    except GeneratorExit:
+        breaker.release()
+        raise
+    except Exception as exc:
+        _report_failure(breaker, exc)
+        _failed(_failure_cause(exc))
+        if chunks:
+            raise StreamInterrupted(str(exc)) from exc
+        return
+    finally:
+        stream.close()
+    breaker.record_success(opened)
+
+    observe("ai_stream_total_seconds", time.perf_counter() - start)
+    story = "".join(chunks).strip()
+    if story and cache is not None:
+        cache.put(key, story)
+
+
+# Marks the end of a hedged stream's chunks
+_STREAM_END = object()
+
+
+def _stream_hedged(params: dict, deadline: float, hedge_after: float | None) -> Iterator[str]:
+    """
+    Relays _stream_hedged_async() from the shared client loop to the caller's thread.
+
+    Returns:
+        The complete story (empty if nothing was streamed)
+    """
+    chunks: queue.Queue = queue.Queue()
+
+    def finished(future) -> None:
+        if future.cancelled() or future.exception() is None:
+            chunks.put(_STREAM_END)
+        else:
+            chunks.put(future.exception())
+
+    future = run_async(
+        _stream_hedged_async(params, deadline, hedge_after, get_async_client(ANTHROPIC_API_KEY), chunks.put)
+    )
+    future.add_done_callback(finished)
+    parts = []
+    try:
+        while (item := chunks.get()) is not _STREAM_END:
+            if isinstance(item, BaseException):
+                raise item
+            parts.append(item)
+            yield item
+    finally:
+        # Stops (and releases) the stream if the caller quit early
+        future.cancel()
+    return "".join(parts).strip()
+
+
+async def _open_stream_async(params: dict, client: "anthropic.AsyncAnthropic"):
+    """
+    Opens one stream and waits for its first text.
+
+    Returns:
+        (stream, first text, seconds to response headers), or None if the
+        stream could not start (the failure is already counted)
+    """
+    breaker = get_breaker()
+    if not breaker.allow():
+        return _failed("circuit_open")
+
+    attempt = [0.0]
+    stream = None
+    try:
+        stream = await get_scheduler().call_async(
+            _stamped(lambda: client.messages.stream(**params).__aenter__(), attempt),
+            tokens=_estimated_tokens(params),
+        )
+        opened = time.perf_counter() - attempt[0]
+        text = ""
+        while not text:
+            text = await stream.text_stream.__anext__()
+        return stream, text, opened
+    except StopAsyncIteration:
+        breaker.record_success(time.perf_counter() - attempt[0])
+        await stream.close()
+        return _failed("empty")
+    except asyncio.CancelledError:
+        breaker.release()
+        if stream is not None:
+            await stream.close()
+        raise
+    except Exception as exc:
+        _report_failure(breaker, exc)
+        if stream is not None:
+            await stream.close()
+        return _failed(_failure_cause(exc))
+
+
+async def _stream_hedged_async(
+    params: dict,
+    deadline: float,
+    hedge_after: float | None,
+    client: "anthropic.AsyncAnthropic",
+    emit,
+) -> None:
+    """
+    Races up to two streams for the first text within deadline, then passes
+    the winner's chunks to emit().
+
+    Raises:
+        StreamInterrupted: If the winning stream fails after its first chunk
+    """
+    if hedge_after is None:
+        hedge_after = hedge_delay()
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    end = loop.time() + deadline
+    pending: set[asyncio.Future] = set()
+    started: dict[asyncio.Future, float] = {}
+    winner = None
+
+    def launch() -> None:
+        task = asyncio.ensure_future(_open_stream_async(params, client))
+        started[task] = loop.time()
+        pending.add(task)
+
+    launch()
+    try:
+        if hedge_after < deadline:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if not done:
+                inc("ai_hedges_total")
+                launch()
+
+        while pending and winner is None:
+            remaining = end - loop.time()
+            if remaining <= 0:
+                _budget_expired(pending)
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                opened = task.result()
+                if opened and winner is None:
+                    winner = opened
+                    _recent_latencies.append(loop.time() - started[task])
+                elif opened:
+                    # Both produced text at once; keep one
+                    get_breaker().record_success(opened[2])
+                    await opened[0].close()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    if winner is None:
+        return
+
+    stream, text, opened = winner
+    breaker = get_breaker()
+    observe("ai_stream_ttft_seconds", time.perf_counter() - start)
+    emit(text)
+    try:
+        async for text in stream.text_stream:
+            if text:
+                emit(text)
+        _record_usage(await stream.get_final_message())
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as exc:
+        _report_failure(breaker, exc)
+        _failed(_failure_cause(exc))
+        raise StreamInterrupted(str(exc)) from exc
+    finally:
+        await stream.close()
+    breaker.record_success(opened)
+    observe("ai_stream_total_seconds", time.perf_counter() - start)
+
+
+def _budget_expired(pending: set) -> None:
+    """
+    Counts the requests still running when a latency budget ran out as failed
+    calls (they were slower than the budget), then the fallback. Their
+    cancellation only releases the breaker, so otherwise a hanging API would
+    never open it.
+    """
+    breaker = get_breaker()
+    for _ in pending:
+        breaker.record_failure()
+    return _failed("latency_budget")
+
+
+def _failed(cause: str) -> None:
+    """Counts an AI failure (the caller falls back to templates) and returns None."""
+    inc("ai_fallbacks_total", cause=cause)
+    return None
+
+
+def _stamped(fn, attempt: list[float]):
+    """Wraps a scheduler call so attempt[0] holds the start time of its latest attempt."""
+    def call():
+        attempt[0] = time.perf_counter()
+        return fn()
+    return call
+
+
+def _report_failure(breaker: CircuitBreaker, exc: BaseException) -> None:
+    """Counts exc against the breaker if it points at an outage; other errors only end the call."""
+    if isinstance(exc, (APIConnectionError, RateLimitError, DeadlineExceeded)) or (
+        isinstance(exc, APIStatusError) and exc.status_code >= 500
+    ):
+        breaker.record_failure()
+    else:
+        breaker.release()
+
+
+def _failure_cause(exc: Exception) -> str:
+    """Maps an exception to its fallback cause label."""
+    if isinstance(exc, APIConnectionError):
+        return "connection"
+    if isinstance(exc, RateLimitError):
+        return "rate_limit"
+    if isinstance(exc, APIStatusError):
+        return "status"
+    if isinstance(exc, DeadlineExceeded):
+        return "deadline"
+    return "error"
+
+
+def _record_usage(message) -> None:
+    """Adds the response's token usage to the token counters."""
+    usage = getattr(message, "usage", None)
+    for field in ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"):
+        value = getattr(usage, field, None)
+        if isinstance(value, int):
+            inc(f"ai_{field}_total", value)
+
+
+def _extract_text(message) -> str | None:
+    """Extract stripped text from the first content block of a response."""
+    if message.content and len(message.content) > 0:
+        text = message.content[0].text
+        return text.strip() if text else None
+    return None
 
-        # Extract text from the first content block
-        if message.content and len(message.content) > 0:
-            text = message.content[0].text
-            return text.strip() if text else None
+
+async def generate_ai_story_async(
+    keywords: list[str],
+    genre: str = None,
+    client: "anthropic.AsyncAnthropic" = None,
+) -> str | None:
+    """
+    Async variant of generate_ai_story().
+
+    Args:
+        keywords: List of [character, place, object]
+        genre: Optional genre for the story
+        client: Optional shared AsyncAnthropic client. If omitted, a client
+            is created for this call and closed afterwards.
+
+    Returns:
+        Generated story string, or None on error (connection, rate limit, etc.)
+    """
+    if len(keywords) < 3:
         return None
 
-    except APIConnectionError:
+    if client is None:
+        if not ANTHROPIC_API_KEY:
+            return _failed("no_key")
+        async with anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, max_retries=0) as own_client:
+            return await generate_ai_story_async(keywords, genre, own_client)
+
+    prompt = build_prompt(keywords, genre)
+    if not prompt:
         return None
-    except RateLimitError:
+
+    params = request_params(prompt)
+    cache = get_cache()
+    if cache is not None:
+        key = _story_cache_key(params)
+        cached = cache.get(key)
+        if cached:
+            return cached
+
+    breaker = get_breaker()
+    if not breaker.allow():
+        return _failed("circuit_open")
+
+    attempt = [0.0]
+    try:
+        with timed("ai_request_seconds"):
+            message = await get_scheduler().call_async(
+                _stamped(lambda: client.messages.create(**params), attempt),
+                tokens=_estimated_tokens(params),
+            )
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as exc:
+        _report_failure(breaker, exc)
+        return _failed(_failure_cause(exc))
+    breaker.record_success(time.perf_counter() - attempt[0])
+    _record_usage(message)
+
+    story = _extract_text(message)
+    if story and cache is not None:
+        cache.put(key, story)
+    return story or _failed("empty")
+
+
+async def generate_ai_stories_async(
+    requests: list[tuple[list[str], str | None]],
+    concurrency: int = AI_CONCURRENCY,
+    client: "anthropic.AsyncAnthropic" = None,
+) -> list[str | None]:
+    """
+    Generates many AI stories concurrently over one shared async client.
+
+    Args:
+        requests: List of (keywords, genre) pairs
+        concurrency: Maximum number of requests in flight at once
+        client: Optional shared AsyncAnthropic client (created if omitted)
+
+    Returns:
+        List of story strings (or None per failed item), in input order
+    """
+    if client is None:
+        if not ANTHROPIC_API_KEY:
+            return [None] * len(requests)
+        async with anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, max_retries=0) as own_client:
+            return await generate_ai_stories_async(requests, concurrency, own_client)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(keywords: list[str], genre: str | None) -> str | None:
+        async with semaphore:
+            return await generate_ai_story_async(keywords, genre, client)
+
+    return await asyncio.gather(*(_one(kw, genre) for kw, genre in requests))
+
+
+# Header line before each story of a packed request and response
+_PACK_HEADER = "=== STORY {} ==="
+_PACK_HEADER_RE = re.compile(r"^[ \t]*=+[ \t]*STORY[ \t]+(\d+)[ \t]*=+[ \t]*$", re.MULTILINE | re.IGNORECASE)
+_PACK_HEADER_TOKENS = 8
+
+
+def pack_size(length: str | None = None) -> int:
+    """
+    Stories per packed request: as many as fit in MAX_TOKENS, judging by the
+    output tokens per story seen in packed responses (or the word-count
+    estimate before the first one), with AI_TOKEN_HEADROOM. Between 1 and
+    AI_PACK_MAX.
+    """
+    per_story = _tokens_per_story or _story_words(length) * AI_TOKENS_PER_WORD
+    return max(1, min(AI_PACK_MAX, int(MAX_TOKENS // (per_story * AI_TOKEN_HEADROOM + _PACK_HEADER_TOKENS))))
+
+
+def _observe_tokens_per_story(tokens: float) -> None:
+    global _tokens_per_story
+    _tokens_per_story = tokens if _tokens_per_story is None else 0.8 * _tokens_per_story + 0.2 * tokens
+
+
+def build_packed_prompt(requests: list[tuple[list[str], str | None]], length: str | None = None) -> str:
+    """
+    Constructs one prompt asking for a story per request, each under a numbered header.
+
+    Args:
+        requests: List of (keywords, genre) pairs, each with at least 3 keywords
+        length: Key of STORY_LENGTHS (default: config STORY_LENGTH)
+
+    Returns:
+        Formatted prompt string
+    """
+    sections = [
+        f"{_PACK_HEADER.format(number)}\n{_elements_text(keywords, genre)}"
+        for number, (keywords, genre) in enumerate(requests, start=1)
+    ]
+    return (
+        f"Write {len(requests)} separate micro stories of about {_story_words(length)} words each, "
+        "one for each numbered set of elements below.\n"
+        f"Start each story with its header line exactly as shown (e.g. {_PACK_HEADER.format(1)}), "
+        "in the same order, with nothing else between stories.\n\n" + "\n\n".join(sections)
+    )
+
+
+def parse_packed_stories(text: str, n: int, truncated: bool = False) -> list[str | None]:
+    """
+    Splits a packed response into its stories.
+
+    Args:
+        text: Response text with numbered story headers
+        n: Number of stories requested
+        truncated: The response hit max_tokens, so its last story may be cut off
+
+    Returns:
+        List of n stories in request order; None for each story that is
+        missing, empty, repeated or possibly cut off
+    """
+    matches = list(_PACK_HEADER_RE.finditer(text))
+    found: dict[int, list[str]] = {}
+    for i, match in enumerate(matches):
+        if i + 1 < len(matches):
+            end = matches[i + 1].start()
+        elif truncated:
+            break
+        else:
+            end = len(text)
+        found.setdefault(int(match.group(1)), []).append(text[match.end():end].strip())
+    return [
+        found[number][0] if len(found.get(number, ())) == 1 and found[number][0] else None
+        for number in range(1, n + 1)
+    ]
+
+
+async def _generate_pack(
+    pack: list[tuple[list[str], str | None]],
+    client: "anthropic.AsyncAnthropic",
+) -> list[str | None] | None:
+    """Sends one packed request; returns its parsed stories, or None if the call failed."""
+    breaker = get_breaker()
+    if not breaker.allow():
+        for _ in pack:
+            _failed("circuit_open")
+        return None
+
+    params = {**request_params(build_packed_prompt(pack)), "max_tokens": MAX_TOKENS}
+    inc("ai_packed_requests_total")
+    attempt = [0.0]
+    try:
+        with timed("ai_packed_request_seconds"):
+            message = await get_scheduler().call_async(
+                _stamped(lambda: client.messages.create(**params), attempt),
+                tokens=_estimated_tokens(params),
+            )
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as exc:
+        _report_failure(breaker, exc)
+        cause = _failure_cause(exc)
+        for _ in pack:
+            _failed(cause)
         return None
-    except APIStatusError:
+    # A packed call legitimately takes several stories' time
+    breaker.record_success((time.perf_counter() - attempt[0]) / len(pack))
+    _record_usage(message)
+
+    truncated = message.stop_reason == "max_tokens"
+    stories = parse_packed_stories(_extract_text(message) or "", len(pack), truncated)
+    parsed = sum(1 for story in stories if story)
+    output_tokens = getattr(message.usage, "output_tokens", None)
+    if parsed and not truncated and isinstance(output_tokens, int):
+        _observe_tokens_per_story(output_tokens / parsed)
+    return stories
+
+
+async def generate_ai_stories_packed_async(
+    requests: list[tuple[list[str], str | None]],
+    concurrency: int = AI_CONCURRENCY,
+    client: "anthropic.AsyncAnthropic" = None,
+) -> list[str | None]:
+    """
+    Like generate_ai_stories_async(), but asks for pack_size() stories per API call.
+
+    Stories missing from a packed response (unparseable, cut off) are
+    re-requested one by one; if the packed call itself fails, its items
+    are None so the caller falls back to templates.
+
+    Args:
+        requests: List of (keywords, genre) pairs
+        concurrency: Maximum number of requests in flight at once
+        client: Optional shared AsyncAnthropic client (created if omitted)
+
+    Returns:
+        List of story strings (or None per failed item), in input order
+    """
+    if client is None:
+        if not ANTHROPIC_API_KEY:
+            return [None] * len(requests)
+        async with anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, max_retries=0) as own_client:
+            return await generate_ai_stories_packed_async(requests, concurrency, own_client)
+
+    stories: list[str | None] = [None] * len(requests)
+    cache = get_cache()
+    keys: dict[int, str] = {}
+    pending = []
+    for i, (keywords, genre) in enumerate(requests):
+        if len(keywords) < 3:
+            continue
+        if cache is not None:
+            keys[i] = _story_cache_key(request_params(build_prompt(keywords, genre)))
+            stories[i] = cache.get(keys[i])
+            if stories[i]:
+                continue
+        pending.append(i)
+
+    size = pack_size()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _single(i: int) -> None:
+        async with semaphore:
+            stories[i] = await generate_ai_story_async(*requests[i], client)
+
+    async def _pack(indices: list[int]) -> None:
+        async with semaphore:
+            results = await _generate_pack([requests[i] for i in indices], client)
+        if results is None:
+            return
+        missing = []
+        for i, story in zip(indices, results):
+            if story is None:
+                missing.append(i)
+                continue
+            stories[i] = story
+            if i in keys:
+                cache.put(keys[i], story)
+        if missing:
+            inc("ai_pack_reissues_total", len(missing))
+            await asyncio.gather(*(_single(i) for i in missing))
+
+    packs = [pending[start:start + size] for start in range(0, len(pending), size)]
+    await asyncio.gather(*(_pack(indices) if len(indices) > 1 else _single(indices[0]) for indices in packs))
+    return stories
+
+
+def hedge_delay() -> float:
+    """
+    Seconds to wait before sending a hedge request: the p95 of recent AI
+    latencies, or AI_HEDGE_AFTER until AI_HEDGE_MIN_SAMPLES have been seen.
+    """
+    samples = sorted(_recent_latencies)
+    if len(samples) < AI_HEDGE_MIN_SAMPLES:
+        return AI_HEDGE_AFTER
+    return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+
+async def generate_ai_story_hedged_async(
+    keywords: list[str],
+    genre: str = None,
+    deadline: float = AI_HEDGE_DEADLINE,
+    hedge_after: float | None = None,
+    client: "anthropic.AsyncAnthropic" = None,
+) -> str | None:
+    """
+    generate_ai_story_async() under a latency budget.
+
+    If the first request has not answered after hedge_after seconds, an
+    identical second request is sent; the first successful answer wins and
+    the other request is cancelled. Nothing is awaited past the deadline.
+
+    Args:
+        keywords: List of [character, place, object]
+        genre: Optional genre for the story
+        deadline: Latency budget in seconds
+        hedge_after: Seconds before the hedge request (default: hedge_delay())
+        client: Optional shared AsyncAnthropic client (created if omitted)
+
+    Returns:
+        Generated story string, or None on error or when the budget runs out
+    """
+    if len(keywords) < 3:
         return None
-    except Exception:
+
+    if client is None:
+        if not ANTHROPIC_API_KEY:
+            return _failed("no_key")
+        async with anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, max_retries=0) as own_client:
+            return await generate_ai_story_hedged_async(keywords, genre, deadline, hedge_after, own_client)
+
+    if hedge_after is None:
+        hedge_after = hedge_delay()
+    loop = asyncio.get_running_loop()
+    end = loop.time() + deadline
+    pending: set[asyncio.Future] = set()
+    started: dict[asyncio.Future, float] = {}
+
+    def launch() -> None:
+        task = asyncio.ensure_future(generate_ai_story_async(keywords, genre, client))
+        started[task] = loop.time()
+        pending.add(task)
+
+    launch()
+    try:
+        if hedge_after < deadline:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if not done:
+                inc("ai_hedges_total")
+                launch()
+
+        while pending:
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                story = task.result()
+                if story:
+                    _recent_latencies.append(loop.time() - started[task])
+                    return story
+
+        # Every request failed (already counted), or the budget ran out
+        return _budget_expired(pending) if pending else None
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def generate_ai_story_hedged(
+    keywords: list[str],
+    genre: str = None,
+    deadline: float = AI_HEDGE_DEADLINE,
+    hedge_after: float | None = None,
+) -> str | None:
+    """
+    Synchronous generate_ai_story_hedged_async() on the shared async client
+    (see ai_client.run_async), so hedged calls reuse pooled connections.
+    Safe to call from a thread that runs its own event loop.
+    """
+    if len(keywords) < 3:
         return None
+    if not ANTHROPIC_API_KEY:
+        return _failed("no_key")
+    client = get_async_client(ANTHROPIC_API_KEY)
+    future = run_async(generate_ai_story_hedged_async(keywords, genre, deadline, hedge_after, client))
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
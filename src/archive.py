@@ -0,0 +1,301 @@
+"""
+Compact columnar archive for generated stories.
+Template stories are stored as their story_index number plus three
+keyword ids (21 bytes per story); everything else (AI stories, text that
+no longer matches the templates) goes into a zlib-compressed blob column.
+Readers memory-map the file and decode any record in O(1).
+
+Layout (little-endian, every section 8-byte aligned):
+    header   magic, version, record/keyword/blob counts, template fingerprint
+    kinds    uint8[records]      KIND_TEMPLATE or KIND_TEXT
+    values   uint64[records]     story index, or blob number for text records
+    keywords uint32[3 * records] keyword dictionary ids
+    keyword offsets uint32[keywords + 1], then UTF-8 keyword bytes
+    blob offsets    uint64[blobs + 1], then compressed blob bytes
+"""
+
+import argparse
+import contextlib
+import gzip
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from typing import Iterator, TextIO
+
+from .story_index import get_index
+
+MAGIC = b"STORYARC"
+VERSION = 2  # 2: 64-bit values, story indices of large template libraries exceed uint32
+KIND_TEMPLATE = 0
+KIND_TEXT = 1
+
+# magic, version, record count, keyword count, blob count, fingerprint (sha256 hex)
+_HEADER = struct.Struct("<8sIQQQ64s")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+
+def _padded(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _le(typecode: str, values) -> bytes:
+    """Packs values as a little-endian array."""
+    column = array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+class ArchiveWriter:
+    """
+    Collects stories and writes them as one archive file on close().
+
+    Args:
+        path: Output file
+        compression_level: zlib level for text blobs
+
+    Usage:
+        with ArchiveWriter("stories.sta") as writer:
+            writer.add(["knight", "forest", "sword"], story)
+    """
+
+    def __init__(self, path: str, compression_level: int = 9):
+        self.path = path
+        self.compression_level = compression_level
+        self._index = get_index()
+        self._kinds = array("B")
+        self._values = array("Q")
+        self._keyword_ids = array("I")
+        self._keyword_lookup: dict[str, int] = {}
+        self._blobs: list[bytes] = []
+
+    def _keyword_id(self, keyword: str) -> int:
+        keyword_id = self._keyword_lookup.get(keyword)
+        if keyword_id is None:
+            keyword_id = self._keyword_lookup[keyword] = len(self._keyword_lookup)
+        return keyword_id
+
+    def add(self, keywords: list[str], story: str, genre: str | None = None) -> str:
+        """
+        Appends one story.
+
+        Args:
+            keywords: [character, place, object] the story was generated from
+            story: Story text
+            genre: Optional genre hint (speeds up matching template stories)
+
+        Returns:
+            "template" if stored as a story index, "text" if stored as a blob
+
+        Raises:
+            ValueError: If keywords has fewer than 3 entries
+        """
+        if len(keywords) < 3:
+            raise ValueError("Archive records need three keywords.")
+        n = self._index.encode(story, keywords, genre)
+        if n is None:
+            self._kinds.append(KIND_TEXT)
+            self._values.append(len(self._blobs))
+            self._blobs.append(zlib.compress(story.encode("utf-8"), self.compression_level))
+        else:
+            self._kinds.append(KIND_TEMPLATE)
+            self._values.append(n)
+        self._keyword_ids.extend(self._keyword_id(keyword) for keyword in keywords[:3])
+        return "template" if n is not None else "text"
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    def close(self) -> None:
+        """Writes the archive file."""
+        keyword_bytes = [keyword.encode("utf-8") for keyword in self._keyword_lookup]
+        keyword_offsets = [0]
+        for data in keyword_bytes:
+            keyword_offsets.append(keyword_offsets[-1] + len(data))
+        blob_offsets = [0]
+        for blob in self._blobs:
+            blob_offsets.append(blob_offsets[-1] + len(blob))
+
+        sections = [
+            _HEADER.pack(
+                MAGIC, VERSION, len(self._kinds), len(keyword_bytes), len(self._blobs),
+                self._index.fingerprint.encode("ascii"),
+            ),
+            self._kinds.tobytes(),
+            _le("Q", self._values),
+            _le("I", self._keyword_ids),
+            _le("I", keyword_offsets) + b"".join(keyword_bytes),
+            _le("Q", blob_offsets) + b"".join(self._blobs),
+        ]
+        with open(self.path, "wb") as f:
+            for section in sections:
+                f.write(section)
+                f.write(b"\0" * (_padded(len(section)) - len(section)))
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+
+
+class ArchiveReader:
+    """
+    Memory-mapped random access to an archive written by ArchiveWriter.
+
+    Records are dicts with keys "keywords", "story" and "kind"
+    ("template" or "text"); template records also carry "genre".
+
+    Raises:
+        ValueError: If the file is not an archive, or was written against
+        a different template set (its story indices would be meaningless)
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, records, keywords, blobs, fingerprint = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} story archive.")
+            self._index = get_index()
+            if fingerprint.decode("ascii") != self._index.fingerprint:
+                raise ValueError(f"{path} was written for a different template set.")
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+        self._records = records
+        offset = _padded(_HEADER.size)
+        self._kinds_at = offset
+        offset += _padded(records)
+        self._values_at = offset
+        offset += _padded(8 * records)
+        self._keyword_ids_at = offset
+        offset += _padded(12 * records)
+        self._keyword_offsets_at = offset
+        self._keyword_data_at = offset + 4 * (keywords + 1)
+        keyword_data_size = _U32.unpack_from(self._map, self._keyword_data_at - 4)[0]
+        offset = _padded(self._keyword_data_at + keyword_data_size)
+        self._blob_offsets_at = offset
+        self._blob_data_at = offset + 8 * (blobs + 1)
+
+    def __len__(self) -> int:
+        return self._records
+
+    def _keyword(self, keyword_id: int) -> str:
+        at = self._keyword_offsets_at + 4 * keyword_id
+        start, end = _U32.unpack_from(self._map, at)[0], _U32.unpack_from(self._map, at + 4)[0]
+        return self._map[self._keyword_data_at + start:self._keyword_data_at + end].decode("utf-8")
+
+    def _blob(self, blob_id: int) -> str:
+        at = self._blob_offsets_at + 8 * blob_id
+        start, end = _U64.unpack_from(self._map, at)[0], _U64.unpack_from(self._map, at + 8)[0]
+        return zlib.decompress(self._map[self._blob_data_at + start:self._blob_data_at + end]).decode("utf-8")
+
+    def __getitem__(self, i: int) -> dict:
+        if i < 0:
+            i += self._records
+        if not 0 <= i < self._records:
+            raise IndexError(f"Record {i} out of range.")
+        keyword_at = self._keyword_ids_at + 12 * i
+        keywords = [self._keyword(_U32.unpack_from(self._map, keyword_at + 4 * k)[0]) for k in range(3)]
+        value = _U64.unpack_from(self._map, self._values_at + 8 * i)[0]
+        if self._map[self._kinds_at + i] == KIND_TEXT:
+            return {"keywords": keywords, "story": self._blob(value), "kind": "text"}
+        genre, _ = self._index.decode(value)
+        return {"keywords": keywords, "genre": genre, "story": self._index.story(value, keywords), "kind": "template"}
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(self._records):
+            yield self[i]
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def export_jsonl(infile: TextIO, path: str) -> dict:
+    """
+    Archives batch output (JSONL with "keywords", "story" and optional "genre").
+    Lines without a story (failed jobs) are skipped; other fields such as
+    "id" and "seed" are not kept.
+
+    Returns:
+        dict with counts: "records", "template", "text", "skipped"
+    """
+    counts = {"records": 0, "template": 0, "text": 0, "skipped": 0}
+    with ArchiveWriter(path) as writer:
+        for line in infile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            keywords = record.get("keywords") if isinstance(record, dict) else None
+            if not isinstance(keywords, list) or len(keywords) < 3 or not record.get("story"):
+                counts["skipped"] += 1
+                continue
+            counts[writer.add(keywords, record["story"], record.get("genre"))] += 1
+            counts["records"] += 1
+    return counts
+
+
+def import_jsonl(path: str, outfile: TextIO) -> int:
+    """Writes every archived record to outfile as JSONL; returns the record count."""
+    with ArchiveReader(path) as reader:
+        for record in reader:
+            outfile.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return len(reader)
+
+
+def _open_input(path: str) -> TextIO:
+    # Batch output written to a .gz path is gzip-compressed (see pipeline.open_sink)
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def archive_main(argv: list[str] | None = None) -> int:
+    """
+    CLI entry point:
+        python run.py archive export STORIES.jsonl ARCHIVE
+        python run.py archive import ARCHIVE [-o OUT.jsonl]
+    """
+    parser = argparse.ArgumentParser(prog="run.py archive", description="Pack or unpack story archives.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Pack batch output JSONL into an archive")
+    export_parser.add_argument("stories", help="Input JSONL file, gzip-compressed if it ends in .gz ('-' for stdin)")
+    export_parser.add_argument("archive", help="Archive file to write")
+    import_parser = commands.add_parser("import", help="Unpack an archive to JSONL")
+    import_parser.add_argument("archive", help="Archive file to read")
+    import_parser.add_argument("-o", "--output", default="-", help="Output JSONL file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        if args.command == "export":
+            infile = sys.stdin if args.stories == "-" else stack.enter_context(_open_input(args.stories))
+            counts = export_jsonl(infile, args.archive)
+            print(
+                f"Archived {counts['records']} stories ({counts['template']} template, "
+                f"{counts['text']} text); skipped {counts['skipped']}.",
+                file=sys.stderr,
+            )
+        else:
+            outfile = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "w", encoding="utf-8"))
+            count = import_jsonl(args.archive, outfile)
+            print(f"Unpacked {count} stories.", file=sys.stderr)
+    return 0
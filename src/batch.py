@@ -0,0 +1,313 @@
+"""
+Batch (non-interactive) story generation for the Automated Micro Story Generator.
+Streams job records from a JSONL file and writes one JSONL result per job.
+"""
+
+import argparse
+import contextlib
+import gzip
+import json
+import sys
+from typing import Iterable, Iterator, TextIO
+
+from .config import AI_PACK_WINDOW, METRICS_DUMP_INTERVAL
+from .input_handler import parse_keywords, validate_keywords
+from .metrics import get_counter, start_json_dump
+from .story_generator import generate_seeded_story, generate_stories, generate_story
+from .templates import GENRES
+
+VALID_MODES = ("template", "ai")
+
+
+def iter_jobs(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Parses JSONL job lines one at a time.
+
+    Each non-blank line must be a JSON object with:
+    - "keywords": list[str] or comma-separated str
+    - "genre": optional genre name (None/"random" = random)
+    - "mode": optional "template" or "ai" (default "template")
+    - "id": optional caller-supplied identifier, echoed in the result
+    - "seed": optional integer seed for template mode
+
+    Yields:
+        dict with keys "line" (1-based line number) and either "job" or "error"
+    """
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield {"line": line_no, "error": f"Invalid JSON: {exc.msg}."}
+            continue
+        if not isinstance(job, dict):
+            yield {"line": line_no, "error": "Job must be a JSON object."}
+            continue
+        yield {"line": line_no, "job": job}
+
+
+def prepare_job(job: dict, default_mode: str = "template") -> dict:
+    """
+    Normalizes and validates one job record without generating anything.
+
+    Returns:
+        Result dict with "keywords", "genre", "mode" (and "id"/"seed" when
+        given), plus "error" if the job is invalid.
+    """
+    raw_keywords = job.get("keywords", "")
+    if isinstance(raw_keywords, list):
+        raw_keywords = ",".join(str(kw) for kw in raw_keywords)
+    keywords = parse_keywords(str(raw_keywords))
+
+    genre = job.get("genre")
+    if isinstance(genre, str):
+        genre = genre.strip().lower()
+    if genre not in GENRES:
+        genre = None
+
+    mode = job.get("mode") or default_mode
+    result = {"keywords": keywords, "genre": genre, "mode": mode}
+    if "id" in job:
+        result = {"id": job["id"], **result}
+
+    if mode not in VALID_MODES:
+        result["error"] = f"Unsupported mode '{mode}'. Use 'template' or 'ai'."
+        return result
+
+    is_valid, error = validate_keywords(keywords)
+    if not is_valid:
+        result["error"] = error
+        return result
+
+    seed = job.get("seed")
+    if mode == "template" and seed is not None:
+        if not isinstance(seed, int):
+            result["error"] = "Seed must be an integer."
+            return result
+        result["seed"] = seed
+    return result
+
+
+def process_job(job: dict, default_mode: str = "template") -> dict:
+    """
+    Validates one job record and generates its story.
+
+    Returns:
+        Result dict with "keywords", "genre", "mode" and either "story" or "error".
+        Template results also carry the "seed" that regenerates the story.
+    """
+    return generate_job(prepare_job(job, default_mode))
+
+
+def generate_job(result: dict) -> dict:
+    """Adds the story to a result from prepare_job() (unchanged if it has an "error"); returns it."""
+    if "error" in result:
+        return result
+
+    if result["mode"] == "template":
+        _fill_template_story(result)
+    else:
+        # Offline: no latency budget, wait for the (pooled, rate-limited) AI call
+        result["story"] = generate_story(result["keywords"], result["genre"], mode="ai", deadline=None)
+    return result
+
+
+def _fill_template_story(result: dict) -> None:
+    """Adds a template "story" and the "seed" that regenerates it to a prepared job."""
+    result["story"], result["seed"] = generate_seeded_story(result["keywords"], result["genre"], seed=result.get("seed"))
+
+
+def _fill_ai_stories(results: list[dict]) -> None:
+    """Generates the stories of prepared AI jobs with packed requests (template fallback per item)."""
+    stories = generate_stories([(r["keywords"], r["genre"]) for r in results], mode="ai", packed=True)
+    for result, story in zip(results, stories):
+        result["story"] = story
+
+
+def run_batch(
+    infile: TextIO,
+    outfile: TextIO,
+    default_mode: str = "template",
+    pack: bool = False,
+) -> dict:
+    """
+    Streams jobs from infile to outfile, one JSON result line per job.
+    Only one job is held in memory at a time, or AI_PACK_WINDOW jobs with pack.
+
+    Args:
+        pack: Generate AI jobs several stories per API request; results are
+            still written in input order
+
+    Returns:
+        dict with counts: "total", "ok", "errors"
+    """
+    counts = {"total": 0, "ok": 0, "errors": 0}
+    window: list[dict] = []
+
+    def write(results: list[dict]) -> None:
+        for result in results:
+            counts["total"] += 1
+            counts["errors" if "error" in result else "ok"] += 1
+            outfile.write(json.dumps(result, ensure_ascii=False))
+            outfile.write("\n")
+
+    def flush() -> None:
+        pending = [r for r in window if "error" not in r and "story" not in r]
+        if pending:
+            _fill_ai_stories(pending)
+        write(window)
+        window.clear()
+
+    for item in iter_jobs(infile):
+        if "error" in item:
+            result = {"error": item["error"]}
+        elif pack:
+            result = prepare_job(item["job"], default_mode)
+            if "error" not in result and result["mode"] == "template":
+                _fill_template_story(result)
+        else:
+            result = process_job(item["job"], default_mode)
+        result["line"] = item["line"]
+
+        if pack:
+            window.append(result)
+            if len(window) >= AI_PACK_WINDOW:
+                flush()
+        else:
+            write([result])
+    flush()
+    return counts
+
+
+def run_batch_api(
+    infile: TextIO,
+    outfile: TextIO,
+    checkpoint_path: str,
+    default_mode: str = "template",
+    job_runner=None,
+) -> dict:
+    """
+    Like run_batch(), but sends every AI job through the Message Batches API.
+    All jobs are read first so results can be mapped back in input order.
+
+    Args:
+        checkpoint_path: Checkpoint file; rerun with the same path to resume
+        job_runner: Optional MessageBatchJob (built from checkpoint_path if omitted)
+
+    Returns:
+        dict with counts: "total", "ok", "errors", "fallbacks"
+    """
+    results = []
+    ai_slots = []
+    for item in iter_jobs(infile):
+        if "error" in item:
+            result = {"error": item["error"]}
+        else:
+            result = prepare_job(item["job"], default_mode)
+        result["line"] = item["line"]
+        if "error" not in result and result["mode"] == "ai":
+            ai_slots.append(len(results))
+        results.append(result)
+
+    if ai_slots:
+        if job_runner is None:
+            # Deferred: pulls in the anthropic SDK
+            from .message_batches import MessageBatchJob
+
+            job_runner = MessageBatchJob(checkpoint_path)
+        outputs = job_runner.run([(results[i]["keywords"], results[i]["genre"]) for i in ai_slots])
+        for slot, output in zip(ai_slots, outputs):
+            results[slot]["story"] = output["story"]
+            if output["fallback"]:
+                results[slot]["fallback"] = True
+
+    counts = {"total": 0, "ok": 0, "errors": 0, "fallbacks": 0}
+    for result in results:
+        if "error" not in result and "story" not in result:
+            _fill_template_story(result)
+        counts["total"] += 1
+        counts["errors" if "error" in result else "ok"] += 1
+        counts["fallbacks"] += bool(result.get("fallback"))
+        outfile.write(json.dumps(result, ensure_ascii=False))
+        outfile.write("\n")
+    return counts
+
+
+def _open_output(path: str) -> TextIO:
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def batch_main(argv: list[str] | None = None) -> int:
+    """
+    CLI entry point: python run.py batch JOBS.jsonl [-o OUT.jsonl] [--mode t|ai] [--batch-api CHECKPOINT]
+    [--metrics-json PATH] [--pack] [--workers N]
+
+    Output paths ending in .gz are gzip-compressed.
+
+    Returns:
+        Process exit code (0 = all jobs succeeded, 1 = some jobs failed)
+    """
+    parser = argparse.ArgumentParser(
+        prog="run.py batch",
+        description="Generate stories for every job in a JSONL file.",
+    )
+    parser.add_argument("jobs", help="Input JSONL file ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL file ('-' for stdout)")
+    parser.add_argument("--mode", choices=VALID_MODES, default="template", help="Default mode for jobs without one")
+    parser.add_argument(
+        "--batch-api",
+        metavar="CHECKPOINT",
+        help="Send AI jobs through the Message Batches API, checkpointing to this file",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Generator threads (more help AI jobs; output order is kept)",
+    )
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help=f"Ask for several stories per AI request, {AI_PACK_WINDOW} jobs at a time",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        help=f"Dump metrics as JSON to this file every {METRICS_DUMP_INTERVAL:g}s and on exit",
+    )
+    args = parser.parse_args(argv)
+
+    # Deferred: the pipeline module imports this one
+    from .pipeline import open_sink, run_pipeline
+
+    stdout = sys.stdout
+    with contextlib.ExitStack() as stack:
+        infile = sys.stdin if args.jobs == "-" else stack.enter_context(open(args.jobs, encoding="utf-8"))
+        if args.batch_api or args.pack:
+            outfile = stdout if args.output == "-" else stack.enter_context(_open_output(args.output))
+        else:
+            sink = stack.enter_context(open_sink(args.output))
+        # Keep fallback notices out of the JSONL stream
+        stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        if args.metrics_json:
+            stack.callback(start_json_dump(args.metrics_json, METRICS_DUMP_INTERVAL))
+        if args.batch_api:
+            counts = run_batch_api(infile, outfile, args.batch_api, default_mode=args.mode)
+        elif args.pack:
+            counts = run_batch(infile, outfile, default_mode=args.mode, pack=True)
+        else:
+            counts = run_pipeline(infile, sink, default_mode=args.mode, workers=args.workers)
+
+    print(f"Processed {counts['total']} jobs: {counts['ok']} ok, {counts['errors']} errors.", file=sys.stderr)
+    tokens = {field: int(get_counter(f"ai_{field}_tokens_total")) for field in ("input", "cache_read_input", "output")}
+    if any(tokens.values()):
+        print(
+            f"AI tokens: {tokens['input']} input, {tokens['cache_read_input']} read from prompt cache, "
+            f"{tokens['output']} output.",
+            file=sys.stderr,
+        )
+    return 1 if counts["errors"] else 0
@@ -0,0 +1,182 @@
+"""
+Circuit breaker for the AI path.
+Tracks the outcome of recent API calls. When too many of them fail or are
+too slow, the breaker opens and AI calls are skipped, so callers fall back
+to templates at once instead of waiting for a doomed request. After a
+cool-down a few probe calls are let through (half-open): if they succeed
+the breaker closes again, if one fails it reopens.
+"""
+
+import collections
+import threading
+import time
+
+from .config import (
+    AI_BREAKER_FAILURE_RATE,
+    AI_BREAKER_MIN_CALLS,
+    AI_BREAKER_OPEN_SECONDS,
+    AI_BREAKER_PROBES,
+    AI_BREAKER_SLOW_CALL,
+    AI_BREAKER_WINDOW,
+)
+from .metrics import inc
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed/open/half-open breaker.
+
+    Every allow() that returns True must be followed by exactly one of
+    record_success(), record_failure() or release().
+
+    Args:
+        window: Number of recent calls the failure rate is computed over
+        min_calls: Calls needed in the window before the breaker can open
+        failure_rate: Share of failed or slow calls in the window that opens it
+        slow_call: Seconds after which a successful call still counts as failed
+        open_seconds: Cool-down before probing a recovered API
+        probes: Successful probe calls needed to close again (also the
+            number of probes allowed in flight)
+        clock: Monotonic clock function (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        window: int = AI_BREAKER_WINDOW,
+        min_calls: int = AI_BREAKER_MIN_CALLS,
+        failure_rate: float = AI_BREAKER_FAILURE_RATE,
+        slow_call: float = AI_BREAKER_SLOW_CALL,
+        open_seconds: float = AI_BREAKER_OPEN_SECONDS,
+        probes: int = AI_BREAKER_PROBES,
+        clock=time.monotonic,
+    ):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.probes = max(1, probes)
+        self._clock = clock
+        self._state = CLOSED
+        self._outcomes: collections.deque = collections.deque(maxlen=window)  # True = failed/slow
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._stats = {"opened": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = self._clock()
+            self._stats["opened"] += 1
+        else:
+            self._outcomes.clear()
+        inc("ai_circuit_transitions_total", state=state)
+
+    @property
+    def state(self) -> str:
+        """Current state; an open breaker whose cool-down has passed reports half_open."""
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected outright (open and cooling down)."""
+        return self.state == OPEN
+
+    def allow(self) -> bool:
+        """
+        Asks to make one call.
+
+        Returns:
+            True if the call may go ahead (as a probe when half-open), False
+            if it should be skipped
+        """
+        with self._lock:
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.open_seconds:
+                    self._stats["rejected"] += 1
+                    return False
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probes_in_flight >= self.probes - self._probe_successes:
+                    self._stats["rejected"] += 1
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def record_success(self, latency: float) -> None:
+        """Records an allowed call that succeeded after latency seconds."""
+        self._record(latency > self.slow_call)
+
+    def record_failure(self) -> None:
+        """Records an allowed call that failed in a way that suggests an outage."""
+        self._record(True)
+
+    def release(self) -> None:
+        """Ends an allowed call without a verdict (cancelled, or a client-side error)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _record(self, failed: bool) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed:
+                    self._transition(OPEN)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.probes:
+                        self._transition(CLOSED)
+            elif self._state == CLOSED:
+                self._outcomes.append(failed)
+                if len(self._outcomes) >= self.min_calls and (
+                    sum(self._outcomes) / len(self._outcomes) >= self.failure_rate
+                ):
+                    self._transition(OPEN)
+            # OPEN: late results of calls started before the breaker opened are ignored
+
+    def snapshot(self) -> dict:
+        """Returns state, recent failure rate and counters for monitoring."""
+        state = self.state
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": state,
+                "window_calls": calls,
+                "failure_rate": sum(self._outcomes) / calls if calls else 0.0,
+                "opened": self._stats["opened"],
+                "rejected": self._stats["rejected"],
+                "retry_in": (
+                    max(0.0, self.open_seconds - (self._clock() - self._opened_at)) if state == OPEN else 0.0
+                ),
+            }
+
+
+_breaker: CircuitBreaker | None = None
+_breaker_lock = threading.Lock()
+
+
+def get_breaker() -> CircuitBreaker:
+    """Returns the process-wide breaker, creating it from config on first use."""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker()
+    return _breaker
+
+
+def set_breaker(breaker: CircuitBreaker | None) -> None:
+    """Replaces the process-wide breaker (None rebuilds it from config on next use)."""
+    global _breaker
+    with _breaker_lock:
+        _breaker = breaker
@@ -5,16 +5,120 @@ Loads settings from environment variables and .env file.
 
 import os
 
-from dotenv import load_dotenv
 
-load_dotenv()
+def _find_env_file() -> str | None:
+    """Returns the nearest .env in this package's directory or one of its parents."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def load_env(path: str | None = None) -> None:
+    """
+    Loads a .env file into os.environ with python-dotenv; existing variables win.
+
+    python-dotenv is only imported when there is a file to read, so runs
+    without a .env file never load it.
+
+    Args:
+        path: File to read (default: nearest .env, see _find_env_file)
+    """
+    path = path or _find_env_file()
+    if not path:
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv(path)
+
+
+load_env()
 
-# Load API key from environment variable
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
 
 # Model settings
 AI_MODEL = "claude-sonnet-4-5"
-MAX_TOKENS = 500
+MAX_TOKENS = 4096  # ceiling for any one request; packed requests use all of it
+
+# Story length for AI mode: target words per story, used in the prompt and
+# to size max_tokens (words * AI_TOKENS_PER_WORD * AI_TOKEN_HEADROOM)
+STORY_LENGTHS = {"short": 100, "medium": 200, "long": 400}
+STORY_LENGTH = os.environ.get("STORY_LENGTH", "medium")
+AI_TOKENS_PER_WORD = 1.35  # English prose
+AI_TOKEN_HEADROOM = 1.5  # slack so stories are not cut off mid-sentence
+
+# Maximum concurrent API requests for batch AI generation
+AI_CONCURRENCY = 8
+
+# Packed AI requests: several stories per call. The pack size is the number
+# of stories whose estimated output (observed tokens per story, with
+# AI_TOKEN_HEADROOM) fits in MAX_TOKENS, at most AI_PACK_MAX.
+AI_PACK_MAX = 8
+AI_PACK_WINDOW = 64  # AI jobs buffered per packing round in batch mode
+
+# Connection pool for the shared API client
+AI_MAX_CONNECTIONS = 20
+AI_MAX_KEEPALIVE_CONNECTIONS = 10
+AI_KEEPALIVE_EXPIRY = 30.0  # seconds an idle connection is kept open
+
+# Client-side rate limits and retry policy for API calls
+AI_REQUESTS_PER_MINUTE = 50
+AI_TOKENS_PER_MINUTE = 40000
+AI_MAX_RETRIES = 4
+AI_RETRY_BASE_DELAY = 1.0  # seconds; doubled per attempt, with jitter
+AI_RETRY_MAX_DELAY = 30.0  # seconds
+AI_REQUEST_DEADLINE = 60.0  # seconds before a queued/retrying request is dropped
+
+# Circuit breaker for AI calls: opens when too many recent calls failed or
+# were slow, so AI mode falls back to templates at once during an outage
+AI_BREAKER_WINDOW = 20  # recent calls the failure rate is computed over
+AI_BREAKER_MIN_CALLS = 5
+AI_BREAKER_FAILURE_RATE = 0.5
+AI_BREAKER_SLOW_CALL = 6.0  # seconds; slower successful calls count as failures (below AI_HEDGE_DEADLINE)
+AI_BREAKER_OPEN_SECONDS = 30.0  # cool-down before probe calls are let through
+AI_BREAKER_PROBES = 2  # successful probes needed to close again
+
+# Hedged AI requests for generate_story(mode="ai")
+AI_HEDGE_DEADLINE = 8.0  # seconds before giving up on AI and returning the template story
+AI_HEDGE_AFTER = 2.0  # seconds before the hedge request until AI_HEDGE_MIN_SAMPLES latencies give a p95
+AI_HEDGE_MIN_SAMPLES = 20
+AI_HEDGE_WINDOW = 200  # recent AI latencies kept for the p95
+
+# On-disk cache for AI stories (empty path disables caching)
+AI_CACHE_PATH = os.environ.get("AI_CACHE_PATH", "")
+AI_CACHE_MAX_ENTRIES = 10000
+AI_CACHE_TTL = 7 * 24 * 3600  # seconds; 0 = never expire
+AI_CACHE_VARIANTS = 1  # stories kept per request, rotated on repeat requests
+
+# Message Batches API backend for offline AI jobs
+BATCH_API_POLL_INTERVAL = 30.0  # seconds between status checks
+BATCH_API_MAX_REQUESTS = 10000  # requests per submitted batch
+BATCH_API_CLOCK_SKEW = 300.0  # seconds of local/server clock difference tolerated when recovering a submission
+
+# Bulk generation pipeline (run.py batch): queue capacity between stages
+# and bytes collected per output write
+PIPELINE_QUEUE_SIZE = 256
+PIPELINE_BUFFER_SIZE = 1 << 20
+
+# Metrics (set STORY_METRICS=0 in the environment to disable recording)
+METRICS_ENABLED = os.environ.get("STORY_METRICS", "1") != "0"
+METRICS_DUMP_INTERVAL = 60.0  # seconds between periodic JSON dumps
+
+# Template library: a directory of *.json / *.yaml files, one genre per file,
+# merged over the built-in templates. Empty = built-in templates only.
+TEMPLATE_DIR = os.environ.get("STORY_TEMPLATE_DIR", "")
+TEMPLATE_RELOAD_INTERVAL = 2.0  # seconds between mtime checks in long-running services
 
 # Mode
 DEFAULT_MODE = "template"  # "template" or "ai"
+
+# HTTP story service (python run.py serve)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8080
+SERVER_TEMPLATE_WORKERS = 4
+SERVER_MAX_BODY = 10 * 1024 * 1024  # bytes
@@ -0,0 +1,451 @@
+"""
+Local, deterministic stand-in for the Anthropic Messages API.
+Serves POST /v1/messages (streaming and non-streaming) and the
+/v1/messages/batches endpoints from a background thread, with scripted or
+random latency, injected 429/5xx errors and configurable token usage.
+Used by the tests, the benchmarks and for offline load and failure drills:
+
+    python -m src.fake_anthropic --port 8089 --latency lognormal:0.8,0.4 --error-rate 429=0.05
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8089 ANTHROPIC_API_KEY=fake python run.py
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Error types the real API sends with these status codes
+ERROR_TYPES = {
+    400: "invalid_request_error",
+    401: "authentication_error",
+    429: "rate_limit_error",
+    500: "api_error",
+    529: "overloaded_error",
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients drop requests they no longer need (cancelled hedges); not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _iso(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+def parse_latency(spec: str):
+    """
+    Parses a latency distribution spec.
+
+    Specs (seconds):
+        "0.2"                  fixed
+        "uniform:LOW,HIGH"
+        "normal:MEAN,STDDEV"   (clamped at 0)
+        "lognormal:MEDIAN,SIGMA"
+        "exp:MEAN"
+
+    Returns:
+        Function rng -> seconds, drawing from random.Random rng
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        if not args:
+            value = float(kind)
+            return lambda rng: value
+        params = [float(arg) for arg in args.split(",")]
+        if kind == "uniform" and len(params) == 2:
+            return lambda rng: rng.uniform(*params)
+        if kind == "normal" and len(params) == 2:
+            return lambda rng: max(0.0, rng.gauss(*params))
+        if kind == "lognormal" and len(params) == 2:
+            median, sigma = params
+            return lambda rng: median * rng.lognormvariate(0.0, sigma)
+        if kind == "exp" and len(params) == 1:
+            rate = 1 / params[0]
+            return lambda rng: rng.expovariate(rate)
+    except (ValueError, ZeroDivisionError):
+        pass
+    raise ValueError(f"Invalid latency spec '{spec}'.")
+
+
+class FakeAnthropicServer:
+    """
+    Minimal /v1/messages stand-in.
+
+    Random choices (latency, error injection) come from one random.Random
+    seeded with seed, so a run with the same seed and request order repeats.
+
+    Attributes:
+        delay: Seconds to sleep before answering each request
+        delays: Queue of per-request delays used (in arrival order) before falling back to latency/delay
+        latency: Optional distribution spec (see parse_latency) used instead of delay
+        statuses: Queue of HTTP status codes to return before succeeding
+        error_rates: {status: probability} of injecting an error once statuses is empty
+        input_tokens: Reported input tokens per request
+        output_tokens: Reported output tokens per story (None = estimate from the story text)
+        retry_after: Value of the retry-after header sent with 429 responses
+        stream_error_after: For streaming requests, send an error event after
+            this many text deltas (None = stream completes normally)
+        batch_polls: Retrieve calls before a message batch reports "ended"
+        batch_errored_ids: custom_ids whose batch result is "errored"
+        pack_dropped: Story numbers left out of packed (multi-story) responses
+        batches: Submitted message batches by id
+        requests: Parsed JSON bodies of every request received
+        cached_prefixes: System texts marked with cache_control seen so far
+        record_requests: Keep request bodies in requests (off for long runs)
+        request_count: Messages requests received
+        status_counts: Responses sent per HTTP status
+        max_in_flight: Highest number of concurrent requests observed
+
+    Usage:
+        with FakeAnthropicServer() as server:
+            client = anthropic.Anthropic(api_key="test", base_url=server.url)
+    """
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        delays: list[float] | None = None,
+        latency: str | None = None,
+        statuses: list[int] | None = None,
+        error_rates: dict[int, float] | None = None,
+        input_tokens: int = 50,
+        output_tokens: int | None = 20,
+        seed: int | None = 0,
+        retry_after: str | None = None,
+        stream_error_after: int | None = None,
+        batch_polls: int = 1,
+        batch_errored_ids: set[str] | None = None,
+        pack_dropped: set[int] | None = None,
+        record_requests: bool = True,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.delay = delay
+        self.delays = list(delays or [])
+        self.latency = parse_latency(latency) if latency else None
+        self.statuses = list(statuses or [])
+        self.error_rates = dict(error_rates or {})
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.record_requests = record_requests
+        self.retry_after = retry_after
+        self.stream_error_after = stream_error_after
+        self.batch_polls = batch_polls
+        self.batch_errored_ids = set(batch_errored_ids or ())
+        self.pack_dropped = set(pack_dropped or ())
+        self.batches: dict[str, dict] = {}
+        self.requests: list[dict] = []
+        self.request_count = 0
+        self.status_counts: dict[int, int] = {}
+        self.cached_prefixes: set[str] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), self._handler_class())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeAnthropicServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def story_for(self, body: dict) -> str:
+        """Deterministic story text echoing the prompt's character; one headed story per section of a packed prompt."""
+        prompt = body["messages"][-1]["content"]
+        if isinstance(prompt, list):
+            prompt = prompt[-1]["text"]
+        sections = re.split(r"^=== STORY (\d+) ===$", prompt, flags=re.MULTILINE)
+        if len(sections) == 1:
+            return self._one_story(prompt)
+        return "\n\n".join(
+            f"=== STORY {number} ===\n{self._one_story(section)}"
+            for number, section in zip(sections[1::2], sections[2::2])
+            if int(number) not in self.pack_dropped
+        )
+
+    @staticmethod
+    def _one_story(prompt: str) -> str:
+        character = prompt.split("- Character: ", 1)[-1].split("\n", 1)[0]
+        return f"A fake story about a {character}."
+
+    def usage_for(self, body: dict, output_tokens: int | None = None) -> dict:
+        """Usage block; a system prefix marked with cache_control is written once, then read."""
+        if output_tokens is None:
+            output_tokens = self._output_tokens(body)
+        usage = {"input_tokens": self.input_tokens, "output_tokens": output_tokens}
+        system = body.get("system")
+        if isinstance(system, list):
+            cached = "".join(block["text"] for block in system if block.get("cache_control"))
+            if cached:
+                with self._lock:
+                    hit = cached in self.cached_prefixes
+                    self.cached_prefixes.add(cached)
+                field = "cache_read_input_tokens" if hit else "cache_creation_input_tokens"
+                usage[field] = len(cached) // 4
+        return usage
+
+    def _output_tokens(self, body: dict) -> int:
+        if self.output_tokens is None:
+            return max(1, round(len(self.story_for(body).split()) * 1.35))
+        return self.output_tokens * max(1, self.story_for(body).count("=== STORY "))
+
+    def message_for(self, body: dict, message_id: str) -> dict:
+        """Non-streaming Messages API response for a request body."""
+        return {
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": self.story_for(body)}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": self.usage_for(body),
+        }
+
+    def batch_object(self, batch_id: str) -> dict:
+        """Message batch resource; ends after `batch_polls` retrieve calls."""
+        batch = self.batches[batch_id]
+        ended = batch["polls"] >= self.batch_polls
+        count = len(batch["requests"])
+        errored = sum(r["custom_id"] in self.batch_errored_ids for r in batch["requests"])
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else count,
+                "succeeded": count - errored if ended else 0,
+                "errored": errored if ended else 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": _iso(batch["created"]),
+            "expires_at": _iso(batch["created"] + 86400),
+            "ended_at": "2026-01-01T01:00:00Z" if ended else None,
+            "results_url": f"{self.url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def _next_delay(self) -> float:
+        with self._lock:
+            if self.delays:
+                return self.delays.pop(0)
+            return self.latency(self._rng) if self.latency else self.delay
+
+    def _next_status(self) -> int:
+        with self._lock:
+            if self.statuses:
+                return self.statuses.pop(0)
+            draw = self._rng.random() if self.error_rates else 1.0
+            for status, rate in sorted(self.error_rates.items()):
+                if draw < rate:
+                    return status
+                draw -= rate
+            return 200
+
+    def _count_status(self, status: int) -> None:
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parts = self.path.split("?", 1)[0].strip("/").split("/")
+                if parts == ["v1", "messages", "batches"]:
+                    # Newest first, like the real list endpoint; one page
+                    with server._lock:
+                        data = [server.batch_object(batch_id) for batch_id in reversed(server.batches)]
+                    self._send_json(200, {
+                        "data": data,
+                        "has_more": False,
+                        "first_id": data[0]["id"] if data else None,
+                        "last_id": data[-1]["id"] if data else None,
+                    })
+                    return
+                # v1/messages/batches/{id}[/results]
+                if len(parts) < 4 or parts[:3] != ["v1", "messages", "batches"] or parts[3] not in server.batches:
+                    self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": "Not found"}})
+                    return
+                batch_id = parts[3]
+                if len(parts) == 4:
+                    with server._lock:
+                        server.batches[batch_id]["polls"] += 1
+                    self._send_json(200, server.batch_object(batch_id))
+                    return
+                lines = []
+                for i, request in enumerate(server.batches[batch_id]["requests"]):
+                    custom_id = request["custom_id"]
+                    if custom_id in server.batch_errored_ids:
+                        result = {"type": "errored", "error": {"type": "error", "error": {
+                            "type": "invalid_request_error", "message": "Injected failure"}}}
+                    else:
+                        result = {"type": "succeeded",
+                                  "message": server.message_for(request["params"], f"msg_{batch_id}_{i}")}
+                    lines.append(json.dumps({"custom_id": custom_id, "result": result}))
+                data = ("\n".join(lines) + "\n").encode("utf-8")
+                self.send_response(200)
+                self.send_header("content-type", "application/binary")
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.split("?", 1)[0].rstrip("/") == "/v1/messages/batches":
+                    with server._lock:
+                        batch_id = f"msgbatch_fake_{len(server.batches) + 1}"
+                        server.batches[batch_id] = {"requests": body["requests"], "polls": 0, "created": time.time()}
+                    self._send_json(200, server.batch_object(batch_id))
+                    return
+                with server._lock:
+                    server.request_count += 1
+                    if server.record_requests:
+                        server.requests.append(body)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    delay = server._next_delay()
+                    if delay:
+                        time.sleep(delay)
+                    status = server._next_status()
+                    server._count_status(status)
+                    if status != 200:
+                        headers = {}
+                        if status == 429 and server.retry_after is not None:
+                            headers["retry-after"] = server.retry_after
+                        self._send_json(status, {
+                            "type": "error",
+                            "error": {"type": ERROR_TYPES.get(status, "api_error"), "message": f"Injected {status}"},
+                        }, headers)
+                        return
+                    if body.get("stream"):
+                        self._send_stream(body)
+                        return
+                    self._send_json(200, server.message_for(body, f"msg_fake_{server.request_count}"))
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _send_stream(self, body: dict) -> None:
+                self.send_response(200)
+                self.send_header("content-type", "text/event-stream")
+                self.send_header("connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def event(name: str, data: dict) -> None:
+                    self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                event("message_start", {"type": "message_start", "message": {
+                    "id": f"msg_fake_{server.request_count}", "type": "message", "role": "assistant",
+                    "content": [], "model": body.get("model", "fake"), "stop_reason": None,
+                    "stop_sequence": None, "usage": server.usage_for(body, output_tokens=1),
+                }})
+                event("content_block_start", {"type": "content_block_start", "index": 0,
+                                              "content_block": {"type": "text", "text": ""}})
+                words = server.story_for(body).split(" ")
+                for i, word in enumerate(words):
+                    if server.stream_error_after is not None and i >= server.stream_error_after:
+                        event("error", {"type": "error", "error": {
+                            "type": "overloaded_error", "message": "Injected stream failure"}})
+                        return
+                    text = word if i == 0 else " " + word
+                    event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                  "delta": {"type": "text_delta", "text": text}})
+                event("content_block_stop", {"type": "content_block_stop", "index": 0})
+                event("message_delta", {"type": "message_delta",
+                                        "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                        "usage": {"output_tokens": server._output_tokens(body)}})
+                event("message_stop", {"type": "message_stop"})
+
+            def _send_json(self, status: int, payload: dict, headers: dict | None = None) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    CLI entry point: python -m src.fake_anthropic [--host H] [--port P] [--latency SPEC]
+    [--error-rate STATUS=RATE ...] [--output-tokens N] [--seed N]
+    """
+    parser = argparse.ArgumentParser(description="Serve a fake Anthropic Messages API for load and failure testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="0", help="Latency spec, e.g. 0.5, uniform:0.2,1, lognormal:0.8,0.4")
+    parser.add_argument(
+        "--error-rate",
+        action="append",
+        default=[],
+        metavar="STATUS=RATE",
+        help="Inject this HTTP status with this probability (repeatable), e.g. 429=0.05",
+    )
+    parser.add_argument("--retry-after", help="retry-after header for injected 429s")
+    parser.add_argument("--output-tokens", type=int, help="Output tokens per story (default: from story length)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        error_rates = {int(status): float(rate) for status, _, rate in (e.partition("=") for e in args.error_rate)}
+        server = FakeAnthropicServer(
+            latency=args.latency,
+            error_rates=error_rates,
+            retry_after=args.retry_after,
+            output_tokens=args.output_tokens,
+            seed=args.seed,
+            record_requests=False,
+            host=args.host,
+            port=args.port,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    with server:
+        print(f"Fake Anthropic API on {server.url} (Ctrl-C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    print(f"Served {server.request_count} requests: {dict(sorted(server.status_counts.items()))}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
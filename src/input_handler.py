@@ -4,10 +4,34 @@ Handles user input for keywords and genre selection.
 """
 
 import re
+from typing import Iterable
+
+from .metrics import timed
 from .templates import GENRES
 
 MAX_KEYWORD_LENGTH = 50
 KEYWORD_PATTERN = re.compile(r"^[a-zA-Z\s\-]+$")
+# Charset and length in one fullmatch; on failure the length decides which error applies
+_KEYWORD_FULLMATCH = re.compile(rf"[a-zA-Z\s\-]{{1,{MAX_KEYWORD_LENGTH}}}").fullmatch
+
+# Structured error codes returned by validate_batch()
+ERR_EMPTY = "empty"
+ERR_TOO_FEW = "too_few"
+ERR_DUPLICATE = "duplicate"
+ERR_TOO_LONG = "too_long"
+ERR_UNSUPPORTED_CHARS = "unsupported_chars"
+
+ERROR_MESSAGES = {
+    ERR_EMPTY: "Input cannot be empty.",
+    ERR_TOO_FEW: "Please enter at least three keywords.",
+    ERR_DUPLICATE: "Duplicate keywords are not allowed.",
+    ERR_TOO_LONG: f"Keywords must be {MAX_KEYWORD_LENGTH} characters or fewer.",
+    ERR_UNSUPPORTED_CHARS: "Keywords contain unsupported characters. Only letters, spaces, and hyphens are allowed.",
+}
+
+# Three-keyword rows already known to be valid (cleared when full)
+VALID_ROW_CACHE_SIZE = 100_000
+_valid_rows: set[tuple[str, ...]] = set()
 
 
 def validate_keywords(keywords: list[str]) -> tuple[bool, str]:
@@ -25,23 +49,51 @@ def validate_keywords(keywords: list[str]) -> tuple[bool, str]:
     - Unsupported/special characters (only allow letters, spaces, hyphens)
     - Excessively long keywords (cap at 50 chars each)
     """
+    with timed("validate_keywords_seconds"):
+        code = keyword_error(keywords)
+    return (True, "") if code is None else (False, ERROR_MESSAGES[code])
+
+
+def keyword_error(keywords: list[str]) -> str | None:
+    """
+    Checks one keyword list in a single pass.
+
+    Returns:
+        One of the ERR_* codes, or None if the keywords are valid
+    """
+    if len(keywords) != 3:
+        return _check(keywords)
+    row = tuple(keywords)
+    if row in _valid_rows:
+        return None
+    code = _check(row)
+    if code is None:
+        if len(_valid_rows) >= VALID_ROW_CACHE_SIZE:
+            _valid_rows.clear()
+        _valid_rows.add(row)
+    return code
+
+
+def _check(keywords) -> str | None:
     if not keywords:
-        return False, "Input cannot be empty."
+        return ERR_EMPTY
 
     if len(keywords) < 3:
-        return False, "Please enter at least three keywords."
+        return ERR_TOO_FEW
 
-    if len(set(keywords)) != len(keywords):
-        return False, "Duplicate keywords are not allowed."
+    if len(keywords) == 3:
+        first, second, third = keywords
+        duplicate = first == second or first == third or second == third
+    else:
+        duplicate = len(set(keywords)) != len(keywords)
+    if duplicate:
+        return ERR_DUPLICATE
 
     for kw in keywords[:3]:
-        if len(kw) > MAX_KEYWORD_LENGTH:
-            return False, f"Keywords must be {MAX_KEYWORD_LENGTH} characters or fewer."
+        if not _KEYWORD_FULLMATCH(kw):
+            return ERR_TOO_LONG if len(kw) > MAX_KEYWORD_LENGTH else ERR_UNSUPPORTED_CHARS
 
-        if not KEYWORD_PATTERN.match(kw):
-            return False, "Keywords contain unsupported characters. Only letters, spaces, and hyphens are allowed."
-
-    return True, ""
+    return None
 
 
 def parse_keywords(raw_input: str) -> list[str]:
@@ -49,8 +101,42 @@ def parse_keywords(raw_input: str) -> list[str]:
     Parses comma-separated input into a list of trimmed keywords.
     Returns first 3 keywords (or fewer if less provided).
     """
-    keywords = [word.strip() for word in raw_input.split(",") if word.strip()]
-    return keywords[:3]
+    with timed("parse_keywords_seconds"):
+        return _parse(raw_input)
+
+
+def _parse(raw_input: str) -> list[str]:
+    keywords = []
+    for word in raw_input.split(","):
+        word = word.strip()
+        if word:
+            keywords.append(word)
+            if len(keywords) == 3:
+                break
+    return keywords
+
+
+def parse_batch(raw_rows: Iterable[str]) -> list[list[str]]:
+    """
+    Parses many comma-separated rows at once (see parse_keywords).
+
+    Returns:
+        One keyword list (at most 3 items) per row, in input order
+    """
+    with timed("parse_batch_seconds"):
+        return [_parse(raw) for raw in raw_rows]
+
+
+def validate_batch(rows: Iterable[list[str]]) -> list[str | None]:
+    """
+    Validates many keyword lists at once.
+
+    Returns:
+        One entry per row in input order: None if valid, otherwise an ERR_*
+        code (ERROR_MESSAGES maps codes to the messages validate_keywords uses)
+    """
+    with timed("validate_batch_seconds"):
+        return [keyword_error(row) for row in rows]
 
 
 def get_user_input() -> dict:
@@ -3,7 +3,7 @@ CLI entry point for the Automated Micro Story Generator.
 """
 
 from .input_handler import get_user_input
-from .story_generator import generate_story
+from .story_generator import STREAM_RESTART, generate_story, stream_story
 
 
 def _get_mode() -> str:
@@ -29,13 +29,22 @@ def main() -> None:
             print(f"Error: {result['error']}\n")
             continue
 
-        story = generate_story(
-            result["keywords"],
-            result["genre"],
-            mode=mode,
-        )
         print("\nGenerated Story:\n")
-        print(story)
+        if mode == "ai":
+            # Print AI text as it arrives
+            for chunk in stream_story(result["keywords"], result["genre"], mode=mode):
+                if chunk is STREAM_RESTART:
+                    print("\n")
+                    continue
+                print(chunk, end="", flush=True)
+            print()
+        else:
+            story = generate_story(
+                result["keywords"],
+                result["genre"],
+                mode=mode,
+            )
+            print(story)
         print()
 
         again = input("Generate another story? (y/n): ").strip().lower()
@@ -0,0 +1,217 @@
+"""
+Message Batches backend for large offline AI jobs.
+Packs build_prompt outputs into Anthropic Message Batches submissions,
+polls them, and maps results back to input records. Progress is
+checkpointed so an interrupted job resumes without resubmitting anything.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import anthropic
+
+from . import ai_generator
+from .ai_generator import SYSTEM_PROMPT, build_prompt, max_tokens_for, request_params
+from .config import AI_MODEL, BATCH_API_CLOCK_SKEW, BATCH_API_MAX_REQUESTS, BATCH_API_POLL_INTERVAL
+from .story_generator import generate_template_story
+
+
+def _input_hash(requests: list[tuple[list[str], str | None]]) -> str:
+    """Fingerprint of the job input, so a checkpoint is never reused for other records."""
+    digest = hashlib.sha256()
+    for keywords, genre in requests:
+        digest.update(json.dumps([keywords, genre]).encode("utf-8"))
+        digest.update(b"\n")
+    digest.update(f"{AI_MODEL}:{max_tokens_for()}:{SYSTEM_PROMPT}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class MessageBatchJob:
+    """
+    Runs a list of story requests through the Message Batches API.
+
+    Args:
+        checkpoint_path: JSON file recording submitted batches and collected results
+        client: Optional anthropic.Anthropic client (built from ANTHROPIC_API_KEY if omitted)
+        poll_interval: Seconds between batch status checks
+        max_requests: Maximum requests per submitted batch
+        sleep: Sleep function (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        checkpoint_path: str,
+        client: "anthropic.Anthropic" = None,
+        poll_interval: float = BATCH_API_POLL_INTERVAL,
+        max_requests: int = BATCH_API_MAX_REQUESTS,
+        sleep=time.sleep,
+    ):
+        self.checkpoint_path = checkpoint_path
+        self.client = client
+        self.poll_interval = poll_interval
+        self.max_requests = max_requests
+        self._sleep = sleep
+        self.state: dict = {}
+
+    def _get_client(self) -> "anthropic.Anthropic":
+        if self.client is None:
+            self.client = anthropic.Anthropic(api_key=ai_generator.ANTHROPIC_API_KEY)
+        return self.client
+
+    def _load(self, input_hash: str) -> None:
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                self.state = json.load(f)
+            if self.state.get("input_hash") != input_hash:
+                raise ValueError(
+                    f"Checkpoint {self.checkpoint_path} belongs to a different job input."
+                )
+        else:
+            self.state = {"input_hash": input_hash, "batches": [], "results": {}, "id_prefix": input_hash[:16]}
+        self.state.setdefault("foreign", [])
+        # Checkpoints from before id prefixes used plain positional ids
+        self.state.setdefault("id_prefix", "story")
+
+    def _custom_id(self, index: int) -> str:
+        """Request id for item index; the input-hash prefix keeps other jobs' batches from matching."""
+        return f"{self.state['id_prefix']}-{index}"
+
+    def _save(self) -> None:
+        """Writes the checkpoint atomically (temp file + rename)."""
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _recover(self) -> None:
+        """
+        Resolves batches that were being submitted when the last run stopped.
+
+        Each such entry is matched to an unclaimed batch of the same size
+        created after it was recorded; the match is confirmed by custom_id
+        once the batch has ended (see _collect). Entries with no match were
+        never created and are dropped, so their items are submitted again.
+        """
+        unresolved = [batch for batch in self.state["batches"] if batch["id"] is None]
+        if not unresolved:
+            return
+        claimed = {batch["id"] for batch in self.state["batches"]} | set(self.state["foreign"])
+        oldest = min(batch["submitted_at"] for batch in unresolved) - BATCH_API_CLOCK_SKEW
+        candidates = []
+        for remote in self._get_client().messages.batches.list(limit=100):
+            if remote.created_at.timestamp() < oldest:
+                break  # listed newest first
+            if remote.id not in claimed:
+                candidates.append(remote)
+
+        for batch in unresolved:
+            for remote in reversed(candidates):  # oldest first, in submission order
+                counts = remote.request_counts
+                size = counts.processing + counts.succeeded + counts.errored + counts.canceled + counts.expired
+                if size == len(batch["indices"]) and remote.created_at.timestamp() >= (
+                    batch["submitted_at"] - BATCH_API_CLOCK_SKEW
+                ):
+                    batch["id"] = remote.id
+                    candidates.remove(remote)
+                    break
+            else:
+                self.state["batches"].remove(batch)
+        self._save()
+
+    def _submit(self, requests: list[tuple[list[str], str | None]]) -> None:
+        """Submits every valid request not yet covered by a submitted batch."""
+        self._recover()
+        submitted = {i for batch in self.state["batches"] for i in batch["indices"]}
+        pending = []
+        for index, (keywords, genre) in enumerate(requests):
+            if index in submitted:
+                continue
+            prompt = build_prompt(keywords, genre)
+            if prompt:
+                pending.append((index, prompt))
+
+        for start in range(0, len(pending), self.max_requests):
+            chunk = pending[start:start + self.max_requests]
+            # Recorded before create() so a crash in between can be recovered
+            # (_recover) instead of paying for the same items twice
+            batch_state = {
+                "id": None,
+                "indices": [index for index, _ in chunk],
+                "collected": False,
+                "submitted_at": time.time(),
+            }
+            self.state["batches"].append(batch_state)
+            self._save()
+            batch = self._get_client().messages.batches.create(
+                requests=[
+                    {
+                        "custom_id": self._custom_id(index),
+                        "params": request_params(prompt),
+                    }
+                    for index, prompt in chunk
+                ]
+            )
+            batch_state["id"] = batch.id
+            self._save()
+
+    def _collect(self, batch_state: dict) -> bool:
+        """
+        Waits for one batch to end and records its successful results.
+
+        Returns:
+            False if the batch turned out not to hold this entry's items (a
+            wrong _recover match); the entry is dropped so they are resubmitted
+        """
+        client = self._get_client()
+        while client.messages.batches.retrieve(batch_state["id"]).processing_status != "ended":
+            self._sleep(self.poll_interval)
+
+        items = list(client.messages.batches.results(batch_state["id"]))
+        if {item.custom_id for item in items} != {self._custom_id(index) for index in batch_state["indices"]}:
+            self.state["foreign"].append(batch_state["id"])
+            self.state["batches"].remove(batch_state)
+            self._save()
+            return False
+        for item in items:
+            if item.result.type != "succeeded":
+                continue
+            ai_generator._record_usage(item.result.message)
+            text = ai_generator._extract_text(item.result.message)
+            if text:
+                self.state["results"][item.custom_id.rpartition("-")[2]] = text
+        batch_state["collected"] = True
+        self._save()
+        return True
+
+    def run(self, requests: list[tuple[list[str], str | None]]) -> list[dict]:
+        """
+        Generates one story per request, resuming from the checkpoint if present.
+
+        Args:
+            requests: List of (keywords, genre) pairs
+
+        Returns:
+            List of dicts in input order with keys "story" and "fallback"
+            (True when the item failed and was filled from template mode)
+        """
+        self._load(_input_hash(requests))
+        done = False
+        while not done:
+            self._submit(requests)
+            done = all(
+                self._collect(batch_state)
+                for batch_state in list(self.state["batches"])
+                if not batch_state["collected"]
+            )
+
+        results = self.state["results"]
+        outputs = []
+        for index, (keywords, genre) in enumerate(requests):
+            story = results.get(str(index))
+            if story:
+                outputs.append({"story": story, "fallback": False})
+            else:
+                outputs.append({"story": generate_template_story(keywords, genre), "fallback": True})
+        return outputs
@@ -0,0 +1,273 @@
+"""
+Lightweight metrics for the Automated Micro Story Generator.
+Counters and fixed-bucket latency histograms shared across the process,
+exported as Prometheus text or JSON. When disabled, recording calls
+return immediately and timed() hands back a shared no-op context manager.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+from .config import METRICS_ENABLED
+
+# Upper bounds in seconds; the last bucket is unbounded (+Inf)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prefix for exported metric names
+PREFIX = "story_"
+
+_enabled = METRICS_ENABLED
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram.
+
+    Args:
+        name: Metric name
+        buckets: Sorted bucket upper bounds
+    """
+
+    def __init__(self, name: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Records one observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current state.
+
+        Returns:
+            dict with keys "count", "sum", "buckets" (list of (upper_bound, cumulative_count),
+            the last bound being float("inf"))
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: the upper bound of the bucket holding the q-th observation."""
+        snap = self.snapshot()
+        if not snap["count"]:
+            return 0.0
+        target = q * snap["count"]
+        for bound, cumulative in snap["buckets"]:
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+            self._count = 0
+
+
+_histograms: dict[str, Histogram] = {}
+# Counter values keyed by (name, sorted label items)
+_counters: dict[tuple[str, tuple], float] = {}
+_lock = threading.Lock()
+
+
+def get_histogram(name: str, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    """Returns the named process-wide histogram, creating it on first use."""
+    histogram = _histograms.get(name)
+    if histogram is None:
+        with _lock:
+            histogram = _histograms.setdefault(name, Histogram(name, buckets))
+    return histogram
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    """Turns metric recording on or off for the whole process."""
+    global _enabled
+    _enabled = enabled
+
+
+def observe(name: str, value: float) -> None:
+    """Records value in the named histogram (no-op when metrics are disabled)."""
+    if _enabled:
+        get_histogram(name).observe(value)
+
+
+def inc(name: str, amount: float = 1, **labels: str) -> None:
+    """Adds amount to a labelled counter (no-op when metrics are disabled)."""
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def get_counter(name: str, **labels: str) -> float:
+    """Returns the current value of a labelled counter (0 if never incremented)."""
+    with _lock:
+        return _counters.get((name, tuple(sorted(labels.items()))), 0)
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        get_histogram(self.name).observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(name: str):
+    """
+    Context manager recording the block's duration in the named histogram.
+
+    Usage:
+        with timed("build_prompt_seconds"):
+            ...
+    """
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def reset_metrics() -> None:
+    """Clears every counter and histogram."""
+    with _lock:
+        _counters.clear()
+        for histogram in _histograms.values():
+            histogram.reset()
+
+
+def _format_labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def render_prometheus() -> str:
+    """Returns every metric in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(_histograms.items())
+
+    typed = set()
+    for (name, labels), value in counters:
+        full_name = PREFIX + name
+        if full_name not in typed:
+            lines.append(f"# TYPE {full_name} counter")
+            typed.add(full_name)
+        lines.append(f"{full_name}{_format_labels(labels)} {value:g}")
+
+    for name, histogram in histograms:
+        full_name = PREFIX + name
+        snap = histogram.snapshot()
+        lines.append(f"# TYPE {full_name} histogram")
+        for bound, cumulative in snap["buckets"]:
+            lines.append(f'{full_name}_bucket{{le="{_format_bound(bound)}"}} {cumulative}')
+        lines.append(f"{full_name}_sum {snap['sum']:g}")
+        lines.append(f"{full_name}_count {snap['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> dict:
+    """
+    Returns every metric as plain data.
+
+    Returns:
+        dict with keys "counters" (list of {"name", "labels", "value"}) and
+        "histograms" ({name: {"count", "sum", "p50", "p99"}})
+    """
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(_histograms.items())
+    return {
+        "counters": [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in counters
+        ],
+        "histograms": {
+            name: {
+                "count": histogram.snapshot()["count"],
+                "sum": histogram.snapshot()["sum"],
+                "p50": histogram.quantile(0.5),
+                "p99": histogram.quantile(0.99),
+            }
+            for name, histogram in histograms
+        },
+    }
+
+
+def dump_json(path: str) -> None:
+    """Writes snapshot() to path atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": time.time(), **snapshot()}, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def start_json_dump(path: str, interval: float):
+    """
+    Dumps metrics to path every interval seconds on a daemon thread.
+
+    Returns:
+        Zero-argument stop function; it writes a final dump before returning
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            dump_json(path)
+        dump_json(path)
+
+    thread = threading.Thread(target=run, name="metrics-dump", daemon=True)
+    thread.start()
+
+    def stop_dump() -> None:
+        stop.set()
+        thread.join()
+
+    return stop_dump
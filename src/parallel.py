@@ -0,0 +1,88 @@
+"""
+Parallel template-mode generation for the Automated Micro Story Generator.
+Shards a keyword stream into chunks rendered on a process pool.
+"""
+
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+from .story_generator import generate_template_stories
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Large odd constant to spread chunk seeds apart (golden-ratio increment)
+_SEED_STEP = 0x9E3779B97F4A7C15
+
+
+def chunk_seed(seed: int, chunk_index: int) -> int:
+    """Derives a deterministic seed for one chunk from the run seed."""
+    return (seed + chunk_index * _SEED_STEP) % 2**64
+
+
+def _render_chunk(args: tuple) -> list[str]:
+    """Worker entry point: renders one chunk of keyword lists."""
+    keywords_chunk, genre, seed = args
+    return generate_template_stories(keywords_chunk, genre=genre, seed=seed)
+
+
+def _chunks(keywords_iter: Iterable[list[str]], size: int) -> Iterator[list[list[str]]]:
+    iterator = iter(keywords_iter)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def generate_template_parallel(
+    keywords_iter: Iterable[list[str]],
+    genre: str = None,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    seed: int | None = None,
+) -> Iterator[str]:
+    """
+    Generates one template story per keyword list using a process pool.
+
+    Each chunk is seeded from (seed, chunk index), so the output depends only
+    on the seed and chunk size, not on the number of workers or on which
+    worker ran which chunk. At most 2 * workers chunks are in flight, so
+    memory stays bounded for arbitrarily long input streams.
+
+    Args:
+        keywords_iter: Iterable of [character, place, object] lists
+        genre: Genre for every story, or None for random per story
+        workers: Process count (defaults to os.cpu_count())
+        chunk_size: Keyword lists per task
+        seed: Run seed for reproducible output (random if None)
+
+    Yields:
+        Story strings in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    if seed is None:
+        seed = random.randrange(2**64)
+
+    tasks = (
+        (chunk, genre, chunk_seed(seed, index))
+        for index, chunk in enumerate(_chunks(keywords_iter, chunk_size))
+    )
+
+    if workers == 1:
+        for task in tasks:
+            yield from _render_chunk(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for task in itertools.islice(tasks, 2 * workers):
+            pending.append(executor.submit(_render_chunk, task))
+        while pending:
+            stories = pending.pop(0).result()
+            next_task = next(tasks, None)
+            if next_task is not None:
+                pending.append(executor.submit(_render_chunk, next_task))
+            yield from stories
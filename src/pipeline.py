@@ -0,0 +1,232 @@
+"""
+Streaming pipeline for bulk story generation.
+
+    reader -> validator -> generator(s) -> writer
+
+Each stage runs on its own thread, connected by bounded queues, and only a
+fixed number of jobs are between the reader and the writer at any time. A
+slow sink (disk, a stdout pipe) therefore throttles reading and generation
+instead of letting memory grow. Results are written in input order through a sink that
+batches output into large writes.
+"""
+
+import gzip
+import json
+import queue
+import sys
+import threading
+from typing import BinaryIO, Iterable
+
+from .batch import generate_job, iter_jobs, prepare_job
+from .config import PIPELINE_BUFFER_SIZE, PIPELINE_QUEUE_SIZE
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class Sink:
+    """
+    Buffered JSONL writer over a binary stream.
+
+    Records are encoded as they arrive and written in chunks of at least
+    buffer_size bytes. Subclass (or pass any object with write(record) and
+    close()) to send results elsewhere.
+
+    Args:
+        stream: Binary stream to write to
+        buffer_size: Bytes collected before each write
+        owns_stream: Close the stream on close() (otherwise only flush it)
+    """
+
+    def __init__(self, stream: BinaryIO, buffer_size: int = PIPELINE_BUFFER_SIZE, owns_stream: bool = True):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.owns_stream = owns_stream
+        self._chunks: list[bytes] = []
+        self._buffered = 0
+
+    def write(self, record: dict) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        self._chunks.append(line)
+        self._buffered += len(line)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._chunks:
+            self.stream.write(b"".join(self._chunks))
+            self._chunks.clear()
+            self._buffered = 0
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self.owns_stream:
+            self.stream.close()
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JsonlSink(Sink):
+    """JSONL file."""
+
+    def __init__(self, path: str, buffer_size: int = PIPELINE_BUFFER_SIZE):
+        super().__init__(open(path, "wb"), buffer_size)
+
+
+class GzipJsonlSink(Sink):
+    """gzip-compressed JSONL file."""
+
+    def __init__(self, path: str, buffer_size: int = PIPELINE_BUFFER_SIZE, compresslevel: int = 6):
+        super().__init__(gzip.open(path, "wb", compresslevel=compresslevel), buffer_size)
+
+
+class StdoutSink(Sink):
+    """JSONL on standard output (the stream current when the sink is created)."""
+
+    def __init__(self, buffer_size: int = PIPELINE_BUFFER_SIZE):
+        super().__init__(sys.stdout.buffer, buffer_size, owns_stream=False)
+
+
+def open_sink(path: str, buffer_size: int = PIPELINE_BUFFER_SIZE) -> Sink:
+    """Picks a sink for an output path: "-" = stdout, *.gz = gzip JSONL, otherwise JSONL."""
+    if path == "-":
+        return StdoutSink(buffer_size)
+    if path.endswith(".gz"):
+        return GzipJsonlSink(path, buffer_size)
+    return JsonlSink(path, buffer_size)
+
+
+class _Stop(Exception):
+    """Raised inside a stage when the pipeline is shutting down."""
+
+
+def run_pipeline(
+    lines: Iterable[str],
+    sink,
+    default_mode: str = "template",
+    workers: int = 1,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+) -> dict:
+    """
+    Generates one result per JSONL job line and writes them to sink in input order.
+
+    Args:
+        lines: Job lines (see batch.iter_jobs)
+        sink: Object with write(record); e.g. a Sink from open_sink(). Not closed here.
+        default_mode: Mode for jobs without one
+        workers: Generator threads (more help AI jobs, which wait on the network)
+        queue_size: Capacity of each queue; also caps jobs in flight at
+            queue_size + workers
+
+    Returns:
+        dict with counts: "total", "ok", "errors"
+
+    Raises:
+        Whatever a stage or the sink raised; the other stages are stopped first
+    """
+    workers = max(1, workers)
+    validate_q: queue.Queue = queue.Queue(queue_size)
+    generate_q: queue.Queue = queue.Queue(queue_size)
+    write_q: queue.Queue = queue.Queue(queue_size)
+    window = threading.Semaphore(queue_size + workers)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def put(q: queue.Queue, item) -> None:
+        while True:
+            if stop.is_set():
+                raise _Stop
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(q: queue.Queue):
+        while True:
+            if stop.is_set():
+                raise _Stop
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def stage(body, out_q: queue.Queue, done_markers: int) -> threading.Thread:
+        def run() -> None:
+            try:
+                body()
+            except _Stop:
+                return
+            except BaseException as exc:
+                errors.append(exc)
+                stop.set()
+                return
+            try:
+                for _ in range(done_markers):
+                    put(out_q, _DONE)
+            except _Stop:
+                pass
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def read() -> None:
+        for seq, item in enumerate(iter_jobs(lines)):
+            while not window.acquire(timeout=0.1):
+                if stop.is_set():
+                    raise _Stop
+            put(validate_q, (seq, item))
+
+    def validate() -> None:
+        while (entry := get(validate_q)) is not _DONE:
+            seq, item = entry
+            result = {"error": item["error"]} if "error" in item else prepare_job(item["job"], default_mode)
+            result["line"] = item["line"]
+            put(generate_q, (seq, result))
+
+    def generate() -> None:
+        while (entry := get(generate_q)) is not _DONE:
+            seq, result = entry
+            put(write_q, (seq, generate_job(result)))
+
+    threads = [
+        stage(read, validate_q, 1),
+        stage(validate, generate_q, workers),
+        *(stage(generate, write_q, 1) for _ in range(workers)),
+    ]
+
+    counts = {"total": 0, "ok": 0, "errors": 0}
+    pending: dict[int, dict] = {}
+    next_seq = 0
+    finished = 0
+    try:
+        while finished < workers:
+            entry = get(write_q)
+            if entry is _DONE:
+                finished += 1
+                continue
+            seq, result = entry
+            pending[seq] = result
+            # Reorder: out-of-order results wait here (bounded by the window)
+            while next_seq in pending:
+                result = pending.pop(next_seq)
+                sink.write(result)
+                counts["total"] += 1
+                counts["errors" if "error" in result else "ok"] += 1
+                next_seq += 1
+                window.release()
+    except _Stop:
+        pass  # a stage failed; its error is raised below
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return counts
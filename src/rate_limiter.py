@@ -0,0 +1,240 @@
+"""
+Client-side rate limiting and retry scheduling for the AI path.
+Smooths bursts with token buckets (requests/min and tokens/min), honors
+retry-after headers, and backs off with jitter until a per-request deadline.
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+from anthropic import APIConnectionError, APIStatusError, RateLimitError
+
+from .config import (
+    AI_MAX_RETRIES,
+    AI_REQUEST_DEADLINE,
+    AI_REQUESTS_PER_MINUTE,
+    AI_RETRY_BASE_DELAY,
+    AI_RETRY_MAX_DELAY,
+    AI_TOKENS_PER_MINUTE,
+)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request cannot be sent or retried before its deadline."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket using reservations.
+
+    Args:
+        rate_per_minute: Tokens added per minute
+        capacity: Maximum burst size (defaults to one minute's worth)
+        clock: Monotonic clock function (injectable for tests)
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float, max_wait: float = float("inf")) -> float | None:
+        """
+        Reserves amount tokens, possibly going into debt.
+
+        Returns:
+            Seconds the caller must wait before using the tokens, or None
+            (and nothing reserved) if that wait would exceed max_wait.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            deficit = amount - self._tokens
+            wait = deficit / self.rate if deficit > 0 else 0.0
+            if wait > max_wait:
+                return None
+            self._tokens -= amount
+            return wait
+
+    def refund(self, amount: float) -> None:
+        """Returns previously reserved tokens to the bucket."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (RateLimitError, APIConnectionError)):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in (408, 409) or exc.status_code >= 500
+    return False
+
+
+def _retry_after(exc: Exception) -> float | None:
+    """Reads retry-after-ms / retry-after (seconds) from an API error response."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+class RequestScheduler:
+    """
+    Sends API calls through request/token buckets and retries transient failures.
+
+    Args:
+        requests_per_minute: Client-side request rate limit
+        tokens_per_minute: Client-side token rate limit
+        max_retries: Retries after the first attempt
+        base_delay: First backoff delay in seconds (doubles per attempt)
+        max_delay: Upper bound for a single backoff delay
+        deadline: Seconds from submission after which the request is dropped
+        clock, sleep, rand: Injectable for tests
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = AI_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = AI_TOKENS_PER_MINUTE,
+        max_retries: int = AI_MAX_RETRIES,
+        base_delay: float = AI_RETRY_BASE_DELAY,
+        max_delay: float = AI_RETRY_MAX_DELAY,
+        deadline: float = AI_REQUEST_DEADLINE,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        rand=random.random,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute, clock=clock)
+        self.token_bucket = TokenBucket(tokens_per_minute, clock=clock)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self._clock = clock
+        self._sleep = sleep
+        self._rand = rand
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "rate_limited": 0, "dropped": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _reserve(self, tokens: int, deadline: float) -> float:
+        """Reserves one request and `tokens` tokens; returns the wait in seconds."""
+        remaining = deadline - self._clock()
+        request_wait = self.request_bucket.reserve(1, remaining)
+        if request_wait is None:
+            self._count("dropped")
+            raise DeadlineExceeded("Request rate limit wait exceeds deadline.")
+        token_wait = self.token_bucket.reserve(tokens, remaining)
+        if token_wait is None:
+            self.request_bucket.refund(1)
+            self._count("dropped")
+            raise DeadlineExceeded("Token rate limit wait exceeds deadline.")
+        return max(request_wait, token_wait)
+
+    def _backoff(self, attempt: int, exc: Exception, deadline: float) -> float:
+        """Delay before the next attempt, or raise if retrying is pointless."""
+        if attempt > self.max_retries or not _is_retryable(exc):
+            raise exc
+        if isinstance(exc, RateLimitError):
+            self._count("rate_limited")
+        delay = _retry_after(exc)
+        if delay is None:
+            # Full jitter: uniform in [0, base * 2^(attempt-1)]
+            delay = self._rand() * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        if self._clock() + delay > deadline:
+            self._count("dropped")
+            raise DeadlineExceeded("Retry delay exceeds deadline.") from exc
+        self._count("retries")
+        return delay
+
+    def call(self, fn, tokens: int = 0):
+        """
+        Calls fn() under the rate limits, retrying transient API errors.
+
+        Args:
+            fn: Zero-argument callable that performs the API request
+            tokens: Estimated tokens the request will consume
+
+        Returns:
+            fn()'s return value
+
+        Raises:
+            DeadlineExceeded: If the request could not complete before the deadline
+            The last API error if it is not retryable or retries are exhausted
+        """
+        deadline = self._clock() + self.deadline
+        attempt = 0
+        while True:
+            self._sleep(self._reserve(tokens, deadline))
+            self._count("requests")
+            try:
+                return fn()
+            except Exception as exc:
+                attempt += 1
+                self._sleep(self._backoff(attempt, exc, deadline))
+
+    async def call_async(self, fn, tokens: int = 0):
+        """Async variant of call(); fn() must return an awaitable."""
+        deadline = self._clock() + self.deadline
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._reserve(tokens, deadline))
+            self._count("requests")
+            try:
+                return await fn()
+            except Exception as exc:
+                attempt += 1
+                await asyncio.sleep(self._backoff(attempt, exc, deadline))
+
+    def stats(self) -> dict:
+        """Returns counters: requests, retries, rate_limited, dropped."""
+        with self._lock:
+            return dict(self._stats)
+
+
+_scheduler: RequestScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """Returns the process-wide scheduler, creating it from config on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler: RequestScheduler | None) -> None:
+    """Replaces the process-wide scheduler (None rebuilds it from config on next use)."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Rough token cost of a request: ~4 characters per input token plus max output."""
+    return len(prompt) // 4 + max_tokens
@@ -0,0 +1,291 @@
+"""
+HTTP story service for the Automated Micro Story Generator.
+Stdlib asyncio server exposing generate_story as JSON endpoints:
+
+    POST /story    {"keywords": [...], "genre": "...", "mode": "template"|"ai", "seed": 1}
+    POST /stories  {"jobs": [<story request>, ...]}
+    GET  /stats    service counters and AI circuit breaker state
+    GET  /health   liveness check
+
+Template work runs on a worker pool; AI work goes through one shared async
+client, and concurrent identical AI requests share a single upstream call.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+import anthropic
+
+from . import ai_generator
+from .ai_client import new_async_client
+from .ai_generator import generate_ai_story_async
+from .batch import prepare_job
+from .circuit_breaker import get_breaker
+from .config import (
+    AI_CONCURRENCY,
+    SERVER_HOST,
+    SERVER_MAX_BODY,
+    SERVER_PORT,
+    SERVER_TEMPLATE_WORKERS,
+)
+from .metrics import inc, render_prometheus, timed
+from .story_generator import generate_seeded_story
+from .template_store import get_store
+
+# Known paths; anything else is counted under path="other" to bound label cardinality
+ROUTES = ("/story", "/stories", "/stats", "/health", "/metrics")
+
+
+def _render_seeded(keywords: list[str], genre: str | None, seed: int | None) -> tuple[str, int]:
+    """Worker-side template render; process-pool workers pick up template changes here."""
+    get_store().maybe_reload()
+    return generate_seeded_story(keywords, genre, seed)
+
+
+class HTTPError(Exception):
+    """Request failed with an HTTP status and message."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class StoryService:
+    """
+    Story generation service behind the HTTP server.
+
+    Args:
+        template_workers: Size of the template worker pool
+        use_processes: Run template work on processes instead of threads
+        ai_client: Optional shared anthropic.AsyncAnthropic client
+            (built from ANTHROPIC_API_KEY on first AI request if omitted)
+        concurrency: Maximum upstream AI requests in flight
+    """
+
+    def __init__(
+        self,
+        template_workers: int = SERVER_TEMPLATE_WORKERS,
+        use_processes: bool = False,
+        ai_client: "anthropic.AsyncAnthropic" = None,
+        concurrency: int = AI_CONCURRENCY,
+    ):
+        if use_processes:
+            # Forking from a process running an event loop can deadlock the child
+            self.executor: Executor = ProcessPoolExecutor(
+                max_workers=template_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=template_workers)
+        self.ai_client = ai_client
+        self._owns_client = ai_client is None
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.stats = {
+            "requests": 0,
+            "stories": 0,
+            "errors": 0,
+            "ai_upstream": 0,
+            "ai_coalesced": 0,
+            "ai_fallbacks": 0,
+        }
+
+    def _get_ai_client(self) -> "anthropic.AsyncAnthropic | None":
+        if self.ai_client is None and ai_generator.ANTHROPIC_API_KEY:
+            # Same pool limits and connection stats as the CLI's shared clients
+            self.ai_client = new_async_client(ai_generator.ANTHROPIC_API_KEY)
+        return self.ai_client
+
+    async def _ai_upstream(self, keywords: list[str], genre: str | None) -> str | None:
+        client = self._get_ai_client()
+        if client is None:
+            return None
+        async with self._semaphore:
+            return await generate_ai_story_async(keywords, genre, client)
+
+    async def _ai_story(self, keywords: list[str], genre: str | None) -> str | None:
+        """AI story with request coalescing: identical in-flight requests share one call."""
+        key = (tuple(keywords), genre)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._ai_upstream(keywords, genre))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.stats["ai_upstream"] += 1
+        else:
+            self.stats["ai_coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def generate(self, job: dict) -> dict:
+        """Validates one story request and generates its story."""
+        if not isinstance(job, dict):
+            self.stats["errors"] += 1
+            return {"error": "Story request must be a JSON object."}
+
+        get_store().maybe_reload()
+        result = prepare_job(job)
+        if "error" in result:
+            self.stats["errors"] += 1
+            return result
+
+        keywords, genre = result["keywords"], result["genre"]
+        if result["mode"] == "ai":
+            story = await self._ai_story(keywords, genre)
+            if story:
+                result["story"] = story
+                self.stats["stories"] += 1
+                return result
+            self.stats["ai_fallbacks"] += 1
+            result["fallback"] = True
+
+        loop = asyncio.get_running_loop()
+        result["story"], result["seed"] = await loop.run_in_executor(
+            self.executor, _render_seeded, keywords, genre, result.get("seed")
+        )
+        self.stats["stories"] += 1
+        return result
+
+    async def route(self, method: str, path: str, body: bytes) -> tuple[HTTPStatus, dict | str]:
+        """Dispatches one request to its handler (str payloads are sent as plain text)."""
+        self.stats["requests"] += 1
+        inc("http_requests_total", path=path if path in ROUTES else "other")
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok"}
+        if path == "/stats" and method == "GET":
+            return HTTPStatus.OK, {**self.stats, "ai_circuit": get_breaker().snapshot()}
+        if path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, render_prometheus()
+        if path not in ("/story", "/stories"):
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {path}.")
+        if method != "POST":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST.")
+
+        try:
+            payload = json.loads(body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be valid JSON.")
+
+        if path == "/story":
+            with timed("http_story_seconds"):
+                result = await self.generate(payload)
+            status = HTTPStatus.BAD_REQUEST if "error" in result else HTTPStatus.OK
+            return status, result
+
+        jobs = payload.get("jobs") if isinstance(payload, dict) else None
+        if not isinstance(jobs, list):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be an object with a 'jobs' list.")
+        results = await asyncio.gather(*(self.generate(job) for job in jobs))
+        return HTTPStatus.OK, {"results": results}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves HTTP/1.1 requests on one connection (keep-alive supported)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await _write_response(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line."}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > SERVER_MAX_BODY:
+                        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large.")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.route(method, path.split("?", 1)[0], body)
+                except HTTPError as exc:
+                    self.stats["errors"] += 1
+                    status, payload, keep_alive = exc.status, {"error": exc.message}, False
+                except ValueError:
+                    status, payload, keep_alive = HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length."}, False
+
+                await _write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def aclose(self) -> None:
+        """Shuts down the worker pool and the owned AI client."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self.executor.shutdown, cancel_futures=True))
+        if self._owns_client and self.ai_client is not None:
+            await self.ai_client.close()
+
+
+async def _write_response(
+    writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict | str, keep_alive: bool
+) -> None:
+    if isinstance(payload, str):
+        data = payload.encode("utf-8")
+        content_type = "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        content_type = "application/json"
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + data)
+    await writer.drain()
+
+
+async def start_server(
+    service: StoryService,
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT,
+) -> asyncio.AbstractServer:
+    """Starts serving service on host:port (port 0 picks a free port)."""
+    return await asyncio.start_server(service.handle_connection, host, port)
+
+
+async def _serve(host: str, port: int, workers: int, use_processes: bool) -> None:
+    service = StoryService(template_workers=workers, use_processes=use_processes)
+    server = await start_server(service, host, port)
+    if hasattr(signal, "SIGHUP"):
+        # kill -HUP reloads the template directory on the next request
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, get_store().request_reload)
+    print(f"Serving stories on http://{host}:{server.sockets[0].getsockname()[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.aclose()
+
+
+def serve_main(argv: list[str] | None = None) -> int:
+    """CLI entry point: python run.py serve [--host H] [--port P] [--workers N] [--processes]"""
+    parser = argparse.ArgumentParser(prog="run.py serve", description="Run the HTTP story service.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_TEMPLATE_WORKERS, help="Template worker pool size")
+    parser.add_argument("--processes", action="store_true", help="Use a process pool for template work")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args.host, args.port, args.workers, args.processes))
+    except KeyboardInterrupt:
+        pass
+    return 0
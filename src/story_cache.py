@@ -0,0 +1,206 @@
+"""
+Persistent cache for AI-generated stories.
+Stories are stored in SQLite, keyed by a hash of the prompt and model settings,
+with LRU + TTL eviction, a size cap, and optional multiple variants per key.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+from .config import AI_CACHE_MAX_ENTRIES, AI_CACHE_PATH, AI_CACHE_TTL, AI_CACHE_VARIANTS
+
+
+def cache_key(prompt: str, model: str, max_tokens: int) -> str:
+    """
+    Content-addressed key for a request.
+
+    Returns:
+        Hex SHA-256 of the prompt, model and max_tokens
+    """
+    digest = hashlib.sha256()
+    for part in (model, str(max_tokens), prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class StoryCache:
+    """
+    SQLite-backed story cache.
+
+    Args:
+        path: Database file path (":memory:" for a process-local cache)
+        max_entries: Maximum stored stories; least recently used keys are evicted first
+        ttl: Seconds a story stays valid (0 = never expires)
+        variants: Stories kept per key. Until a key has this many, get()
+            reports a miss so callers fetch and add another variant; after
+            that, get() rotates through the stored variants.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl: float = 0, variants: int = 1):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.variants = max(1, variants)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS stories (
+                key TEXT NOT NULL,
+                variant INTEGER NOT NULL,
+                story TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (key, variant)
+            );
+            CREATE TABLE IF NOT EXISTS keys (
+                key TEXT PRIMARY KEY,
+                last_access REAL NOT NULL,
+                next_variant INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS keys_last_access ON keys (last_access);
+            """
+        )
+        self._conn.commit()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key: str) -> str | None:
+        """
+        Returns a cached story for key, or None on a miss.
+        A miss is also reported while the key has fewer than `variants` stories.
+        """
+        now = time.time()
+        with self._lock:
+            if self.ttl:
+                cur = self._conn.execute(
+                    "DELETE FROM stories WHERE key = ? AND created_at < ?",
+                    (key, now - self.ttl),
+                )
+                self._stats["expired"] += cur.rowcount
+
+            rows = self._conn.execute(
+                "SELECT story FROM stories WHERE key = ? ORDER BY variant", (key,)
+            ).fetchall()
+            if len(rows) < self.variants:
+                self._stats["misses"] += 1
+                self._conn.commit()
+                return None
+
+            row = self._conn.execute(
+                "SELECT next_variant FROM keys WHERE key = ?", (key,)
+            ).fetchone()
+            index = (row[0] if row else 0) % len(rows)
+            self._conn.execute(
+                "INSERT INTO keys (key, last_access, next_variant) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET last_access = excluded.last_access, "
+                "next_variant = excluded.next_variant",
+                (key, now, index + 1),
+            )
+            self._conn.commit()
+            self._stats["hits"] += 1
+            return rows[index][0]
+
+    def put(self, key: str, story: str) -> None:
+        """Stores a story as a new variant of key, then enforces the size cap."""
+        now = time.time()
+        with self._lock:
+            count, max_variant = self._conn.execute(
+                "SELECT COUNT(*), MAX(variant) FROM stories WHERE key = ?", (key,)
+            ).fetchone()
+            if count >= self.variants:
+                # Replace the oldest variant
+                self._conn.execute(
+                    "DELETE FROM stories WHERE key = ? AND variant = "
+                    "(SELECT variant FROM stories WHERE key = ? ORDER BY created_at LIMIT 1)",
+                    (key, key),
+                )
+            variant = 0 if max_variant is None else max_variant + 1
+            self._conn.execute(
+                "INSERT INTO stories (key, variant, story, created_at) VALUES (?, ?, ?, ?)",
+                (key, variant, story, now),
+            )
+            self._conn.execute(
+                "INSERT INTO keys (key, last_access) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET last_access = excluded.last_access",
+                (key, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drops least recently used keys until the store fits max_entries."""
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM stories").fetchone()
+        while total > self.max_entries:
+            row = self._conn.execute(
+                "SELECT key FROM keys ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            cur = self._conn.execute("DELETE FROM stories WHERE key = ?", row)
+            self._conn.execute("DELETE FROM keys WHERE key = ?", row)
+            total -= cur.rowcount
+            self._stats["evictions"] += cur.rowcount
+
+    def stats(self) -> dict:
+        """
+        Returns cache statistics.
+
+        Returns:
+            dict with keys "hits", "misses", "evictions", "expired", "entries", "hit_rate"
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            (stats["entries"],) = self._conn.execute("SELECT COUNT(*) FROM stories").fetchone()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Removes every cached story and resets statistics."""
+        with self._lock:
+            self._conn.execute("DELETE FROM stories")
+            self._conn.execute("DELETE FROM keys")
+            self._conn.commit()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_shared_cache: StoryCache | None = None
+_shared_lock = threading.Lock()
+
+
+def get_cache() -> StoryCache | None:
+    """
+    Returns the shared cache configured by config.AI_CACHE_PATH,
+    or None when caching is disabled (empty path).
+    """
+    global _shared_cache
+    if _shared_cache is None and AI_CACHE_PATH:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = StoryCache(
+                    AI_CACHE_PATH,
+                    max_entries=AI_CACHE_MAX_ENTRIES,
+                    ttl=AI_CACHE_TTL,
+                    variants=AI_CACHE_VARIANTS,
+                )
+    return _shared_cache
+
+
+def set_cache(cache: StoryCache | None) -> None:
+    """Replaces the shared cache (None disables caching until reconfigured)."""
+    global _shared_cache
+    with _shared_lock:
+        _shared_cache = cache
+
+
+def get_cache_stats() -> dict:
+    """Returns statistics for the shared cache (empty dict when disabled)."""
+    cache = get_cache()
+    return cache.stats() if cache else {}
@@ -4,17 +4,52 @@ Supports template mode (V1) and AI mode (V2) with fallback.
 """
 
 import random
-from .templates import templates, GENRES
-from .ai_generator import generate_ai_story
+from typing import Iterator
 
-# Adjective pools for randomized variation before {object}
-OBJECT_ADJECTIVES = ["mysterious", "ancient", "forgotten", "gleaming", "strange", "legendary"]
+from .circuit_breaker import get_breaker
+from .config import AI_CONCURRENCY, AI_HEDGE_DEADLINE
+from .metrics import inc, timed
+from .templates import templates, GENRES, OBJECT_ADJECTIVES
+from .template_compiler import get_compiled, render
+from .template_store import load_configured
+
+# Merged here, not in templates.py (which template_store imports); every
+# story path goes through this module
+load_configured()
+
+# Seeds handed out by generate_seeded_story() are drawn from this range
+MAX_SEED = 2**63 - 1
+
+
+def _resolve_rng(rng: random.Random | None, seed: int | None):
+    """
+    Picks the random source for one call: an explicit rng, a fresh
+    random.Random(seed), or the global random module when neither is given.
+    """
+    if rng is not None:
+        return rng
+    if seed is not None:
+        return random.Random(seed)
+    return random
+
+
+def _ai():
+    """
+    Imports the AI stack on first AI use, so template-only runs never load
+    the anthropic SDK (it dominates startup time).
+    """
+    from . import ai_generator
+
+    return ai_generator
 
 
 def generate_story(
     keywords: list[str],
     genre: str = None,
     mode: str = "template",
+    rng: random.Random | None = None,
+    seed: int | None = None,
+    deadline: float | None = AI_HEDGE_DEADLINE,
 ) -> str:
     """
     Main entry point for story generation.
@@ -22,31 +57,194 @@ def generate_story(
     Args:
         keywords: List of [character, place, object]
         genre: Genre name or None for random
-        mode: "template" for V1, "ai" for V2 (falls back to template on failure)
+        mode: "template" for V1, "ai" for V2 (falls back to template on failure,
+            and without calling the API while the circuit breaker is open)
+        rng: Optional random.Random used for template choices
+        seed: Optional seed for template choices (ignored if rng is given)
+        deadline: AI latency budget in seconds; slow responses are hedged and
+            the template story is returned once it runs out. None waits for
+            the AI call without hedging (offline batch use).
 
     Returns:
         Generated story string
     """
     if mode == "ai":
+        if get_breaker().is_open():
+            # The API is known to be failing: skip the call (and the AI stack) entirely
+            inc("ai_fallbacks_total", cause="circuit_open")
+        else:
+            try:
+                if deadline is None:
+                    story = _ai().generate_ai_story(keywords, genre)
+                else:
+                    story = _ai().generate_ai_story_hedged(keywords, genre, deadline)
+                if story:
+                    return story
+            except Exception:
+                pass
+        # Fallback to template mode
+        inc("story_fallbacks_total")
+        print("(AI unavailable — falling back to template mode)")
+
+    return generate_template_story(keywords, genre, rng=rng, seed=seed)
+
+
+# Yielded by stream_story() when an AI stream breaks partway: discard the
+# text received so far, a complete template story follows.
+STREAM_RESTART = object()
+
+
+def stream_story(
+    keywords: list[str],
+    genre: str = None,
+    mode: str = "template",
+    deadline: float | None = AI_HEDGE_DEADLINE,
+) -> Iterator[str]:
+    """
+    Streaming variant of generate_story().
+
+    In AI mode, text chunks are yielded as the model produces them. If the
+    stream cannot start, the template story is yielded instead; if it fails
+    partway, STREAM_RESTART is yielded first, then the template story.
+
+    Args:
+        keywords: List of [character, place, object]
+        genre: Genre name or None for random
+        mode: "template" for V1, "ai" for V2 (falls back to template on failure)
+        deadline: AI latency budget in seconds for the first chunk; a slow
+            stream is hedged and the template story is yielded once it runs
+            out. None waits for the stream without hedging.
+
+    Yields:
+        Story text chunks (and possibly STREAM_RESTART)
+    """
+    if mode == "ai":
+        started = False
         try:
-            story = generate_ai_story(keywords, genre)
-            if story:
-                return story
+            if get_breaker().is_open():
+                inc("ai_fallbacks_total", cause="circuit_open")
+            else:
+                for chunk in _ai().stream_ai_story(keywords, genre, deadline):
+                    started = True
+                    yield chunk
+                if started:
+                    return
         except Exception:
-            pass
+            # StreamInterrupted (or anything else) after the first chunk
+            if started:
+                yield STREAM_RESTART
         # Fallback to template mode
+        inc("story_fallbacks_total")
         print("(AI unavailable — falling back to template mode)")
 
-    return generate_template_story(keywords, genre)
+    yield generate_template_story(keywords, genre)
+
+
+def generate_seeded_story(
+    keywords: list[str],
+    genre: str = None,
+    seed: int | None = None,
+) -> tuple[str, int]:
+    """
+    Generates a template story together with the seed that reproduces it.
+    Storing (keywords, genre, seed) is enough to regenerate the story later
+    with generate_template_story(keywords, genre, seed=seed).
+
+    Args:
+        keywords: List of [character, place, object]
+        genre: Genre name or None for random
+        seed: Seed to use, or None to draw a new one
+
+    Returns:
+        (story, seed)
+    """
+    if seed is None:
+        seed = random.randint(0, MAX_SEED)
+    return generate_template_story(keywords, genre, seed=seed), seed
+
+
+async def generate_stories_async(
+    requests: list[tuple[list[str], str | None]],
+    mode: str = "ai",
+    concurrency: int = AI_CONCURRENCY,
+    client=None,
+    packed: bool = False,
+) -> list[str]:
+    """
+    Generates a batch of stories, running AI requests concurrently.
+
+    Args:
+        requests: List of (keywords, genre) pairs
+        mode: "template" for V1, "ai" for V2 (each failed item falls back to template)
+        concurrency: Maximum AI requests in flight at once
+        client: Optional shared anthropic.AsyncAnthropic client
+        packed: Ask for several stories per AI request (see generate_ai_stories_packed_async)
+
+    Returns:
+        List of story strings in input order
+    """
+    if mode == "ai":
+        try:
+            ai = _ai()
+            generate = ai.generate_ai_stories_packed_async if packed else ai.generate_ai_stories_async
+            ai_stories = await generate(requests, concurrency, client)
+        except Exception:
+            ai_stories = [None] * len(requests)
+    else:
+        ai_stories = [None] * len(requests)
+
+    return [
+        story or generate_template_story(keywords, genre)
+        for (keywords, genre), story in zip(requests, ai_stories)
+    ]
 
 
-def generate_template_story(keywords: list[str], genre: str = None) -> str:
+def generate_stories(
+    requests: list[tuple[list[str], str | None]],
+    mode: str = "ai",
+    concurrency: int = AI_CONCURRENCY,
+    packed: bool = False,
+) -> list[str]:
+    """
+    Synchronous wrapper around generate_stories_async(). AI requests run on
+    the shared pooled async client (see ai_client.run_async), so repeated
+    calls, e.g. one per batch window, reuse its connections.
+    """
+    client = None
+    if mode == "ai":
+        try:
+            ai = _ai()
+            if ai.ANTHROPIC_API_KEY:
+                client = ai.get_async_client(ai.ANTHROPIC_API_KEY)
+        except Exception:
+            pass  # every item falls back to templates below
+    if client is not None:
+        future = ai.run_async(generate_stories_async(requests, mode, concurrency, client, packed))
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    import asyncio  # deferred like the AI stack; it is a large share of startup time
+
+    return asyncio.run(generate_stories_async(requests, mode, concurrency, packed=packed))
+
+
+def generate_template_story(
+    keywords: list[str],
+    genre: str = None,
+    rng: random.Random | None = None,
+    seed: int | None = None,
+) -> str:
     """
     Generate a multi-paragraph micro story from templates (V1 logic).
 
     Args:
         keywords: List of [character, place, object]
         genre: Genre name (adventure, mystery, fantasy, sci-fi, comedy) or None for random.
+        rng: Optional random.Random for all choices (defaults to the global random module)
+        seed: Optional seed; the same keywords, genre and seed give the same story
 
     Returns:
         Generated story string, or error message if invalid input.
@@ -54,43 +252,126 @@ def generate_template_story(keywords: list[str], genre: str = None) -> str:
     if len(keywords) < 3:
         return "Please enter at least three keywords."
 
+    with timed("template_render_seconds"):
+        return _render_template_story(keywords, genre, _resolve_rng(rng, seed))
+
+
+def _render_template_story(keywords: list[str], genre: str | None, rng) -> str:
     character, place, object_ = keywords[:3]
 
     # Select genre
-    selected_genre = genre if genre and genre in templates else random.choice(GENRES)
+    selected_genre = genre if genre and genre in templates else rng.choice(GENRES)
     genre_templates = templates[selected_genre]
 
     # Build multi-paragraph story
     paragraphs = []
 
     # Opening
-    opening = random.choice(genre_templates["opening"])
-    paragraphs.append(_format_template(opening, character, place, object_))
+    opening = rng.choice(genre_templates["opening"])
+    paragraphs.append(_format_template(opening, character, place, object_, rng))
 
     # Middle
-    middle = random.choice(genre_templates["middle"])
-    paragraphs.append(_format_template(middle, character, place, object_))
+    middle = rng.choice(genre_templates["middle"])
+    paragraphs.append(_format_template(middle, character, place, object_, rng))
 
     # Ending
-    ending = random.choice(genre_templates["ending"])
-    paragraphs.append(_format_template(ending, character, place, object_))
+    ending = rng.choice(genre_templates["ending"])
+    paragraphs.append(_format_template(ending, character, place, object_, rng))
 
     return "\n\n".join(paragraphs)
 
 
-def _format_template(template: str, character: str, place: str, object_: str) -> str:
+def generate_template_stories(
+    keywords_batch: list[list[str]],
+    genre: str = None,
+    n: int = 1,
+    seed: int | None = None,
+) -> list[str]:
+    """
+    Generate template stories for a whole batch of keyword lists at once.
+
+    All random indices (genre, opening/middle/ending, adjective coin flips
+    and picks) are drawn in bulk from one seeded generator, then the
+    stories are assembled. Each draw is uniform, exactly as in
+    generate_template_story(), so the output distribution is the same.
+
+    Args:
+        keywords_batch: List of [character, place, object] lists
+        genre: Genre name for every story, or None for random per story
+        n: Number of stories to generate per keyword list
+        seed: Optional seed for reproducible output
+
+    Returns:
+        List of len(keywords_batch) * n stories, grouped by keyword list
+        in input order.
+    """
+    rng = random.Random(seed)
+    jobs = [keywords for keywords in keywords_batch for _ in range(n)]
+    total = len(jobs)
+
+    if genre and genre in templates:
+        genres = [genre] * total
+    else:
+        genres = rng.choices(GENRES, k=total)
+
+    # Group story slots by genre so each genre's template lists are drawn in one call
+    slots_by_genre: dict[str, list[int]] = {}
+    for i, story_genre in enumerate(genres):
+        slots_by_genre.setdefault(story_genre, []).append(i)
+
+    chosen: list[tuple] = [()] * total
+    for story_genre, slots in slots_by_genre.items():
+        genre_templates = templates[story_genre]
+        count = len(slots)
+        openings = rng.choices(genre_templates["opening"], k=count)
+        middles = rng.choices(genre_templates["middle"], k=count)
+        endings = rng.choices(genre_templates["ending"], k=count)
+        for slot, parts in zip(slots, zip(openings, middles, endings)):
+            chosen[slot] = parts
+
+    # One coin flip and one adjective per paragraph
+    flips = rng.choices((True, False), k=3 * total)
+    adjectives = rng.choices(OBJECT_ADJECTIVES, k=3 * total)
+
+    stories = []
+    for i, keywords in enumerate(jobs):
+        if len(keywords) < 3:
+            stories.append("Please enter at least three keywords.")
+            continue
+        character, place, object_ = keywords[:3]
+        paragraphs = []
+        for p, template in enumerate(chosen[i]):
+            j = 3 * i + p
+            object_display = f"{adjectives[j]} {object_}" if flips[j] else object_
+            paragraphs.append(render(
+                get_compiled(template),
+                {"character": character, "place": place, "object": object_display},
+            ))
+        stories.append("\n\n".join(paragraphs))
+    return stories
+
+
+def _format_template(
+    template: str,
+    character: str,
+    place: str,
+    object_: str,
+    rng: random.Random | None = None,
+    seed: int | None = None,
+) -> str:
     """
     Format a template with optional adjective variation before the object.
     """
+    rng = _resolve_rng(rng, seed)
+
     # 50% chance to add an adjective before the object
-    if random.choice([True, False]):
-        adj = random.choice(OBJECT_ADJECTIVES)
+    if rng.random() < 0.5:
+        adj = rng.choice(OBJECT_ADJECTIVES)
         object_display = f"{adj} {object_}"
     else:
         object_display = object_
 
-    return template.format(
-        character=character,
-        place=place,
-        object=object_display,
+    return render(
+        get_compiled(template),
+        {"character": character, "place": place, "object": object_display},
     )
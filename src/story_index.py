@@ -0,0 +1,217 @@
+"""
+Combinatorial index over the template story space.
+Every template story is one point in genre x opening x middle x ending,
+with each paragraph's object shown bare or with one of OBJECT_ADJECTIVES.
+The index maps integers to those points, so the nth story is decoded in
+O(1) and N distinct stories come from a permutation of indices instead of
+sampling with replacement and deduplicating.
+"""
+
+import bisect
+import hashlib
+import random
+from typing import Iterator
+
+from .story_generator import OBJECT_ADJECTIVES
+from .template_compiler import CompiledTemplate, get_compiled, render
+from .template_store import add_reload_listener
+from .templates import GENRES, templates
+
+SECTIONS = ("opening", "middle", "ending")
+
+# One paragraph choice: compiled template plus the adjective before {object} (None = bare)
+Paragraph = tuple[CompiledTemplate, str | None]
+
+
+def _paragraph_choices(section_templates: list[str]) -> list[Paragraph]:
+    """All distinct renderings of one section; templates without {object} get no adjective variants."""
+    choices = []
+    for template in dict.fromkeys(section_templates):
+        compiled = get_compiled(template)
+        choices.append((compiled, None))
+        if any(field == "object" for _, field in compiled):
+            choices.extend((compiled, adjective) for adjective in OBJECT_ADJECTIVES)
+    return choices
+
+
+def _values(character: str, place: str, object_: str, adjective: str | None) -> dict[str, str]:
+    return {
+        "character": character,
+        "place": place,
+        "object": f"{adjective} {object_}" if adjective else object_,
+    }
+
+
+class StoryIndex:
+    """
+    Integer index over every distinct template story.
+
+    Distinct indices render distinct stories for the same keywords (barring
+    keywords that happen to reproduce template text).
+
+    Args:
+        genre: Restrict the index to one genre, or None for all genres
+    """
+
+    def __init__(self, genre: str | None = None):
+        self.genres = [genre] if genre in templates else list(GENRES)
+        # Per genre: (opening, middle, ending) choice lists
+        self._choices = [
+            tuple(_paragraph_choices(templates[g][section]) for section in SECTIONS)
+            for g in self.genres
+        ]
+        # Cumulative start index of each genre
+        self._offsets = []
+        total = 0
+        for sections in self._choices:
+            self._offsets.append(total)
+            opening, middle, ending = sections
+            total += len(opening) * len(middle) * len(ending)
+        self._size = total
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the template space; indices are only meaningful for the same fingerprint."""
+        digest = hashlib.sha256()
+        for genre, sections in zip(self.genres, self._choices):
+            digest.update(genre.encode("utf-8"))
+            for choices in sections:
+                for compiled, adjective in choices:
+                    digest.update(repr((compiled, adjective)).encode("utf-8"))
+        return digest.hexdigest()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def decode(self, n: int) -> tuple[str, list[Paragraph]]:
+        """
+        Maps index n to its genre and three paragraph choices.
+
+        Raises:
+            IndexError: If n is outside [0, len(self))
+        """
+        if not 0 <= n < self._size:
+            raise IndexError(f"Story index {n} out of range (size {self._size}).")
+        g = bisect.bisect_right(self._offsets, n) - 1
+        opening, middle, ending = self._choices[g]
+        rest, i_ending = divmod(n - self._offsets[g], len(ending))
+        i_opening, i_middle = divmod(rest, len(middle))
+        return self.genres[g], [opening[i_opening], middle[i_middle], ending[i_ending]]
+
+    def encode(self, story: str, keywords: list[str], genre: str | None = None) -> int | None:
+        """
+        Inverse of story(): finds the index that renders story for keywords.
+
+        Args:
+            story: Story text, e.g. from generate_template_story()
+            keywords: Keywords the story was generated from
+            genre: Optional genre hint, tried first
+
+        Returns:
+            Index, or None if story is not a template story of this index
+        """
+        paragraphs = story.split("\n\n")
+        if len(keywords) < 3 or len(paragraphs) != len(SECTIONS):
+            return None
+        character, place, object_ = keywords[:3]
+        order = sorted(range(len(self.genres)), key=lambda g: self.genres[g] != genre)
+        for g in order:
+            picks = []
+            for paragraph, choices in zip(paragraphs, self._choices[g]):
+                for i, (compiled, adjective) in enumerate(choices):
+                    if render(compiled, _values(character, place, object_, adjective)) == paragraph:
+                        picks.append(i)
+                        break
+                else:
+                    break
+            if len(picks) == len(SECTIONS):
+                _, middle, ending = self._choices[g]
+                i_opening, i_middle, i_ending = picks
+                return self._offsets[g] + (i_opening * len(middle) + i_middle) * len(ending) + i_ending
+        return None
+
+    def story(self, n: int, keywords: list[str]) -> str:
+        """
+        Renders the nth story for keywords.
+
+        Args:
+            n: Index in [0, len(self))
+            keywords: List of [character, place, object]
+
+        Returns:
+            Story string, or the usual error message if fewer than 3 keywords
+        """
+        if len(keywords) < 3:
+            return "Please enter at least three keywords."
+        character, place, object_ = keywords[:3]
+        _, paragraphs = self.decode(n)
+        return "\n\n".join(
+            render(compiled, _values(character, place, object_, adjective))
+            for compiled, adjective in paragraphs
+        )
+
+    def count_unique(self, keywords: list[str]) -> int:
+        """Number of distinct stories available for keywords (0 if fewer than 3)."""
+        return self._size if len(keywords) >= 3 else 0
+
+    def iter_shuffled(self, keywords: list[str], seed: int | None = None) -> Iterator[str]:
+        """
+        Yields every distinct story for keywords exactly once, in random order.
+        The permutation is built lazily with a sparse Fisher-Yates shuffle
+        (only displaced positions are stored), so taking the first k stories
+        costs O(k) time and memory however large the index is.
+        """
+        if len(keywords) < 3:
+            return
+        rng = random.Random(seed)
+        displaced: dict[int, int] = {}  # position -> index now there; absent = itself
+        for i in range(self._size):
+            j = rng.randrange(i, self._size)
+            picked = displaced.get(j, j)
+            current = displaced.pop(i, i)
+            if j != i:
+                displaced[j] = current
+            yield self.story(picked, keywords)
+
+
+_indexes: dict[str | None, StoryIndex] = {}
+# Indexes describe one template set; rebuild them after a template reload
+add_reload_listener(_indexes.clear)
+
+
+def get_index(genre: str | None = None) -> StoryIndex:
+    """Returns the shared index for genre (None = all genres), building it on first use."""
+    key = genre if genre in templates else None
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = StoryIndex(key)
+    return index
+
+
+def generate_distinct_stories(
+    keywords: list[str],
+    n: int,
+    genre: str | None = None,
+    seed: int | None = None,
+) -> list[str]:
+    """
+    Generates n stories for one keyword list with no duplicates.
+
+    Args:
+        keywords: List of [character, place, object]
+        n: Number of stories
+        genre: Genre name or None for all genres
+        seed: Optional seed for a reproducible selection
+
+    Returns:
+        List of n distinct stories
+
+    Raises:
+        ValueError: If n exceeds the number of distinct stories available
+    """
+    index = get_index(genre)
+    available = index.count_unique(keywords)
+    if n > available:
+        raise ValueError(f"Only {available} distinct stories exist for these keywords; asked for {n}.")
+    rng = random.Random(seed)
+    return [index.story(i, keywords) for i in rng.sample(range(len(index)), n)]
@@ -0,0 +1,84 @@
+"""
+Template compiler for the Automated Micro Story Generator.
+Parses each template string once into literal/placeholder segments so
+rendering is a single join instead of a str.format parse per call.
+"""
+
+from string import Formatter
+
+from .templates import templates
+
+# A compiled template is a tuple of (literal_text, field_name) segments.
+# field_name is None for a trailing literal with no placeholder after it.
+CompiledTemplate = tuple[tuple[str, str | None], ...]
+
+_formatter = Formatter()
+
+
+def compile_template(template: str) -> CompiledTemplate:
+    """
+    Parses a template string into literal/placeholder segments.
+
+    Args:
+        template: Template using {character}, {place}, {object} placeholders
+
+    Returns:
+        Tuple of (literal_text, field_name) segments
+
+    Raises:
+        ValueError: If the template uses format specs or conversions,
+        which the compiled renderer does not support.
+    """
+    segments = []
+    for literal, field_name, format_spec, conversion in _formatter.parse(template):
+        if format_spec or conversion:
+            raise ValueError(f"Unsupported format spec in template: {template!r}")
+        segments.append((literal, field_name))
+    return tuple(segments)
+
+
+def render(compiled: CompiledTemplate, values: dict[str, str]) -> str:
+    """
+    Renders a compiled template with a single join.
+
+    Args:
+        compiled: Output of compile_template()
+        values: Mapping of placeholder name to replacement text
+
+    Returns:
+        Rendered string
+    """
+    parts = []
+    append = parts.append
+    for literal, field_name in compiled:
+        append(literal)
+        if field_name is not None:
+            append(values[field_name])
+    return "".join(parts)
+
+
+def compile_all(source: dict) -> dict[str, CompiledTemplate]:
+    """
+    Compiles every template in a genre -> part -> list[str] mapping.
+
+    Returns:
+        dict mapping each template string to its compiled form
+    """
+    return {
+        tmpl: compile_template(tmpl)
+        for parts in source.values()
+        for part_templates in parts.values()
+        for tmpl in part_templates
+    }
+
+
+# Compiled once at import time
+COMPILED_TEMPLATES = compile_all(templates)
+
+
+def get_compiled(template: str) -> CompiledTemplate:
+    """Returns the compiled form of a template, compiling and caching it if new."""
+    compiled = COMPILED_TEMPLATES.get(template)
+    if compiled is None:
+        compiled = COMPILED_TEMPLATES[template] = compile_template(template)
+    return compiled
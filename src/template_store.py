@@ -0,0 +1,235 @@
+"""
+Hot-reloadable template store.
+Loads genre templates from a directory of JSON/YAML files, merges them over
+the built-in templates and updates templates.templates, GENRES and
+OBJECT_ADJECTIVES in place, so every module that imported them sees the
+change. Reloads are incremental: only files whose mtime or size changed
+are parsed, and only new template strings are compiled.
+
+File format (one genre per file, genre name = file stem unless "genre" is given):
+
+    {"opening": ["..."], "middle": ["..."], "ending": ["..."]}
+
+A file named _adjectives.json / _adjectives.yaml holds a list of strings
+that replaces OBJECT_ADJECTIVES. YAML files need PyYAML installed.
+"""
+
+import json
+import os
+import threading
+import time
+
+from .config import TEMPLATE_DIR, TEMPLATE_RELOAD_INTERVAL
+from .template_compiler import COMPILED_TEMPLATES, compile_template, get_compiled
+from .templates import GENRES, OBJECT_ADJECTIVES, templates
+
+SECTIONS = ("opening", "middle", "ending")
+PLACEHOLDERS = {"character", "place", "object"}
+EXTENSIONS = (".json", ".yaml", ".yml")
+ADJECTIVES_STEM = "_adjectives"
+
+# Built-ins, captured before any directory is merged in
+BUILTIN_TEMPLATES = {
+    genre: {section: list(section_templates) for section, section_templates in parts.items()}
+    for genre, parts in templates.items()
+}
+BUILTIN_ADJECTIVES = list(OBJECT_ADJECTIVES)
+
+# Called after every reload that changed the templates (e.g. to drop derived indexes)
+_reload_listeners: list = []
+
+
+def add_reload_listener(callback) -> None:
+    """Registers a zero-argument callback run after each effective reload."""
+    _reload_listeners.append(callback)
+
+
+def _parse_file(path: str):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("PyYAML is required for YAML template files.") from None
+        return yaml.safe_load(f)
+
+
+def _check_genre(data, path: str) -> tuple[str, dict[str, list[str]]]:
+    """Validates one genre file; returns (genre, sections)."""
+    if not isinstance(data, dict):
+        raise ValueError("Genre file must contain a mapping.")
+    genre = str(data.get("genre") or os.path.splitext(os.path.basename(path))[0]).strip().lower()
+    parts = {}
+    for section in SECTIONS:
+        section_templates = data.get(section)
+        if not section_templates or not isinstance(section_templates, list):
+            raise ValueError(f"'{section}' must be a non-empty list.")
+        for template in section_templates:
+            if not isinstance(template, str):
+                raise ValueError(f"'{section}' entries must be strings.")
+            fields = {field for _, field in compile_template(template) if field is not None}
+            if not fields <= PLACEHOLDERS:
+                raise ValueError(f"Unknown placeholder(s) {sorted(fields - PLACEHOLDERS)} in {section}.")
+        parts[section] = section_templates
+    return genre, parts
+
+
+def _check_adjectives(data) -> list[str]:
+    if not isinstance(data, list) or not all(isinstance(adj, str) and adj for adj in data):
+        raise ValueError("Adjectives file must contain a list of non-empty strings.")
+    return data
+
+
+class TemplateStore:
+    """
+    Template directory watcher.
+
+    Args:
+        directory: Directory of template files ("" = built-ins only)
+        reload_interval: Minimum seconds between mtime scans in maybe_reload()
+        clock: Injectable for tests
+
+    Attributes:
+        version: Incremented on every reload that changed the templates
+        errors: {path: message} for files that failed to load (their previous
+            content, if any, stays in effect)
+    """
+
+    def __init__(
+        self,
+        directory: str = TEMPLATE_DIR,
+        reload_interval: float = TEMPLATE_RELOAD_INTERVAL,
+        clock=time.monotonic,
+    ):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.version = 0
+        self.errors: dict[str, str] = {}
+        self._clock = clock
+        self._checked = None
+        self._reload_requested = False
+        # path -> ((mtime_ns, size), parsed content)
+        self._files: dict[str, tuple[tuple[int, int], object]] = {}
+        self._lock = threading.Lock()
+
+    def request_reload(self) -> None:
+        """Makes the next maybe_reload() rescan immediately (safe to call from a signal handler)."""
+        self._reload_requested = True
+
+    def maybe_reload(self) -> bool:
+        """Rescans if a reload was requested or reload_interval has passed; returns reload()'s result."""
+        if not self.directory:
+            return False
+        now = self._clock()
+        if not self._reload_requested and self._checked is not None and now - self._checked < self.reload_interval:
+            return False
+        return self.reload()
+
+    def reload(self) -> bool:
+        """
+        Rescans the directory, parsing only new or modified files.
+
+        Returns:
+            True if the effective templates changed
+        """
+        with self._lock:
+            self._reload_requested = False
+            self._checked = self._clock()
+            changed = False
+            seen = set()
+            try:
+                entries = list(os.scandir(self.directory)) if self.directory else []
+                self.errors.pop(self.directory, None)
+            except OSError as exc:
+                self.errors[self.directory] = str(exc)
+                return False
+            for entry in entries:
+                if not entry.name.endswith(EXTENSIONS) or not entry.is_file():
+                    continue
+                path = entry.path
+                seen.add(path)
+                stat = entry.stat()
+                signature = (stat.st_mtime_ns, stat.st_size)
+                previous = self._files.get(path)
+                if previous is not None and previous[0] == signature:
+                    continue
+                try:
+                    data = _parse_file(path)
+                    if os.path.splitext(entry.name)[0] == ADJECTIVES_STEM:
+                        content = ("adjectives", _check_adjectives(data))
+                    else:
+                        content = ("genre", _check_genre(data, path))
+                except (OSError, ValueError) as exc:
+                    self.errors[path] = str(exc)
+                    continue
+                self.errors.pop(path, None)
+                if previous is None or previous[1] != content:
+                    changed = True
+                self._files[path] = (signature, content)
+
+            for path in set(self._files) - seen:
+                del self._files[path]
+                changed = True
+            for path in set(self.errors) - seen - {self.directory}:
+                del self.errors[path]
+
+            if changed:
+                self._apply()
+            return changed
+
+    def _apply(self) -> None:
+        """Merges loaded files over the built-ins and updates the shared objects in place."""
+        merged = {genre: parts for genre, parts in BUILTIN_TEMPLATES.items()}
+        adjectives = BUILTIN_ADJECTIVES
+        for path in sorted(self._files):
+            kind, content = self._files[path][1]
+            if kind == "adjectives":
+                adjectives = content
+            else:
+                genre, parts = content
+                merged[genre] = parts
+
+        for parts in merged.values():
+            for section_templates in parts.values():
+                for template in section_templates:
+                    get_compiled(template)
+
+        # Add/replace genres before publishing them, retire them before deleting,
+        # so a concurrent reader never picks a genre without templates.
+        for genre, parts in merged.items():
+            templates[genre] = parts
+        GENRES[:] = list(merged)
+        OBJECT_ADJECTIVES[:] = adjectives
+        for genre in [genre for genre in templates if genre not in merged]:
+            del templates[genre]
+
+        live = {t for parts in merged.values() for section in parts.values() for t in section}
+        for template in [t for t in COMPILED_TEMPLATES if t not in live]:
+            COMPILED_TEMPLATES.pop(template, None)
+
+        self.version += 1
+        for callback in _reload_listeners:
+            callback()
+
+
+_store: TemplateStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> TemplateStore:
+    """Returns the process-wide store for config.TEMPLATE_DIR, loading it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = TemplateStore()
+                store.reload()
+                _store = store
+    return _store
+
+
+def load_configured() -> None:
+    """Merges config.TEMPLATE_DIR into the shared templates once (no-op when unset)."""
+    if TEMPLATE_DIR:
+        get_store()
@@ -2,6 +2,10 @@
 Story templates organized by genre.
 Each genre has opening, middle, and ending templates for multi-paragraph narratives.
 All templates use {character}, {place}, and {object} placeholders.
+
+These are the built-in templates. When STORY_TEMPLATE_DIR is set,
+template_store merges that directory's genres in, updating templates,
+GENRES and OBJECT_ADJECTIVES in place (story_generator loads it on import).
 """
 
 templates = {
@@ -79,3 +83,6 @@ templates = {
 
 # Flat list of all genres for random selection
 GENRES = list(templates.keys())
+
+# Adjective pools for randomized variation before {object}
+OBJECT_ADJECTIVES = ["mysterious", "ancient", "forgotten", "gleaming", "strange", "legendary"]
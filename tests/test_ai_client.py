@@ -0,0 +1,79 @@
+"""Tests for ai_client module. Uses a local fake server for real HTTP traffic."""
+
+import threading
+
+import pytest
+from unittest.mock import patch
+
+from src.ai_client import get_async_client, get_client, get_connection_stats, reset_client
+from src.ai_generator import generate_ai_story
+from src.story_generator import generate_story
+from src.fake_anthropic import FakeAnthropicServer
+
+
+@pytest.fixture(autouse=True)
+def _fresh_client():
+    reset_client()
+    yield
+    reset_client()
+
+
+class TestGetClient:
+    """Test cases for get_client()."""
+
+    def test_same_key_returns_same_client(self):
+        assert get_client("key-a") is get_client("key-a")
+        assert get_connection_stats()["clients_created"] == 1
+
+    def test_new_key_rebuilds_client(self):
+        first = get_client("key-a")
+        assert get_client("key-b") is not first
+        assert get_connection_stats()["clients_created"] == 2
+
+    def test_concurrent_first_use_creates_one_client(self):
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(get_client("key-a"))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len({id(c) for c in clients}) == 1
+        assert get_connection_stats()["clients_created"] == 1
+
+
+class TestConnectionReuse:
+    """Connection pooling against a local fake server."""
+
+    def test_sequential_stories_reuse_one_connection(self):
+        with FakeAnthropicServer() as server, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            stories = [generate_ai_story(["knight", "forest", "sword"]) for _ in range(5)]
+
+        stats = get_connection_stats()
+        assert stories == ["A fake story about a knight."] * 5
+        assert stats["clients_created"] == 1
+        assert stats["requests"] == 5
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 4
+
+    def test_hedged_stories_reuse_the_shared_async_client(self):
+        with FakeAnthropicServer() as server, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            stories = [generate_story(["knight", "forest", "sword"], mode="ai") for _ in range(3)]
+
+        stats = get_connection_stats()
+        assert stories == ["A fake story about a knight."] * 3
+        assert stats["clients_created"] == 1
+        assert stats["requests"] == 3
+        assert stats["connections_opened"] == 1
+
+    def test_get_async_client_is_shared(self):
+        assert get_async_client("key-a") is get_async_client("key-a")
+        assert get_async_client("key-b") is not get_async_client("key-a")
+
+    def test_reset_clears_stats(self):
+        get_client("key-a")
+        reset_client()
+        assert get_connection_stats()["clients_created"] == 0
@@ -1,9 +1,47 @@
 """Tests for ai_generator module. Uses mocks to avoid real API calls."""
 
+import asyncio
+import collections
+import time
+
+import anthropic
 import pytest
 from unittest.mock import patch, MagicMock
 
-from src.ai_generator import build_prompt, generate_ai_story
+from src.ai_generator import (
+    SYSTEM_PROMPT,
+    build_prompt,
+    generate_ai_story,
+    generate_ai_story_async,
+    generate_ai_stories_async,
+    generate_ai_stories_packed_async,
+    generate_ai_story_hedged,
+    generate_ai_story_hedged_async,
+    hedge_delay,
+    max_tokens_for,
+    pack_size,
+    parse_packed_stories,
+    request_params,
+    stream_ai_story,
+    StreamInterrupted,
+)
+from src.ai_client import get_connection_stats, reset_client
+from src.circuit_breaker import OPEN, CircuitBreaker, get_breaker, set_breaker
+from src.config import AI_BREAKER_SLOW_CALL, AI_HEDGE_AFTER, AI_HEDGE_DEADLINE, AI_PACK_MAX, MAX_TOKENS, STORY_LENGTHS
+from src.metrics import get_counter, get_histogram, reset_metrics
+from src.rate_limiter import RequestScheduler, get_scheduler, set_scheduler
+from src.story_generator import generate_story, stream_story
+from src.fake_anthropic import FakeAnthropicServer
+
+
+@pytest.fixture(autouse=True)
+def _fresh_client():
+    """The shared client and circuit breaker are per process; start each test without them."""
+    reset_client()
+    set_breaker(None)
+    yield
+    reset_client()
+    set_breaker(None)
 
 
 class TestBuildPrompt:
@@ -27,6 +65,39 @@ class TestBuildPrompt:
         prompt = build_prompt([])
         assert prompt == ""
 
+    def test_instructions_stay_in_system_prompt(self):
+        prompt = build_prompt(["knight", "forest", "sword"])
+        assert "Only output the story text" in SYSTEM_PROMPT
+        assert "Only output the story text" not in prompt
+
+    def test_prompt_states_target_length(self):
+        prompt = build_prompt(["knight", "forest", "sword"], length="short")
+        assert f"about {STORY_LENGTHS['short']} words" in prompt
+
+
+class TestRequestParams:
+    """Test cases for request_params() and max_tokens_for()."""
+
+    def test_system_prefix_is_cacheable(self):
+        params = request_params("tail")
+        assert params["system"] == [
+            {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+        ]
+        assert params["messages"] == [{"role": "user", "content": "tail"}]
+
+    def test_max_tokens_grows_with_length(self):
+        assert max_tokens_for("short") < max_tokens_for("medium") < max_tokens_for("long") <= MAX_TOKENS
+
+    def test_max_tokens_covers_target_words(self):
+        assert max_tokens_for("medium") > STORY_LENGTHS["medium"]
+
+    def test_unknown_length_uses_medium(self):
+        assert max_tokens_for("epic") == max_tokens_for("medium")
+
+    def test_max_tokens_capped(self):
+        with patch.dict("src.ai_generator.STORY_LENGTHS", {"huge": 100_000}):
+            assert max_tokens_for("huge") == MAX_TOKENS
+
 
 class TestGenerateAiStory:
     """Test cases for generate_ai_story(). Uses mocked API."""
@@ -81,3 +152,433 @@ class TestGenerateAiStory:
     def test_no_api_key_returns_none(self):
         story = generate_ai_story(["knight", "forest", "sword"])
         assert story is None
+
+
+def _async_client(server: FakeAnthropicServer) -> anthropic.AsyncAnthropic:
+    return anthropic.AsyncAnthropic(api_key="test-key", base_url=server.url, max_retries=0)
+
+
+class TestGenerateAiStoryAsync:
+    """Test cases for the async AI path against a local fake server."""
+
+    def test_returns_story(self):
+        async def run():
+            async with _async_client(server) as client:
+                return await generate_ai_story_async(["knight", "forest", "sword"], "mystery", client)
+
+        with FakeAnthropicServer() as server:
+            story = asyncio.run(run())
+
+        assert story == "A fake story about a knight."
+        assert "mystery" in server.requests[0]["messages"][0]["content"]
+
+    def test_client_error_returns_none(self):
+        async def run():
+            async with _async_client(server) as client:
+                return await generate_ai_story_async(["knight", "forest", "sword"], None, client)
+
+        with FakeAnthropicServer(statuses=[400]) as server:
+            assert asyncio.run(run()) is None
+
+    @patch("src.ai_generator.ANTHROPIC_API_KEY", "")
+    def test_no_api_key_returns_none(self):
+        assert asyncio.run(generate_ai_story_async(["knight", "forest", "sword"])) is None
+
+    def test_fewer_than_3_keywords_returns_none(self):
+        assert asyncio.run(generate_ai_story_async(["knight"])) is None
+
+
+class TestGenerateAiStoriesAsync:
+    """Test cases for concurrent batch generation."""
+
+    def test_results_in_input_order_with_bounded_concurrency(self):
+        requests = [([f"hero{c}", "forest", "sword"], None) for c in "abcdef"]
+
+        async def run():
+            async with _async_client(server) as client:
+                return await generate_ai_stories_async(requests, concurrency=3, client=client)
+
+        with FakeAnthropicServer(delay=0.2) as server:
+            stories = asyncio.run(run())
+
+        assert stories == [f"A fake story about a hero{c}." for c in "abcdef"]
+        assert server.max_in_flight == 3
+
+    def test_failed_item_is_none(self):
+        requests = [(["knight", "forest", "sword"], None), (["wizard", "tower", "crystal"], None)]
+
+        async def run():
+            async with _async_client(server) as client:
+                return await generate_ai_stories_async(requests, concurrency=1, client=client)
+
+        with FakeAnthropicServer(statuses=[400]) as server:
+            stories = asyncio.run(run())
+
+        assert stories == [None, "A fake story about a wizard."]
+
+
+class TestPackedStories:
+    """Test cases for multi-story (packed) requests."""
+
+    @pytest.fixture(autouse=True)
+    def _fresh_state(self):
+        reset_metrics()
+        with patch("src.ai_generator._tokens_per_story", None):
+            yield
+        reset_metrics()
+
+    def test_parse_in_order(self):
+        text = "=== STORY 1 ===\nOne.\n\n=== STORY 2 ===\nTwo."
+        assert parse_packed_stories(text, 2) == ["One.", "Two."]
+
+    def test_parse_tolerates_preamble_and_header_variants(self):
+        text = "Here you go:\n== Story 2 ==\nTwo.\n  === STORY 1 ===  \nOne."
+        assert parse_packed_stories(text, 2) == ["One.", "Two."]
+
+    def test_parse_missing_repeated_and_empty_are_none(self):
+        text = "=== STORY 1 ===\nOne.\n=== STORY 1 ===\nAgain.\n=== STORY 3 ===\n\n=== STORY 9 ===\nNine."
+        assert parse_packed_stories(text, 4) == [None, None, None, None]
+
+    def test_parse_truncated_drops_last_story(self):
+        text = "=== STORY 1 ===\nOne.\n=== STORY 2 ===\nTw"
+        assert parse_packed_stories(text, 2, truncated=True) == ["One.", None]
+
+    def test_pack_size_adapts_to_observed_output(self):
+        estimated = pack_size()
+        assert 1 <= estimated <= AI_PACK_MAX
+        with patch("src.ai_generator._tokens_per_story", MAX_TOKENS / 3):
+            assert pack_size() == 1
+        with patch("src.ai_generator._tokens_per_story", 10):
+            assert pack_size() == AI_PACK_MAX
+
+    def test_packs_requests_in_input_order(self):
+        requests = [([f"hero{c}", "forest", "sword"], None) for c in "abcde"]
+
+        async def run():
+            async with _async_client(server) as client:
+                return await generate_ai_stories_packed_async(requests, client=client)
+
+        with FakeAnthropicServer() as server, patch("src.ai_generator.pack_size", return_value=3):
+            stories = asyncio.run(run())
+
+        assert stories == [f"A fake story about a hero{c}." for c in "abcde"]
+        assert len(server.requests) == 2
+        assert server.requests[0]["max_tokens"] == MAX_TOKENS
+        assert get_counter("ai_packed_requests_total") == 2
+
+    def test_unparsed_story_is_reissued_alone(self):
+        requests = [([f"hero{c}", "forest", "sword"], None) for c in "abc"]
+
+        async def run():
+            async with _async_client(server) as client:
+                return await generate_ai_stories_packed_async(requests, client=client)
+
+        with FakeAnthropicServer(pack_dropped={2}) as server, patch("src.ai_generator.pack_size", return_value=3):
+            stories = asyncio.run(run())
+
+        assert stories == [f"A fake story about a hero{c}." for c in "abc"]
+        assert len(server.requests) == 2
+        assert "=== STORY" not in server.requests[1]["messages"][0]["content"]
+        assert get_counter("ai_pack_reissues_total") == 1
+
+    def test_failed_pack_is_not_reissued(self):
+        requests = [([f"hero{c}", "forest", "sword"], None) for c in "ab"]
+
+        async def run():
+            async with _async_client(server) as client:
+                return await generate_ai_stories_packed_async(requests, client=client)
+
+        with FakeAnthropicServer(statuses=[400]) as server:
+            stories = asyncio.run(run())
+
+        assert stories == [None, None]
+        assert len(server.requests) == 1
+        assert get_counter("ai_fallbacks_total", cause="status") == 2
+
+
+class TestStreamAiStory:
+    """Test cases for stream_ai_story() against a local fake server."""
+
+    @pytest.fixture(autouse=True)
+    def _fake_env(self):
+        reset_metrics()
+        yield
+
+    def _stream(self, server, keywords=("knight", "forest", "sword")):
+        with patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            return list(stream_ai_story(list(keywords)))
+
+    def test_yields_chunks_and_records_latency(self):
+        with FakeAnthropicServer() as server:
+            chunks = self._stream(server)
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == "A fake story about a knight."
+        assert server.requests[0]["stream"] is True
+        assert get_histogram("ai_stream_ttft_seconds").snapshot()["count"] == 1
+        assert get_histogram("ai_stream_total_seconds").snapshot()["count"] == 1
+
+    def test_failure_before_first_chunk_yields_nothing(self):
+        with FakeAnthropicServer(statuses=[400]) as server:
+            assert self._stream(server) == []
+
+    def test_failure_partway_raises_stream_interrupted(self):
+        chunks = []
+        with FakeAnthropicServer(stream_error_after=2) as server, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            with pytest.raises(StreamInterrupted):
+                for chunk in stream_ai_story(["knight", "forest", "sword"]):
+                    chunks.append(chunk)
+        assert len(chunks) == 2
+        assert get_histogram("ai_stream_total_seconds").snapshot()["count"] == 0
+
+    @patch("src.ai_generator.ANTHROPIC_API_KEY", "")
+    def test_no_api_key_yields_nothing(self):
+        assert list(stream_ai_story(["knight", "forest", "sword"])) == []
+
+
+class TestFailureMetrics:
+    """Test cases for the fallback-cause and token counters."""
+
+    @pytest.fixture(autouse=True)
+    def _clean_metrics(self):
+        reset_metrics()
+        yield
+        reset_metrics()
+
+    @patch("src.ai_generator.ANTHROPIC_API_KEY", "")
+    def test_no_api_key_counted(self):
+        generate_ai_story(["knight", "forest", "sword"])
+        assert get_counter("ai_fallbacks_total", cause="no_key") == 1
+
+    def test_status_error_counted(self):
+        async def run():
+            async with _async_client(server) as client:
+                return await generate_ai_story_async(["knight", "forest", "sword"], None, client)
+
+        with FakeAnthropicServer(statuses=[400]) as server:
+            asyncio.run(run())
+        assert get_counter("ai_fallbacks_total", cause="status") == 1
+
+    def test_usage_tokens_counted(self):
+        async def run():
+            async with _async_client(server) as client:
+                return await generate_ai_story_async(["knight", "forest", "sword"], None, client)
+
+        with FakeAnthropicServer() as server:
+            asyncio.run(run())
+        assert get_counter("ai_input_tokens_total") == 50
+        assert get_counter("ai_output_tokens_total") == 20
+        assert get_histogram("ai_request_seconds").snapshot()["count"] == 1
+
+    def test_prompt_cache_tokens_counted(self):
+        async def run():
+            async with _async_client(server) as client:
+                for keywords in (["knight", "forest", "sword"], ["pirate", "harbor", "map"]):
+                    await generate_ai_story_async(keywords, None, client)
+
+        with FakeAnthropicServer() as server:
+            asyncio.run(run())
+        assert server.requests[0]["system"][0]["cache_control"] == {"type": "ephemeral"}
+        assert server.requests[0]["max_tokens"] == max_tokens_for()
+        assert get_counter("ai_cache_creation_input_tokens_total") == len(SYSTEM_PROMPT) // 4
+        assert get_counter("ai_cache_read_input_tokens_total") == len(SYSTEM_PROMPT) // 4
+
+
+class TestHedgedAiStory:
+    """Test cases for generate_ai_story_hedged_async() against a slow fake server."""
+
+    @pytest.fixture(autouse=True)
+    def _clean_metrics(self):
+        reset_metrics()
+        yield
+
+    def _run(self, server, **kwargs):
+        async def run():
+            async with _async_client(server) as client:
+                start = time.perf_counter()
+                story = await generate_ai_story_hedged_async(["knight", "forest", "sword"], client=client, **kwargs)
+                return story, time.perf_counter() - start
+
+        return asyncio.run(run())
+
+    def test_fast_answer_sends_no_hedge(self):
+        with FakeAnthropicServer() as server:
+            story, _ = self._run(server, deadline=5, hedge_after=1)
+        assert story == "A fake story about a knight."
+        assert len(server.requests) == 1
+
+    def test_slow_first_request_is_hedged(self):
+        with FakeAnthropicServer(delays=[3.0, 0.0]) as server:
+            story, elapsed = self._run(server, deadline=5, hedge_after=0.2)
+        assert story == "A fake story about a knight."
+        assert elapsed < 2
+        assert len(server.requests) == 2
+        assert get_counter("ai_hedges_total") == 1
+
+    def test_budget_exhausted_returns_none(self):
+        with FakeAnthropicServer(delay=3.0) as server:
+            story, elapsed = self._run(server, deadline=0.5, hedge_after=0.2)
+        assert story is None
+        assert elapsed < 1.5
+        assert get_counter("ai_fallbacks_total", cause="latency_budget") == 1
+
+    def test_hedge_delay_uses_p95_of_recent_latencies(self):
+        with patch("src.ai_generator._recent_latencies", collections.deque(maxlen=200)) as latencies:
+            assert hedge_delay() == AI_HEDGE_AFTER
+            latencies.extend(i / 100 for i in range(1, 101))
+            assert hedge_delay() == pytest.approx(0.96)
+
+    def test_generate_story_falls_back_to_template_within_deadline(self):
+        with FakeAnthropicServer(delay=3.0) as server, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            start = time.perf_counter()
+            story = generate_story(["knight", "forest", "sword"], mode="ai", deadline=0.5)
+            elapsed = time.perf_counter() - start
+        assert "knight" in story and story != "A fake story about a knight."
+        assert elapsed < 1.5
+
+    def test_sync_hedge_works_inside_running_event_loop(self):
+        async def caller():
+            return generate_ai_story_hedged(["knight", "forest", "sword"], deadline=5)
+
+        with FakeAnthropicServer() as server, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            assert asyncio.run(caller()) == "A fake story about a knight."
+
+
+class TestHedgedStream:
+    """Test cases for stream_ai_story() with a first-chunk deadline."""
+
+    @pytest.fixture(autouse=True)
+    def _clean_metrics(self):
+        reset_metrics()
+        yield
+
+    def _stream(self, server, **kwargs):
+        with patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            start = time.perf_counter()
+            chunks = list(stream_ai_story(["knight", "forest", "sword"], **kwargs))
+            return chunks, time.perf_counter() - start
+
+    def test_streams_chunks_on_shared_client(self):
+        with FakeAnthropicServer() as server:
+            chunks, _ = self._stream(server, deadline=5, hedge_after=1)
+        assert len(chunks) > 1
+        assert "".join(chunks) == "A fake story about a knight."
+        assert len(server.requests) == 1
+        assert get_histogram("ai_stream_ttft_seconds").snapshot()["count"] == 1
+        assert get_connection_stats()["requests"] == 1
+
+    def test_slow_first_stream_is_hedged(self):
+        with FakeAnthropicServer(delays=[3.0, 0.0]) as server:
+            chunks, elapsed = self._stream(server, deadline=5, hedge_after=0.2)
+        assert "".join(chunks) == "A fake story about a knight."
+        assert elapsed < 2
+        assert len(server.requests) == 2
+        assert get_counter("ai_hedges_total") == 1
+
+    def test_budget_exhausted_yields_nothing(self):
+        with FakeAnthropicServer(delay=3.0) as server:
+            chunks, elapsed = self._stream(server, deadline=0.5, hedge_after=0.2)
+        assert chunks == []
+        assert elapsed < 1.5
+        assert get_counter("ai_fallbacks_total", cause="latency_budget") == 1
+
+    def test_failure_partway_raises_stream_interrupted(self):
+        chunks = []
+        with FakeAnthropicServer(stream_error_after=2) as server, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            with pytest.raises(StreamInterrupted):
+                for chunk in stream_ai_story(["knight", "forest", "sword"], deadline=5):
+                    chunks.append(chunk)
+        assert len(chunks) == 2
+
+    def test_stream_story_falls_back_to_template_within_deadline(self):
+        with FakeAnthropicServer(delay=3.0) as server, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            start = time.perf_counter()
+            chunks = list(stream_story(["knight", "forest", "sword"], mode="ai", deadline=0.5))
+            elapsed = time.perf_counter() - start
+        assert len(chunks) == 1 and "knight" in chunks[0]
+        assert elapsed < 1.5
+
+
+class TestCircuitBreakerIntegration:
+    """Test cases for the shared circuit breaker around AI calls."""
+
+    @pytest.fixture(autouse=True)
+    def _no_retries(self):
+        reset_metrics()
+        previous = get_scheduler()
+        set_scheduler(RequestScheduler(requests_per_minute=1e9, tokens_per_minute=1e12, max_retries=0))
+        set_breaker(CircuitBreaker(min_calls=2, failure_rate=0.5, open_seconds=60.0))
+        yield
+        set_scheduler(previous)
+        reset_metrics()
+
+    def _run(self, server, keywords=("knight", "forest", "sword")):
+        async def run():
+            async with _async_client(server) as client:
+                return await generate_ai_story_async(list(keywords), None, client)
+
+        return asyncio.run(run())
+
+    def test_server_errors_open_the_breaker(self):
+        with FakeAnthropicServer(statuses=[500, 503]) as server:
+            assert self._run(server) is None
+            assert self._run(server) is None
+            assert get_breaker().state == OPEN
+            assert self._run(server) is None
+        assert len(server.requests) == 2
+        assert get_counter("ai_fallbacks_total", cause="circuit_open") == 1
+
+    @pytest.mark.parametrize("streamed", [False, True])
+    def test_hanging_api_opens_the_breaker(self, streamed):
+        set_breaker(None)  # the configured breaker, as generate_story uses it
+        keywords = ["knight", "forest", "sword"]
+        with FakeAnthropicServer(delay=5.0) as server, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            for _ in range(3):
+                if streamed:
+                    assert list(stream_ai_story(keywords, deadline=0.3, hedge_after=0.1)) == []
+                else:
+                    assert generate_ai_story_hedged(keywords, deadline=0.3, hedge_after=0.1) is None
+            assert get_breaker().state == OPEN
+            sent = server.request_count
+            start = time.perf_counter()
+            story = generate_story(keywords, mode="ai", deadline=0.3)
+            assert time.perf_counter() - start < 0.2
+        assert "knight" in story
+        assert server.request_count == sent == 6
+        assert get_counter("ai_fallbacks_total", cause="latency_budget") == 3
+
+    def test_slow_call_threshold_is_below_hedge_deadline(self):
+        assert AI_BREAKER_SLOW_CALL < AI_HEDGE_DEADLINE
+
+    def test_client_errors_do_not_count(self):
+        with FakeAnthropicServer(statuses=[400, 400]) as server:
+            self._run(server)
+            self._run(server)
+        assert get_breaker().state != OPEN
+
+    def test_open_breaker_skips_sync_call(self):
+        get_breaker().allow()
+        get_breaker().record_failure()
+        get_breaker().allow()
+        get_breaker().record_failure()
+        with FakeAnthropicServer() as server, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            assert generate_ai_story(["knight", "forest", "sword"]) is None
+            assert list(stream_ai_story(["knight", "forest", "sword"])) == []
+        assert server.requests == []
+        assert get_counter("ai_fallbacks_total", cause="circuit_open") == 2
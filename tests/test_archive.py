@@ -0,0 +1,133 @@
+"""Tests for archive module."""
+
+import gzip
+import io
+import json
+
+import pytest
+from unittest.mock import patch
+
+from src.archive import ArchiveReader, ArchiveWriter, archive_main, export_jsonl, import_jsonl
+from src.batch import batch_main
+from src.story_generator import generate_template_story
+
+
+def _template_rows(count: int) -> list[tuple[list[str], str]]:
+    rows = []
+    for i in range(count):
+        keywords = [f"hero {chr(97 + i % 26)}", "forest", "sword"]
+        rows.append((keywords, generate_template_story(keywords, seed=i)))
+    return rows
+
+
+class TestArchive:
+    """Test cases for ArchiveWriter and ArchiveReader."""
+
+    def test_round_trip_template_and_text(self, tmp_path):
+        rows = _template_rows(50) + [(["robot", "moon", "laser"], "An AI story about a robot.")]
+        path = str(tmp_path / "stories.sta")
+        with ArchiveWriter(path) as writer:
+            kinds = [writer.add(keywords, story) for keywords, story in rows]
+        assert kinds == ["template"] * 50 + ["text"]
+
+        with ArchiveReader(path) as reader:
+            assert len(reader) == 51
+            assert [(r["keywords"], r["story"]) for r in reader] == rows
+            assert reader[-1]["kind"] == "text"
+            assert reader[7]["kind"] == "template" and reader[7]["genre"]
+
+    def test_random_access(self, tmp_path):
+        rows = _template_rows(100)
+        path = str(tmp_path / "stories.sta")
+        with ArchiveWriter(path) as writer:
+            for keywords, story in rows:
+                writer.add(keywords, story)
+        with ArchiveReader(path) as reader:
+            for i in (99, 0, 42):
+                assert reader[i]["story"] == rows[i][1]
+            with pytest.raises(IndexError):
+                reader[100]
+
+    def test_an_order_of_magnitude_smaller_than_text(self, tmp_path):
+        rows = _template_rows(2000)
+        path = tmp_path / "stories.sta"
+        with ArchiveWriter(str(path)) as writer:
+            for keywords, story in rows:
+                writer.add(keywords, story)
+        plain = sum(len(story.encode("utf-8")) for _, story in rows)
+        assert path.stat().st_size * 10 < plain
+
+    def test_story_indices_beyond_32_bits(self, tmp_path):
+        # A large template library has billions of stories per genre
+        class HugeIndex:
+            fingerprint = "f" * 64
+
+            def encode(self, story, keywords, genre=None):
+                return 2**40 + len(story)
+
+            def decode(self, n):
+                return "sci-fi", []
+
+            def story(self, n, keywords):
+                return f"story {n}"
+
+        path = str(tmp_path / "stories.sta")
+        with patch("src.archive.get_index", return_value=HugeIndex()):
+            with ArchiveWriter(path) as writer:
+                writer.add(["knight", "forest", "sword"], "abc")
+            with ArchiveReader(path) as reader:
+                assert reader[0]["story"] == f"story {2**40 + 3}"
+
+    def test_empty_archive(self, tmp_path):
+        path = str(tmp_path / "empty.sta")
+        ArchiveWriter(path).close()
+        with ArchiveReader(path) as reader:
+            assert len(reader) == 0 and list(reader) == []
+
+    def test_rejects_other_files_and_template_sets(self, tmp_path):
+        path = tmp_path / "stories.sta"
+        path.write_bytes(b"not an archive" * 10)
+        with pytest.raises(ValueError):
+            ArchiveReader(str(path))
+
+        with ArchiveWriter(str(path)) as writer:
+            writer.add(*_template_rows(1)[0])
+        data = bytearray(path.read_bytes())
+        data[36:40] = b"0000"  # corrupt the template fingerprint
+        path.write_bytes(bytes(data))
+        with pytest.raises(ValueError):
+            ArchiveReader(str(path))
+
+
+class TestJsonl:
+    """Test cases for export_jsonl() and import_jsonl()."""
+
+    def test_batch_output_round_trip(self, tmp_path):
+        keywords, story = _template_rows(1)[0]
+        infile = io.StringIO(
+            json.dumps({"keywords": keywords, "genre": None, "story": story, "seed": 0}) + "\n"
+            + json.dumps({"keywords": ["bad"], "error": "Please enter at least three keywords."}) + "\n"
+            + "not json\n"
+        )
+        path = str(tmp_path / "stories.sta")
+        counts = export_jsonl(infile, path)
+        assert counts == {"records": 1, "template": 1, "text": 0, "skipped": 2}
+
+        outfile = io.StringIO()
+        assert import_jsonl(path, outfile) == 1
+        record = json.loads(outfile.getvalue())
+        assert record["story"] == story and record["keywords"] == keywords
+
+    def test_cli_exports_gzip_batch_output(self, tmp_path):
+        jobs = tmp_path / "jobs.jsonl"
+        jobs.write_text('{"keywords": "knight, forest, sword", "seed": 1}\n', encoding="utf-8")
+        stories = tmp_path / "stories.jsonl.gz"
+        assert batch_main([str(jobs), "-o", str(stories)]) == 0
+
+        archive = str(tmp_path / "stories.sta")
+        out = tmp_path / "out.jsonl"
+        assert archive_main(["export", str(stories), archive]) == 0
+        assert archive_main(["import", archive, "-o", str(out)]) == 0
+        with gzip.open(stories, "rt", encoding="utf-8") as f:
+            expected = json.loads(f.read())["story"]
+        assert json.loads(out.read_text(encoding="utf-8"))["story"] == expected
@@ -0,0 +1,150 @@
+"""Tests for batch module."""
+
+import gzip
+import io
+import json
+
+import pytest
+from unittest.mock import patch
+
+from src.batch import iter_jobs, process_job, run_batch, batch_main
+from src.metrics import inc, reset_metrics
+
+
+class TestIterJobs:
+    """Test cases for iter_jobs()."""
+
+    def test_skips_blank_lines(self):
+        items = list(iter_jobs(['{"keywords": "a, b, c"}', "", "   "]))
+        assert len(items) == 1
+        assert items[0]["line"] == 1
+
+    def test_invalid_json_reports_error(self):
+        items = list(iter_jobs(["not json"]))
+        assert "error" in items[0]
+
+    def test_non_object_reports_error(self):
+        items = list(iter_jobs(["[1, 2, 3]"]))
+        assert "object" in items[0]["error"]
+
+
+class TestProcessJob:
+    """Test cases for process_job()."""
+
+    def test_list_keywords(self):
+        result = process_job({"keywords": ["knight", "forest", "sword"], "genre": "mystery"})
+        assert result["genre"] == "mystery"
+        assert "knight" in result["story"]
+
+    def test_string_keywords(self):
+        result = process_job({"keywords": "knight, forest, sword"})
+        assert result["keywords"] == ["knight", "forest", "sword"]
+        assert "story" in result
+
+    def test_invalid_keywords_returns_error(self):
+        result = process_job({"keywords": ["knight", "knight", "sword"]})
+        assert "duplicate" in result["error"].lower()
+        assert "story" not in result
+
+    def test_unknown_genre_becomes_random(self):
+        result = process_job({"keywords": "knight, forest, sword", "genre": "western"})
+        assert result["genre"] is None
+
+    def test_unsupported_mode(self):
+        result = process_job({"keywords": "knight, forest, sword", "mode": "poem"})
+        assert "mode" in result["error"].lower()
+
+    def test_template_result_includes_reproducible_seed(self):
+        first = process_job({"keywords": "knight, forest, sword"})
+        again = process_job({"keywords": "knight, forest, sword", "seed": first["seed"]})
+        assert again["story"] == first["story"]
+
+    def test_non_integer_seed_rejected(self):
+        result = process_job({"keywords": "knight, forest, sword", "seed": "abc"})
+        assert "seed" in result["error"].lower()
+
+    def test_id_is_echoed(self):
+        result = process_job({"id": 42, "keywords": "knight, forest, sword"})
+        assert result["id"] == 42
+
+    @patch("src.batch.generate_story")
+    def test_ai_mode_passed_through(self, mock_generate):
+        mock_generate.return_value = "AI tale."
+        result = process_job({"keywords": "knight, forest, sword", "mode": "ai"})
+        assert result["story"] == "AI tale."
+        mock_generate.assert_called_once_with(["knight", "forest", "sword"], None, mode="ai", deadline=None)
+
+
+class TestRunBatch:
+    """Test cases for run_batch() and batch_main()."""
+
+    def test_one_output_line_per_job(self):
+        infile = io.StringIO(
+            '{"keywords": "knight, forest, sword"}\n'
+            "garbage\n"
+            '{"keywords": "wizard, tower, crystal", "genre": "fantasy"}\n'
+        )
+        outfile = io.StringIO()
+        counts = run_batch(infile, outfile)
+
+        lines = [json.loads(l) for l in outfile.getvalue().splitlines()]
+        assert counts == {"total": 3, "ok": 2, "errors": 1}
+        assert [l["line"] for l in lines] == [1, 2, 3]
+        assert "error" in lines[1]
+
+    @patch("src.batch.AI_PACK_WINDOW", 2)
+    @patch("src.batch.generate_stories")
+    def test_pack_generates_ai_jobs_per_window_in_order(self, mock_generate):
+        mock_generate.side_effect = lambda requests, **kwargs: [f"AI tale {kw[0]}." for kw, _ in requests]
+        infile = io.StringIO(
+            '{"keywords": "knight, forest, sword", "mode": "ai"}\n'
+            '{"keywords": "wizard, tower, crystal"}\n'
+            '{"keywords": "pirate, harbor, map", "mode": "ai"}\n'
+        )
+        outfile = io.StringIO()
+        counts = run_batch(infile, outfile, pack=True)
+
+        lines = [json.loads(l) for l in outfile.getvalue().splitlines()]
+        assert counts == {"total": 3, "ok": 3, "errors": 0}
+        assert [l["line"] for l in lines] == [1, 2, 3]
+        assert lines[0]["story"] == "AI tale knight."
+        assert "wizard" in lines[1]["story"] and "seed" in lines[1]
+        assert lines[2]["story"] == "AI tale pirate."
+        assert mock_generate.call_count == 2
+        mock_generate.assert_called_with([(["pirate", "harbor", "map"], None)], mode="ai", packed=True)
+
+    def test_batch_main_writes_file(self, tmp_path):
+        jobs = tmp_path / "jobs.jsonl"
+        out = tmp_path / "out.jsonl"
+        jobs.write_text('{"keywords": "knight, forest, sword"}\n', encoding="utf-8")
+
+        exit_code = batch_main([str(jobs), "-o", str(out)])
+
+        assert exit_code == 0
+        result = json.loads(out.read_text(encoding="utf-8"))
+        assert "knight" in result["story"]
+
+    def test_batch_main_writes_gzip_with_workers(self, tmp_path):
+        jobs = tmp_path / "jobs.jsonl"
+        out = tmp_path / "out.jsonl.gz"
+        jobs.write_text("".join(f'{{"keywords": "knight, forest, sword", "id": {i}}}\n' for i in range(20)), encoding="utf-8")
+
+        exit_code = batch_main([str(jobs), "-o", str(out), "--workers", "3"])
+
+        assert exit_code == 0
+        with gzip.open(out, "rt", encoding="utf-8") as f:
+            assert [json.loads(line)["id"] for line in f] == list(range(20))
+
+    def test_batch_main_reports_ai_tokens(self, tmp_path, capsys):
+        jobs = tmp_path / "jobs.jsonl"
+        jobs.write_text('{"keywords": "knight, forest, sword"}\n', encoding="utf-8")
+        reset_metrics()
+        inc("ai_input_tokens_total", 50)
+        inc("ai_cache_read_input_tokens_total", 30)
+        inc("ai_output_tokens_total", 20)
+        try:
+            batch_main([str(jobs), "-o", str(tmp_path / "out.jsonl")])
+        finally:
+            reset_metrics()
+
+        assert "AI tokens: 50 input, 30 read from prompt cache, 20 output." in capsys.readouterr().err
@@ -0,0 +1,104 @@
+"""Tests for circuit_breaker module."""
+
+import pytest
+
+from src.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from src.metrics import get_counter, reset_metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(window=10, min_calls=4, failure_rate=0.5, slow_call=5.0, open_seconds=30.0, probes=2, clock=clock)
+
+
+def _fail(breaker, n):
+    for _ in range(n):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker state transitions."""
+
+    def test_starts_closed_and_allows(self, breaker):
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+    def test_needs_min_calls_before_opening(self, breaker):
+        _fail(breaker, 3)
+        assert breaker.state == CLOSED
+
+    def test_opens_at_failure_rate(self, breaker):
+        for _ in range(2):
+            breaker.allow()
+            breaker.record_success(0.1)
+        _fail(breaker, 2)
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    def test_slow_success_counts_as_failure(self, breaker):
+        for _ in range(4):
+            breaker.allow()
+            breaker.record_success(6.0)
+        assert breaker.is_open()
+
+    def test_half_open_after_cool_down_limits_probes(self, breaker, clock):
+        _fail(breaker, 4)
+        clock.now = 30.0
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+        assert breaker.allow()
+        assert not breaker.allow()
+
+    def test_successful_probes_close(self, breaker, clock):
+        _fail(breaker, 4)
+        clock.now = 30.0
+        for _ in range(2):
+            assert breaker.allow()
+            breaker.record_success(0.1)
+        assert breaker.state == CLOSED
+        assert breaker.snapshot()["window_calls"] == 0
+
+    def test_failed_probe_reopens(self, breaker, clock):
+        _fail(breaker, 4)
+        clock.now = 30.0
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        clock.now = 59.0
+        assert not breaker.allow()
+
+    def test_release_frees_probe_slot(self, breaker, clock):
+        _fail(breaker, 4)
+        clock.now = 30.0
+        breaker.allow()
+        breaker.allow()
+        breaker.release()
+        assert breaker.allow()
+
+    def test_snapshot_and_transition_counter(self, breaker, clock):
+        reset_metrics()
+        _fail(breaker, 4)
+        assert not breaker.allow()
+        clock.now = 10.0
+        snap = breaker.snapshot()
+        assert snap["state"] == OPEN
+        assert snap["opened"] == 1
+        assert snap["rejected"] == 1
+        assert snap["failure_rate"] == 1.0
+        assert snap["retry_in"] == 20.0
+        assert get_counter("ai_circuit_transitions_total", state=OPEN) == 1
+        reset_metrics()
@@ -0,0 +1,54 @@
+"""Tests for config module."""
+
+import os
+from unittest.mock import patch
+
+from src.config import load_env
+
+
+class TestLoadEnv:
+    """Test cases for load_env()."""
+
+    def test_parses_env_file(self, tmp_path):
+        env = tmp_path / ".env"
+        env.write_text(
+            "# comment\n"
+            "\n"
+            "STORY_METRICS=0\n"
+            "export STORY_LENGTH = long  # inline comment\n"
+            "STORY_TEMPLATE_DIR=\"/tmp/my templates\"\n"
+            "AI_CACHE_PATH='a #b'\n"
+            "ANTHROPIC_API_KEY=\"sk-test\" # prod\n"
+            "EXPANDED=${STORY_METRICS}/cache\n",
+            encoding="utf-8",
+        )
+        with patch.dict(os.environ, {}, clear=True):
+            load_env(str(env))
+            assert os.environ == {
+                "STORY_METRICS": "0",
+                "STORY_LENGTH": "long",
+                "STORY_TEMPLATE_DIR": "/tmp/my templates",
+                "AI_CACHE_PATH": "a #b",
+                "ANTHROPIC_API_KEY": "sk-test",
+                "EXPANDED": "0/cache",
+            }
+
+    def test_environment_wins(self, tmp_path):
+        env = tmp_path / ".env"
+        env.write_text("STORY_METRICS=0\n", encoding="utf-8")
+        with patch.dict(os.environ, {"STORY_METRICS": "1"}):
+            load_env(str(env))
+            assert os.environ["STORY_METRICS"] == "1"
+
+    def test_settings_read_from_env_file_at_import(self, tmp_path):
+        (tmp_path / ".env").write_text("STORY_METRICS=0\nSTORY_LENGTH=short\n", encoding="utf-8")
+        package = tmp_path / "src"
+        package.mkdir()
+        source = os.path.join(os.path.dirname(__file__), "..", "src", "config.py")
+        (package / "config.py").write_text(open(source, encoding="utf-8").read(), encoding="utf-8")
+        namespace = {"__file__": str(package / "config.py"), "__name__": "config_copy"}
+        env = {k: v for k, v in os.environ.items() if k not in ("STORY_METRICS", "STORY_LENGTH")}
+        with patch.dict(os.environ, env, clear=True):
+            exec(compile((package / "config.py").read_text(encoding="utf-8"), "config.py", "exec"), namespace)
+        assert namespace["METRICS_ENABLED"] is False
+        assert namespace["STORY_LENGTH"] == "short"
@@ -0,0 +1,69 @@
+"""Tests for fake_anthropic module."""
+
+import random
+
+import anthropic
+import pytest
+
+from src.fake_anthropic import FakeAnthropicServer, parse_latency
+
+
+def _create(client: anthropic.Anthropic, character: str = "knight"):
+    return client.messages.create(
+        model="fake",
+        max_tokens=100,
+        messages=[{"role": "user", "content": f"- Character: {character}\n- Setting: forest"}],
+    )
+
+
+class TestParseLatency:
+    """Test cases for parse_latency()."""
+
+    def test_fixed(self):
+        assert parse_latency("0.25")(random.Random(0)) == 0.25
+
+    @pytest.mark.parametrize("spec", ["uniform:0.1,0.2", "normal:0.15,0.01", "lognormal:0.15,0.1", "exp:0.15"])
+    def test_distributions_are_seeded_and_non_negative(self, spec):
+        draws = [parse_latency(spec)(random.Random(7)) for _ in range(2)]
+        assert draws[0] == draws[1] >= 0
+
+    @pytest.mark.parametrize("spec", ["fast", "uniform:1", "exp:0", "gamma:1,2"])
+    def test_invalid_spec_raises(self, spec):
+        with pytest.raises(ValueError):
+            parse_latency(spec)
+
+
+class TestFakeAnthropicServer:
+    """Test cases for error injection and usage reporting."""
+
+    def test_error_rates_are_deterministic_per_seed(self):
+        def statuses(seed):
+            with FakeAnthropicServer(error_rates={429: 0.3, 500: 0.2}, seed=seed) as server:
+                return [server._next_status() for _ in range(200)]
+
+        first = statuses(3)
+        assert first == statuses(3)
+        assert 30 < first.count(429) < 90 and 15 < first.count(500) < 65
+
+    def test_injected_errors_are_typed_and_counted(self):
+        with FakeAnthropicServer(error_rates={529: 1.0}) as server:
+            client = anthropic.Anthropic(api_key="test", base_url=server.url, max_retries=0)
+            with pytest.raises(anthropic.APIStatusError) as info:
+                _create(client)
+        assert info.value.status_code == 529
+        assert server.status_counts == {529: 1}
+        assert server.request_count == 1
+
+    def test_configured_usage(self):
+        with FakeAnthropicServer(input_tokens=7, output_tokens=3) as server:
+            client = anthropic.Anthropic(api_key="test", base_url=server.url, max_retries=0)
+            message = _create(client)
+        assert (message.usage.input_tokens, message.usage.output_tokens) == (7, 3)
+
+    def test_output_tokens_estimated_from_story(self):
+        with FakeAnthropicServer(output_tokens=None, record_requests=False) as server:
+            client = anthropic.Anthropic(api_key="test", base_url=server.url, max_retries=0)
+            message = _create(client, "wizard")
+        assert message.content[0].text == "A fake story about a wizard."
+        assert message.usage.output_tokens == round(6 * 1.35)
+        assert server.requests == [] and server.request_count == 1
@@ -1,7 +1,18 @@
 """Tests for input_handler module."""
 
 import pytest
-from src.input_handler import validate_keywords, parse_keywords
+from src import input_handler
+from src.input_handler import (
+    ERR_DUPLICATE,
+    ERR_EMPTY,
+    ERR_TOO_FEW,
+    ERR_TOO_LONG,
+    ERR_UNSUPPORTED_CHARS,
+    parse_batch,
+    parse_keywords,
+    validate_batch,
+    validate_keywords,
+)
 
 
 class TestValidateKeywords:
@@ -78,3 +89,35 @@ class TestParseKeywords:
     def test_allows_hyphens(self):
         result, msg = validate_keywords(["half-elf", "dark-forest", "magic-sword"])
         assert result is True
+
+
+class TestBatchApi:
+    """Test cases for parse_batch() and validate_batch()."""
+
+    def test_parse_batch_matches_parse_keywords(self):
+        rows = ["knight, forest, sword", " a ,, b , c , d ", "", "solo"]
+        assert parse_batch(rows) == [parse_keywords(row) for row in rows]
+
+    def test_validate_batch_returns_codes_in_order(self):
+        rows = [
+            ["knight", "forest", "sword"],
+            [],
+            ["knight", "forest"],
+            ["knight", "forest", "knight"],
+            ["knight", "forest", "a" * 51],
+            ["knight", "forest", "sw@rd"],
+        ]
+        assert validate_batch(rows) == [
+            None, ERR_EMPTY, ERR_TOO_FEW, ERR_DUPLICATE, ERR_TOO_LONG, ERR_UNSUPPORTED_CHARS,
+        ]
+
+    def test_long_keyword_with_bad_chars_reports_length(self):
+        assert validate_batch([["knight", "forest", "@" * 51]]) == [ERR_TOO_LONG]
+
+    def test_duplicates_beyond_third_keyword_detected(self):
+        assert validate_batch([["a", "b", "c", "a"]]) == [ERR_DUPLICATE]
+
+    def test_valid_rows_are_cached(self):
+        input_handler._valid_rows.clear()
+        validate_batch([["knight", "forest", "sword"], ["knight", "forest", "knight"]])
+        assert input_handler._valid_rows == {("knight", "forest", "sword")}
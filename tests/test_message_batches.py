@@ -0,0 +1,163 @@
+"""Tests for message_batches module. Uses a local stand-in for the batches endpoints."""
+
+import io
+import json
+
+import anthropic
+import pytest
+
+from src.batch import run_batch_api
+from src.message_batches import MessageBatchJob, _input_hash
+from src.fake_anthropic import FakeAnthropicServer
+
+
+class Interrupted(Exception):
+    """Simulates the process being stopped while polling."""
+
+
+def _job(server, tmp_path, **kwargs) -> MessageBatchJob:
+    client = anthropic.Anthropic(api_key="test-key", base_url=server.url, max_retries=0)
+    kwargs.setdefault("sleep", lambda seconds: None)
+    return MessageBatchJob(str(tmp_path / "checkpoint.json"), client=client, **kwargs)
+
+
+def _custom_id(requests, index: int) -> str:
+    return f"{_input_hash(requests)[:16]}-{index}"
+
+
+REQUESTS = [
+    (["knight", "forest", "sword"], None),
+    (["wizard", "tower", "crystal"], "fantasy"),
+    (["pirate", "island", "map"], "adventure"),
+]
+
+
+class TestMessageBatchJob:
+    """Test cases for MessageBatchJob."""
+
+    def test_results_mapped_back_in_input_order(self, tmp_path):
+        with FakeAnthropicServer(batch_polls=3) as server:
+            outputs = _job(server, tmp_path).run(REQUESTS)
+
+        assert [o["story"] for o in outputs] == [
+            "A fake story about a knight.",
+            "A fake story about a wizard.",
+            "A fake story about a pirate.",
+        ]
+        assert not any(o["fallback"] for o in outputs)
+        assert len(server.batches) == 1
+
+    def test_failed_items_filled_from_template(self, tmp_path):
+        with FakeAnthropicServer(batch_errored_ids={_custom_id(REQUESTS, 1)}) as server:
+            outputs = _job(server, tmp_path).run(REQUESTS)
+
+        assert outputs[1]["fallback"] is True
+        assert "wizard" in outputs[1]["story"]
+        assert outputs[1]["story"] != "A fake story about a wizard."
+        assert outputs[0]["fallback"] is False
+
+    def test_invalid_request_never_submitted(self, tmp_path):
+        requests = [(["knight"], None)] + REQUESTS[:1]
+        with FakeAnthropicServer() as server:
+            outputs = _job(server, tmp_path).run(requests)
+
+        submitted = next(iter(server.batches.values()))["requests"]
+        assert [r["custom_id"] for r in submitted] == [_custom_id(requests, 1)]
+        assert outputs[0]["fallback"] is True
+
+    def test_large_jobs_split_into_batches(self, tmp_path):
+        with FakeAnthropicServer() as server:
+            outputs = _job(server, tmp_path, max_requests=2).run(REQUESTS)
+        assert len(server.batches) == 2
+        assert not any(o["fallback"] for o in outputs)
+
+    def test_resume_does_not_resubmit(self, tmp_path):
+        def interrupt(seconds):
+            raise Interrupted()
+
+        with FakeAnthropicServer(batch_polls=2) as server:
+            with pytest.raises(Interrupted):
+                _job(server, tmp_path, sleep=interrupt).run(REQUESTS)
+            assert len(server.batches) == 1
+
+            outputs = _job(server, tmp_path).run(REQUESTS)
+            assert len(server.batches) == 1
+            assert outputs[0]["story"] == "A fake story about a knight."
+
+            # A completed checkpoint answers without touching the API
+            batches_before = dict(server.batches)
+            again = _job(server, tmp_path).run(REQUESTS)
+            assert again == outputs
+            assert server.batches == batches_before
+
+    @pytest.mark.parametrize("created", [True, False])
+    def test_crash_around_create_does_not_double_submit(self, tmp_path, created):
+        with FakeAnthropicServer() as server:
+            job = _job(server, tmp_path)
+            real_create = job.client.messages.batches.create
+
+            def crash(**kwargs):
+                if created:
+                    real_create(**kwargs)
+                raise Interrupted()
+
+            job.client.messages.batches.create = crash
+            with pytest.raises(Interrupted):
+                job.run(REQUESTS)
+
+            outputs = _job(server, tmp_path).run(REQUESTS)
+        assert len(server.batches) == 1
+        assert not any(o["fallback"] for o in outputs)
+
+    # Positional ids (older runs) and another input's ids (same tool, same size)
+    @pytest.mark.parametrize("foreign_id", [lambda i: f"story-{i}", lambda i: _custom_id(REQUESTS[::-1], i)])
+    def test_recovery_skips_other_jobs_batch(self, tmp_path, foreign_id):
+        with FakeAnthropicServer() as server:
+            job = _job(server, tmp_path)
+
+            def crash(**kwargs):
+                raise Interrupted()
+
+            job.client.messages.batches.create = crash
+            with pytest.raises(Interrupted):
+                job.run(REQUESTS)
+            # Someone else's batch of the same size appears in the recovery window
+            anthropic.Anthropic(api_key="test-key", base_url=server.url).messages.batches.create(requests=[
+                {"custom_id": foreign_id(i), "params": {"model": "fake", "max_tokens": 10,
+                                                       "messages": [{"role": "user", "content": "- Character: x"}]}}
+                for i in range(3)
+            ])
+
+            outputs = _job(server, tmp_path).run(REQUESTS)
+        assert len(server.batches) == 2
+        assert [o["story"] for o in outputs] == [
+            "A fake story about a knight.",
+            "A fake story about a wizard.",
+            "A fake story about a pirate.",
+        ]
+
+    def test_checkpoint_for_other_input_rejected(self, tmp_path):
+        with FakeAnthropicServer() as server:
+            _job(server, tmp_path).run(REQUESTS)
+            with pytest.raises(ValueError):
+                _job(server, tmp_path).run(REQUESTS[:1])
+
+
+class TestRunBatchApi:
+    """Test cases for batch.run_batch_api()."""
+
+    def test_mixed_modes_written_in_order(self, tmp_path):
+        infile = io.StringIO(
+            '{"keywords": "knight, forest, sword", "mode": "ai"}\n'
+            '{"keywords": "wizard, tower, crystal"}\n'
+            '{"keywords": "bad"}\n'
+        )
+        outfile = io.StringIO()
+        with FakeAnthropicServer() as server:
+            counts = run_batch_api(infile, outfile, "unused", job_runner=_job(server, tmp_path))
+
+        lines = [json.loads(l) for l in outfile.getvalue().splitlines()]
+        assert counts == {"total": 3, "ok": 2, "errors": 1, "fallbacks": 0}
+        assert lines[0]["story"] == "A fake story about a knight."
+        assert "wizard" in lines[1]["story"] and "seed" in lines[1]
+        assert "error" in lines[2]
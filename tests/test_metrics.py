@@ -0,0 +1,111 @@
+"""Tests for metrics module."""
+
+import json
+
+import pytest
+
+from src.metrics import (
+    Histogram,
+    get_counter,
+    get_histogram,
+    inc,
+    render_prometheus,
+    reset_metrics,
+    set_enabled,
+    start_json_dump,
+    timed,
+)
+
+
+class TestHistogram:
+    """Test cases for Histogram."""
+
+    def test_observations_land_in_cumulative_buckets(self):
+        histogram = Histogram("test", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+        snap = histogram.snapshot()
+        assert snap["count"] == 4
+        assert snap["sum"] == pytest.approx(4.25)
+        assert snap["buckets"] == [(0.1, 1), (1.0, 3), (float("inf"), 4)]
+
+    def test_quantile_returns_bucket_bound(self):
+        histogram = Histogram("test", buckets=(0.1, 1.0))
+        for value in (0.05,) * 9 + (0.5,):
+            histogram.observe(value)
+        assert histogram.quantile(0.5) == 0.1
+        assert histogram.quantile(0.99) == 1.0
+
+    def test_empty_quantile_is_zero(self):
+        assert Histogram("test").quantile(0.5) == 0.0
+
+
+class TestRegistry:
+    """Test cases for get_histogram() and reset_metrics()."""
+
+    def test_same_name_same_histogram(self):
+        assert get_histogram("registry_test") is get_histogram("registry_test")
+
+    def test_reset_clears_observations(self):
+        get_histogram("registry_test").observe(1.0)
+        reset_metrics()
+        assert get_histogram("registry_test").snapshot()["count"] == 0
+
+
+@pytest.fixture
+def clean_metrics():
+    reset_metrics()
+    yield
+    set_enabled(True)
+    reset_metrics()
+
+
+class TestCounters:
+    """Test cases for inc() and get_counter()."""
+
+    def test_labels_are_separate_series(self, clean_metrics):
+        inc("fallbacks_test", cause="no_key")
+        inc("fallbacks_test", cause="no_key")
+        inc("fallbacks_test", 3, cause="status")
+        assert get_counter("fallbacks_test", cause="no_key") == 2
+        assert get_counter("fallbacks_test", cause="status") == 3
+        assert get_counter("fallbacks_test", cause="deadline") == 0
+
+
+class TestTimed:
+    """Test cases for timed()."""
+
+    def test_records_block_duration(self, clean_metrics):
+        with timed("timed_test_seconds"):
+            pass
+        assert get_histogram("timed_test_seconds").snapshot()["count"] == 1
+
+    def test_disabled_records_nothing(self, clean_metrics):
+        set_enabled(False)
+        with timed("timed_test_seconds"):
+            pass
+        inc("disabled_test")
+        assert get_histogram("timed_test_seconds").snapshot()["count"] == 0
+        assert get_counter("disabled_test") == 0
+
+
+class TestExport:
+    """Test cases for render_prometheus() and dump_json()."""
+
+    def test_prometheus_text(self, clean_metrics):
+        inc("export_test_total", cause="status")
+        get_histogram("export_test_seconds", buckets=(0.1,)).observe(0.05)
+        text = render_prometheus()
+        assert "# TYPE story_export_test_total counter" in text
+        assert 'story_export_test_total{cause="status"} 1' in text
+        assert 'story_export_test_seconds_bucket{le="0.1"} 1' in text
+        assert 'story_export_test_seconds_bucket{le="+Inf"} 1' in text
+        assert "story_export_test_seconds_count 1" in text
+
+    def test_json_dump(self, clean_metrics, tmp_path):
+        inc("export_test_total")
+        path = tmp_path / "metrics.json"
+        stop = start_json_dump(str(path), interval=60)
+        stop()
+        data = json.loads(path.read_text())
+        assert {"name": "export_test_total", "labels": {}, "value": 1} in data["counters"]
@@ -0,0 +1,42 @@
+"""Tests for parallel module."""
+
+import pytest
+
+from src.parallel import chunk_seed, generate_template_parallel
+
+
+def _keywords(count: int) -> list[list[str]]:
+    return [[f"hero{i}", "forest", "sword"] for i in range(count)]
+
+
+class TestGenerateTemplateParallel:
+    """Test cases for generate_template_parallel()."""
+
+    def test_preserves_input_order(self):
+        stories = list(generate_template_parallel(_keywords(50), workers=2, chunk_size=7, seed=1))
+        assert len(stories) == 50
+        for i, story in enumerate(stories):
+            assert f"hero{i} " in story or f"hero{i}'" in story
+
+    def test_same_seed_is_reproducible_across_worker_counts(self):
+        single = list(generate_template_parallel(_keywords(40), workers=1, chunk_size=8, seed=5))
+        multi = list(generate_template_parallel(_keywords(40), workers=3, chunk_size=8, seed=5))
+        assert single == multi
+
+    def test_different_seeds_differ(self):
+        first = list(generate_template_parallel(_keywords(40), workers=1, seed=1))
+        second = list(generate_template_parallel(_keywords(40), workers=1, seed=2))
+        assert first != second
+
+    def test_accepts_generator_input(self):
+        stream = ([f"hero{i}", "forest", "sword"] for i in range(10))
+        stories = list(generate_template_parallel(stream, genre="comedy", workers=2, chunk_size=3, seed=0))
+        assert len(stories) == 10
+
+    def test_empty_input(self):
+        assert list(generate_template_parallel([], workers=2, seed=0)) == []
+
+
+def test_chunk_seeds_are_distinct():
+    seeds = {chunk_seed(42, i) for i in range(1000)}
+    assert len(seeds) == 1000
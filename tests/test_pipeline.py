@@ -0,0 +1,123 @@
+"""Tests for pipeline module."""
+
+import gzip
+import io
+import json
+import threading
+import time
+
+import pytest
+from unittest.mock import patch
+
+from src import pipeline
+from src.pipeline import GzipJsonlSink, JsonlSink, Sink, open_sink, run_pipeline
+
+
+def _jobs(n: int) -> list[str]:
+    return [json.dumps({"keywords": "knight, forest, sword", "id": i}) for i in range(n)]
+
+
+class ListSink:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super().write(data)
+
+
+class TestSink:
+    """Test cases for the output sinks."""
+
+    def test_batches_small_records_into_few_writes(self):
+        stream = CountingStream()
+        sink = Sink(stream, buffer_size=1024, owns_stream=False)
+        for i in range(200):
+            sink.write({"id": i})
+        sink.close()
+        lines = stream.getvalue().decode().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == list(range(200))
+        assert stream.writes < 10
+        assert not stream.closed
+
+    def test_gzip_round_trip(self, tmp_path):
+        path = tmp_path / "out.jsonl.gz"
+        with GzipJsonlSink(str(path)) as sink:
+            sink.write({"story": "Ünïcode"})
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert json.loads(f.read()) == {"story": "Ünïcode"}
+
+    def test_open_sink_picks_by_path(self, tmp_path):
+        with open_sink(str(tmp_path / "a.jsonl")) as sink:
+            assert type(sink) is JsonlSink
+        with open_sink(str(tmp_path / "a.jsonl.gz")) as sink:
+            assert type(sink) is GzipJsonlSink
+
+
+class TestRunPipeline:
+    """Test cases for run_pipeline()."""
+
+    def test_results_in_input_order_with_workers(self):
+        delays = iter([0.02, 0.0] * 20)
+        lock = threading.Lock()
+        real = pipeline.generate_job
+
+        def uneven(result):
+            with lock:
+                delay = next(delays)
+            time.sleep(delay)
+            return real(result)
+
+        sink = ListSink()
+        with patch.object(pipeline, "generate_job", side_effect=uneven):
+            counts = run_pipeline(_jobs(40), sink, workers=4, queue_size=4)
+        assert counts == {"total": 40, "ok": 40, "errors": 0}
+        assert [r["id"] for r in sink.records] == list(range(40))
+        assert all("story" in r for r in sink.records)
+
+    def test_invalid_lines_become_error_records(self):
+        sink = ListSink()
+        counts = run_pipeline(["not json", "", '{"keywords": "a, a, b"}', _jobs(1)[0]], sink)
+        assert counts == {"total": 3, "ok": 1, "errors": 2}
+        assert [r["line"] for r in sink.records] == [1, 3, 4]
+
+    def test_slow_sink_bounds_read_ahead(self):
+        read = []
+
+        def lines():
+            for i, line in enumerate(_jobs(100)):
+                read.append(i)
+                yield line
+
+        class SlowSink(ListSink):
+            def write(self, record):
+                # Reading may not run further ahead than the queues allow
+                assert len(read) - len(self.records) <= 2 + 2 + 1
+                time.sleep(0.002)
+                super().write(record)
+
+        sink = SlowSink()
+        counts = run_pipeline(lines(), sink, workers=2, queue_size=2)
+        assert counts["total"] == 100
+
+    def test_sink_error_stops_pipeline(self):
+        class BrokenSink:
+            def write(self, record):
+                raise OSError("disk full")
+
+        with pytest.raises(OSError, match="disk full"):
+            run_pipeline(_jobs(50), BrokenSink(), workers=2, queue_size=2)
+
+    def test_stage_error_propagates(self):
+        with patch.object(pipeline, "generate_job", side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError, match="boom"):
+                run_pipeline(_jobs(50), ListSink(), workers=2, queue_size=2)
@@ -0,0 +1,189 @@
+"""Tests for rate_limiter module. Uses a fake clock and a local fake server."""
+
+import asyncio
+
+import anthropic
+import pytest
+from unittest.mock import patch
+
+from src.ai_client import reset_client
+from src.ai_generator import generate_ai_story
+from src.rate_limiter import (
+    DeadlineExceeded,
+    RequestScheduler,
+    TokenBucket,
+    estimate_tokens,
+    set_scheduler,
+)
+from src.fake_anthropic import FakeAnthropicServer
+
+
+class FakeClock:
+    """Manual clock; sleep() advances time and records each delay."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _scheduler(clock: FakeClock, **kwargs) -> RequestScheduler:
+    options = dict(
+        requests_per_minute=600,
+        tokens_per_minute=100000,
+        max_retries=3,
+        base_delay=1.0,
+        deadline=30.0,
+        clock=clock,
+        sleep=clock.sleep,
+        rand=lambda: 1.0,
+    )
+    options.update(kwargs)
+    return RequestScheduler(**options)
+
+
+def _client(server: FakeAnthropicServer) -> anthropic.Anthropic:
+    return anthropic.Anthropic(api_key="test-key", base_url=server.url, max_retries=0)
+
+
+def _create(client: anthropic.Anthropic):
+    return client.messages.create(
+        model="fake",
+        max_tokens=10,
+        messages=[{"role": "user", "content": "- Character: knight\n"}],
+    )
+
+
+class TestTokenBucket:
+    """Test cases for TokenBucket."""
+
+    def test_burst_up_to_capacity_then_waits(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=2, clock=clock)  # 1 token/second
+        assert bucket.reserve(1) == 0
+        assert bucket.reserve(1) == 0
+        assert bucket.reserve(1) == pytest.approx(1.0)
+        assert bucket.reserve(1) == pytest.approx(2.0)
+
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=1, clock=clock)
+        bucket.reserve(1)
+        clock.now += 1.0
+        assert bucket.reserve(1) == 0
+
+    def test_max_wait_rejects_without_reserving(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=1, clock=clock)
+        bucket.reserve(1)
+        assert bucket.reserve(1, max_wait=0.5) is None
+        clock.now += 1.0
+        assert bucket.reserve(1) == 0
+
+
+class TestRequestScheduler:
+    """Test cases for RequestScheduler against a fake server."""
+
+    def test_honors_retry_after_header(self):
+        clock = FakeClock()
+        scheduler = _scheduler(clock)
+        with FakeAnthropicServer(statuses=[429, 429], retry_after="2") as server:
+            message = scheduler.call(lambda: _create(_client(server)))
+
+        assert message.content[0].text == "A fake story about a knight."
+        assert clock.sleeps == [0, 2.0, 0, 2.0, 0]
+        assert scheduler.stats()["rate_limited"] == 2
+        assert scheduler.stats()["retries"] == 2
+
+    def test_backoff_doubles_without_retry_after(self):
+        clock = FakeClock()
+        scheduler = _scheduler(clock)
+        with FakeAnthropicServer(statuses=[503, 503]) as server:
+            scheduler.call(lambda: _create(_client(server)))
+        assert [s for s in clock.sleeps if s] == [1.0, 2.0]
+
+    def test_gives_up_after_max_retries(self):
+        clock = FakeClock()
+        scheduler = _scheduler(clock, max_retries=1)
+        with FakeAnthropicServer(statuses=[429, 429, 429]) as server:
+            with pytest.raises(anthropic.RateLimitError):
+                scheduler.call(lambda: _create(_client(server)))
+            assert len(server.requests) == 2
+
+    def test_non_retryable_error_raised_immediately(self):
+        clock = FakeClock()
+        scheduler = _scheduler(clock)
+        with FakeAnthropicServer(statuses=[400]) as server:
+            with pytest.raises(anthropic.BadRequestError):
+                scheduler.call(lambda: _create(_client(server)))
+            assert len(server.requests) == 1
+
+    def test_retry_after_past_deadline_drops_request(self):
+        clock = FakeClock()
+        scheduler = _scheduler(clock, deadline=5.0)
+        with FakeAnthropicServer(statuses=[429], retry_after="60") as server:
+            with pytest.raises(DeadlineExceeded):
+                scheduler.call(lambda: _create(_client(server)))
+        assert scheduler.stats()["dropped"] == 1
+
+    def test_rate_limit_smooths_bursts(self):
+        clock = FakeClock()
+        scheduler = _scheduler(clock, requests_per_minute=60)
+        scheduler.request_bucket.capacity = 1
+        scheduler.request_bucket._tokens = 1
+        for _ in range(3):
+            scheduler.call(lambda: "ok")
+        assert clock.sleeps == [0, pytest.approx(1.0), pytest.approx(1.0)]
+
+    def test_queue_wait_past_deadline_drops_request(self):
+        clock = FakeClock()
+        scheduler = _scheduler(clock, tokens_per_minute=60, deadline=5.0)
+        scheduler.call(lambda: "ok", tokens=60)
+        with pytest.raises(DeadlineExceeded):
+            scheduler.call(lambda: "ok", tokens=60)
+
+    def test_call_async_retries(self):
+        clock = FakeClock()
+        scheduler = _scheduler(clock)
+
+        async def run():
+            client = anthropic.AsyncAnthropic(api_key="test-key", base_url=server.url, max_retries=0)
+            async with client:
+                return await scheduler.call_async(lambda: client.messages.create(
+                    model="fake",
+                    max_tokens=10,
+                    messages=[{"role": "user", "content": "- Character: knight\n"}],
+                ))
+
+        with FakeAnthropicServer(statuses=[429], retry_after="0") as server:
+            message = asyncio.run(run())
+        assert message.content[0].text == "A fake story about a knight."
+        assert scheduler.stats()["retries"] == 1
+
+
+class TestGenerateAiStoryScheduling:
+    """generate_ai_story() retries rate limits instead of failing over."""
+
+    def test_recovers_from_429(self):
+        clock = FakeClock()
+        set_scheduler(_scheduler(clock))
+        reset_client()
+        try:
+            with FakeAnthropicServer(statuses=[429], retry_after="1") as server, \
+                    patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                    patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+                story = generate_ai_story(["knight", "forest", "sword"])
+        finally:
+            set_scheduler(None)
+            reset_client()
+        assert story == "A fake story about a knight."
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("x" * 400, 500) == 600
@@ -0,0 +1,177 @@
+"""Tests for server module. Runs the service on a free local port."""
+
+import asyncio
+import json
+
+import anthropic
+import pytest
+from unittest.mock import patch
+
+from src.ai_client import get_connection_stats, reset_client
+from src.server import StoryService, start_server
+from src.fake_anthropic import FakeAnthropicServer
+
+
+async def _request(port: int, method: str, path: str, payload=None) -> tuple[int, dict]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, data = raw.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    return status, json.loads(data)
+
+
+def _run(scenario, **service_kwargs):
+    """Starts a service, runs scenario(port, service) and shuts everything down."""
+    async def main():
+        service = StoryService(**service_kwargs)
+        server = await start_server(service, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(port, service)
+        finally:
+            server.close()
+            await server.wait_closed()
+            await service.aclose()
+
+    return asyncio.run(main())
+
+
+class TestStoryEndpoints:
+    """Test cases for /story, /stories, /stats and /health."""
+
+    def test_post_story_template(self):
+        async def scenario(port, service):
+            return await _request(port, "POST", "/story", {"keywords": ["knight", "forest", "sword"], "seed": 3})
+
+        status, result = _run(scenario)
+        assert status == 200
+        assert "knight" in result["story"]
+        assert result["seed"] == 3
+
+    def test_post_story_invalid_keywords(self):
+        async def scenario(port, service):
+            return await _request(port, "POST", "/story", {"keywords": ["knight"]})
+
+        status, result = _run(scenario)
+        assert status == 400
+        assert "three" in result["error"]
+
+    def test_post_stories_batch_keeps_order(self):
+        jobs = [{"keywords": [f"hero{i}", "forest", "sword"]} for i in range(5)]
+
+        async def scenario(port, service):
+            return await _request(port, "POST", "/stories", {"jobs": jobs})
+
+        status, result = _run(scenario)
+        assert status == 200
+        assert [r["keywords"][0] for r in result["results"]] == [f"hero{i}" for i in range(5)]
+
+    def test_invalid_json_and_unknown_route(self):
+        async def scenario(port, service):
+            bad = await _request(port, "POST", "/story", None)
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /story HTTP/1.1\r\nContent-Length: 3\r\n\r\n{x}")
+            await writer.drain()
+            raw = await reader.read()
+            writer.close()
+            missing = await _request(port, "GET", "/nope")
+            return bad, raw, missing
+
+        bad, raw, missing = _run(scenario)
+        assert bad[0] == 400
+        assert raw.startswith(b"HTTP/1.1 400")
+        assert missing[0] == 404
+
+    def test_health_and_stats(self):
+        async def scenario(port, service):
+            await _request(port, "POST", "/story", {"keywords": "knight, forest, sword"})
+            return await _request(port, "GET", "/health"), await _request(port, "GET", "/stats")
+
+        health, stats = _run(scenario)
+        assert health == (200, {"status": "ok"})
+        assert stats[1]["stories"] == 1
+        assert stats[1]["ai_circuit"]["state"] == "closed"
+
+    def test_metrics_endpoint_is_prometheus_text(self):
+        async def scenario(port, service):
+            await _request(port, "POST", "/story", {"keywords": "knight, forest, sword"})
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            raw = await reader.read()
+            writer.close()
+            return raw
+
+        head, _, text = _run(scenario).partition(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.1 200")
+        assert b"Content-Type: text/plain" in head
+        assert b'story_http_requests_total{path="/story"}' in text
+        assert b"story_template_render_seconds_count" in text
+
+    def test_process_pool_template_work(self):
+        async def scenario(port, service):
+            return await _request(port, "POST", "/story", {"keywords": "knight, forest, sword"})
+
+        status, result = _run(scenario, use_processes=True, template_workers=2)
+        assert status == 200 and "knight" in result["story"]
+
+
+class TestAiMode:
+    """AI requests share one client and coalesce identical in-flight calls."""
+
+    def test_identical_concurrent_requests_coalesce(self):
+        job = {"keywords": ["knight", "forest", "sword"], "mode": "ai"}
+
+        async def main():
+            client = anthropic.AsyncAnthropic(api_key="test-key", base_url=fake.url, max_retries=0)
+            service = StoryService(ai_client=client)
+            server = await start_server(service, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                responses = await asyncio.gather(*(_request(port, "POST", "/story", job) for _ in range(5)))
+            finally:
+                server.close()
+                await server.wait_closed()
+                await service.aclose()
+                await client.close()
+            return responses, dict(service.stats)
+
+        with FakeAnthropicServer(delay=0.3) as fake:
+            responses, stats = asyncio.run(main())
+
+        assert all(r[1]["story"] == "A fake story about a knight." for r in responses)
+        assert len(fake.requests) == 1
+        assert stats["ai_upstream"] == 1 and stats["ai_coalesced"] == 4
+
+    @patch("src.ai_generator.ANTHROPIC_API_KEY", "")
+    def test_ai_without_key_falls_back_to_template(self):
+        async def scenario(port, service):
+            return await _request(port, "POST", "/story", {"keywords": "knight, forest, sword", "mode": "ai"})
+
+        status, result = _run(scenario)
+        assert status == 200
+        assert result["fallback"] is True
+        assert "knight" in result["story"]
+
+
+    def test_own_client_uses_pooled_settings(self):
+        async def scenario(port, service):
+            for _ in range(3):
+                await _request(port, "POST", "/story", {"keywords": "knight, forest, sword", "mode": "ai"})
+
+        reset_client()
+        with FakeAnthropicServer() as fake, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": fake.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            _run(scenario)
+        stats = get_connection_stats()
+        reset_client()
+        assert stats["clients_created"] == 1
+        assert stats["requests"] == 3 and stats["connections_opened"] == 1
@@ -0,0 +1,121 @@
+"""Tests for story_cache module."""
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from src.ai_client import reset_client
+from src.ai_generator import generate_ai_story
+from src.story_cache import StoryCache, cache_key, get_cache_stats, set_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    store = StoryCache(str(tmp_path / "cache.db"), max_entries=100)
+    yield store
+    store.close()
+
+
+class TestCacheKey:
+    """Test cases for cache_key()."""
+
+    def test_same_inputs_same_key(self):
+        assert cache_key("p", "m", 500) == cache_key("p", "m", 500)
+
+    def test_model_and_max_tokens_change_key(self):
+        base = cache_key("p", "m", 500)
+        assert cache_key("p", "other", 500) != base
+        assert cache_key("p", "m", 100) != base
+
+
+class TestStoryCache:
+    """Test cases for StoryCache."""
+
+    def test_miss_then_hit(self, cache):
+        assert cache.get("k") is None
+        cache.put("k", "A story.")
+        assert cache.get("k") == "A story."
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        first = StoryCache(path)
+        first.put("k", "A story.")
+        first.close()
+        second = StoryCache(path)
+        assert second.get("k") == "A story."
+        second.close()
+
+    def test_lru_eviction_respects_size_cap(self, tmp_path):
+        store = StoryCache(str(tmp_path / "lru.db"), max_entries=2)
+        with patch("src.story_cache.time.time", side_effect=[1, 2, 3, 4]):
+            store.put("a", "A")
+            store.put("b", "B")
+            store.get("a")  # a is now more recent than b
+            store.put("c", "C")
+        assert store.stats()["entries"] == 2
+        assert store.stats()["evictions"] == 1
+        assert store.get("b") is None
+        assert store.get("a") == "A"
+        store.close()
+
+    def test_ttl_expires_entries(self, tmp_path):
+        store = StoryCache(str(tmp_path / "ttl.db"), ttl=10)
+        with patch("src.story_cache.time.time", side_effect=[100, 200]):
+            store.put("k", "Old story.")
+            assert store.get("k") is None
+        assert store.stats()["expired"] == 1
+        store.close()
+
+    def test_variants_rotate(self, tmp_path):
+        store = StoryCache(str(tmp_path / "var.db"), variants=2)
+        store.put("k", "One.")
+        assert store.get("k") is None  # still collecting variants
+        store.put("k", "Two.")
+        assert {store.get("k"), store.get("k")} == {"One.", "Two."}
+        store.put("k", "Three.")  # replaces the oldest variant
+        assert "One." not in {store.get("k"), store.get("k")}
+        store.close()
+
+    def test_clear(self, cache):
+        cache.put("k", "A story.")
+        cache.clear()
+        assert cache.stats()["entries"] == 0
+
+
+class TestGenerateAiStoryCaching:
+    """generate_ai_story() consults the shared cache."""
+
+    @pytest.fixture(autouse=True)
+    def _shared(self, cache):
+        reset_client()
+        set_cache(cache)
+        yield
+        set_cache(None)
+        reset_client()
+
+    @patch("anthropic.Anthropic")
+    def test_repeat_request_served_from_cache(self, mock_anthropic_class):
+        mock_client = MagicMock()
+        mock_client.messages.create.return_value = MagicMock(content=[MagicMock(text="Cached tale.")])
+        mock_anthropic_class.return_value = mock_client
+
+        with patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            first = generate_ai_story(["knight", "forest", "sword"], "mystery")
+            second = generate_ai_story(["knight", "forest", "sword"], "mystery")
+
+        assert first == second == "Cached tale."
+        mock_client.messages.create.assert_called_once()
+        assert get_cache_stats()["hits"] == 1
+
+    @patch("anthropic.Anthropic")
+    def test_failures_are_not_cached(self, mock_anthropic_class):
+        mock_client = MagicMock()
+        mock_client.messages.create.side_effect = Exception("boom")
+        mock_anthropic_class.return_value = mock_client
+
+        with patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            assert generate_ai_story(["knight", "forest", "sword"]) is None
+
+        assert get_cache_stats()["entries"] == 0
@@ -3,7 +3,31 @@
 import pytest
 from unittest.mock import patch
 
-from src.story_generator import generate_story, generate_template_story
+import asyncio
+import random
+import subprocess
+import sys
+
+import anthropic
+
+from src.circuit_breaker import CircuitBreaker, set_breaker
+from src.config import AI_HEDGE_DEADLINE
+from src.story_generator import (
+    OBJECT_ADJECTIVES,
+    generate_stories,
+    generate_seeded_story,
+    generate_stories_async,
+    generate_story,
+    generate_template_story,
+    generate_template_stories,
+    stream_story,
+    STREAM_RESTART,
+    _format_template,
+)
+from src.ai_client import get_connection_stats, reset_client
+from src.ai_generator import StreamInterrupted
+from src.templates import templates, GENRES
+from src.fake_anthropic import FakeAnthropicServer
 
 
 class TestGenerateStory:
@@ -42,16 +66,214 @@ class TestGenerateStory:
         assert "knight" in story and "forest" in story
         assert isinstance(story, str)
 
-    @patch("src.story_generator.generate_ai_story")
+    @patch("src.ai_generator.generate_ai_story_hedged")
     def test_ai_mode_success_returns_ai_story(self, mock_ai_story):
         mock_ai_story.return_value = "An AI-generated tale of a knight."
         story = generate_story(["knight", "forest", "sword"], mode="ai")
         assert story == "An AI-generated tale of a knight."
+        mock_ai_story.assert_called_once_with(["knight", "forest", "sword"], None, AI_HEDGE_DEADLINE)
+
+    @patch("src.ai_generator.generate_ai_story")
+    def test_ai_mode_without_deadline_is_not_hedged(self, mock_ai_story):
+        mock_ai_story.return_value = "An AI-generated tale of a knight."
+        story = generate_story(["knight", "forest", "sword"], mode="ai", deadline=None)
+        assert story == "An AI-generated tale of a knight."
         mock_ai_story.assert_called_once_with(["knight", "forest", "sword"], None)
 
-    @patch("src.story_generator.generate_ai_story")
+    @patch("src.ai_generator.generate_ai_story_hedged")
     def test_ai_mode_fallback_returns_template_story(self, mock_ai_story):
         mock_ai_story.return_value = None
         story = generate_story(["knight", "forest", "sword"], mode="ai")
         assert "knight" in story and "forest" in story
         assert isinstance(story, str)
+
+    @patch("src.ai_generator.generate_ai_story_hedged")
+    def test_open_circuit_skips_ai_call(self, mock_ai_story):
+        breaker = CircuitBreaker(min_calls=1, open_seconds=60.0)
+        breaker.allow()
+        breaker.record_failure()
+        set_breaker(breaker)
+        try:
+            story = generate_story(["knight", "forest", "sword"], mode="ai")
+            chunks = list(stream_story(["knight", "forest", "sword"], mode="ai"))
+        finally:
+            set_breaker(None)
+        assert "knight" in story
+        assert len(chunks) == 1 and "knight" in chunks[0]
+        mock_ai_story.assert_not_called()
+
+
+class TestGenerateTemplateStories:
+    """Test cases for generate_template_stories()."""
+
+    def test_returns_n_stories_per_keyword_list_in_order(self):
+        batch = [["knight", "forest", "sword"], ["wizard", "tower", "crystal"]]
+        stories = generate_template_stories(batch, n=3, seed=1)
+        assert len(stories) == 6
+        assert all("knight" in s for s in stories[:3])
+        assert all("wizard" in s for s in stories[3:])
+
+    def test_same_seed_is_reproducible(self):
+        batch = [["knight", "forest", "sword"]] * 20
+        assert generate_template_stories(batch, seed=7) == generate_template_stories(batch, seed=7)
+
+    def test_fixed_genre(self):
+        stories = generate_template_stories([["knight", "forest", "sword"]], genre="comedy", n=10, seed=3)
+        openings = [t.split("{")[0] for t in templates["comedy"]["opening"]]
+        assert all(any(s.startswith(o) for o in openings) for s in stories)
+
+    def test_too_few_keywords_returns_error(self):
+        stories = generate_template_stories([["knight"]], seed=0)
+        assert "three" in stories[0].lower()
+
+    def test_distribution_matches_scalar_path(self):
+        """Genres and adjective rate are uniform / 50%, as in generate_template_story()."""
+        total = 6000
+        stories = generate_template_stories([["knight", "forest", "sword"]], n=total, seed=11)
+        plain_objects = ["sword"]
+        adjective_objects = [f"{adj} sword" for adj in OBJECT_ADJECTIVES]
+        opening_genre = {
+            tmpl.format(character="knight", place="forest", object=obj): genre
+            for genre in GENRES
+            for tmpl in templates[genre]["opening"]
+            for obj in plain_objects + adjective_objects
+        }
+        adjective_renderings = {
+            tmpl.format(character="knight", place="forest", object=obj)
+            for parts in templates.values()
+            for part_templates in parts.values()
+            for tmpl in part_templates
+            for obj in adjective_objects
+        }
+        counts = {genre: 0 for genre in GENRES}
+        adjective_paragraphs = 0
+        for story in stories:
+            paragraphs = story.split("\n\n")
+            counts[opening_genre[paragraphs[0]]] += 1
+            adjective_paragraphs += sum(p in adjective_renderings for p in paragraphs)
+
+        expected = total / len(GENRES)
+        assert all(abs(c - expected) < expected * 0.1 for c in counts.values())
+        assert abs(adjective_paragraphs / (3 * total) - 0.5) < 0.03
+
+
+class TestGenerateStoriesAsync:
+    """Test cases for generate_stories_async() and generate_stories()."""
+
+    def test_failed_ai_items_fall_back_to_template(self):
+        requests = [(["knight", "forest", "sword"], None), (["wizard", "tower", "crystal"], "fantasy")]
+
+        async def run():
+            client = anthropic.AsyncAnthropic(api_key="test-key", base_url=server.url, max_retries=0)
+            async with client:
+                return await generate_stories_async(requests, mode="ai", concurrency=1, client=client)
+
+        with FakeAnthropicServer(statuses=[400]) as server:
+            stories = asyncio.run(run())
+
+        assert "knight" in stories[0] and "forest" in stories[0]
+        assert stories[0] != "A fake story about a knight."
+        assert stories[1] == "A fake story about a wizard."
+
+    def test_template_mode_makes_no_api_calls(self):
+        with patch("src.ai_generator.generate_ai_stories_async") as mock_batch:
+            stories = generate_stories([(["knight", "forest", "sword"], None)], mode="template")
+        mock_batch.assert_not_called()
+        assert "knight" in stories[0]
+
+    def test_sync_batches_reuse_the_shared_client(self):
+        requests = [(["knight", "forest", "sword"], None), (["wizard", "tower", "crystal"], "fantasy")]
+        reset_client()
+        with FakeAnthropicServer() as server, \
+                patch.dict("os.environ", {"ANTHROPIC_BASE_URL": server.url}), \
+                patch("src.ai_generator.ANTHROPIC_API_KEY", "test-key"):
+            for _ in range(3):
+                stories = generate_stories(requests, mode="ai", concurrency=1, packed=True)
+        stats = get_connection_stats()
+        reset_client()
+        assert stories == ["A fake story about a knight.", "A fake story about a wizard."]
+        assert stats["clients_created"] == 1
+        assert stats["connections_opened"] == 1
+
+    @patch("src.ai_generator.ANTHROPIC_API_KEY", "")
+    def test_ai_mode_without_key_falls_back(self):
+        stories = generate_stories([(["knight", "forest", "sword"], None)], mode="ai")
+        assert "knight" in stories[0]
+
+
+class TestSeededGeneration:
+    """Test cases for rng/seed plumbing and generate_seeded_story()."""
+
+    def test_same_seed_same_story(self):
+        keywords = ["knight", "forest", "sword"]
+        stories = {generate_template_story(keywords, seed=123) for _ in range(5)}
+        assert len(stories) == 1
+
+    def test_different_seeds_vary(self):
+        keywords = ["knight", "forest", "sword"]
+        stories = {generate_template_story(keywords, seed=s) for s in range(50)}
+        assert len(stories) > 1
+
+    def test_rng_instance_is_used(self):
+        keywords = ["knight", "forest", "sword"]
+        assert generate_template_story(keywords, rng=random.Random(9)) == \
+            generate_template_story(keywords, seed=9)
+
+    def test_generate_story_passes_seed(self):
+        keywords = ["knight", "forest", "sword"]
+        assert generate_story(keywords, seed=4) == generate_template_story(keywords, seed=4)
+
+    def test_seeded_story_round_trip(self):
+        keywords = ["wizard", "tower", "crystal"]
+        story, seed = generate_seeded_story(keywords, genre="fantasy")
+        assert isinstance(seed, int)
+        assert generate_template_story(keywords, "fantasy", seed=seed) == story
+
+    def test_format_template_seed(self):
+        template = "A {character} in the {place} with a {object}."
+        first = _format_template(template, "knight", "forest", "sword", seed=1)
+        assert first == _format_template(template, "knight", "forest", "sword", seed=1)
+
+
+class TestStreamStory:
+    """Test cases for stream_story()."""
+
+    def test_template_mode_yields_one_story(self):
+        chunks = list(stream_story(["knight", "forest", "sword"]))
+        assert len(chunks) == 1 and "knight" in chunks[0]
+
+    @patch("src.ai_generator.stream_ai_story")
+    def test_ai_chunks_passed_through(self, mock_stream):
+        mock_stream.return_value = iter(["An AI ", "tale."])
+        assert list(stream_story(["knight", "forest", "sword"], mode="ai")) == ["An AI ", "tale."]
+
+    @patch("src.ai_generator.stream_ai_story")
+    def test_ai_unavailable_falls_back(self, mock_stream):
+        mock_stream.return_value = iter([])
+        chunks = list(stream_story(["knight", "forest", "sword"], mode="ai"))
+        assert len(chunks) == 1 and "knight" in chunks[0]
+
+    @patch("src.ai_generator.stream_ai_story")
+    def test_interrupted_stream_restarts_with_template(self, mock_stream):
+        def broken():
+            yield "An AI "
+            raise StreamInterrupted("connection reset")
+
+        mock_stream.return_value = broken()
+        chunks = list(stream_story(["knight", "forest", "sword"], mode="ai"))
+        assert chunks[0] == "An AI "
+        assert chunks[1] is STREAM_RESTART
+        assert "knight" in chunks[2]
+
+
+class TestLazyImports:
+    """Template-only entry points must not load the AI stack at import time."""
+
+    @pytest.mark.parametrize("module", ["src.main", "src.batch", "src.parallel"])
+    def test_ai_stack_not_imported(self, module):
+        code = (
+            f"import sys, {module}; "
+            "print(','.join(m for m in ('anthropic', 'dotenv') if m in sys.modules))"
+        )
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert proc.stdout.strip() == ""
@@ -0,0 +1,94 @@
+"""Tests for story_index module."""
+
+import itertools
+
+import pytest
+from unittest.mock import patch
+
+from src.story_generator import OBJECT_ADJECTIVES, generate_template_story
+from src.story_index import StoryIndex, generate_distinct_stories, get_index
+from src.templates import GENRES
+
+KEYWORDS = ["knight", "forest", "sword"]
+
+# 2 templates per section, each with the object bare or behind one adjective
+PER_GENRE = (2 * (1 + len(OBJECT_ADJECTIVES))) ** 3
+
+
+class TestStoryIndex:
+    """Test cases for StoryIndex."""
+
+    def test_size(self):
+        assert len(StoryIndex("fantasy")) == PER_GENRE
+        assert len(StoryIndex()) == PER_GENRE * len(GENRES)
+
+    def test_every_index_renders_a_distinct_story(self):
+        index = StoryIndex("mystery")
+        stories = {index.story(n, KEYWORDS) for n in range(len(index))}
+        assert len(stories) == len(index) == index.count_unique(KEYWORDS)
+
+    def test_covers_sampled_template_stories(self):
+        index = StoryIndex("comedy")
+        stories = {index.story(n, KEYWORDS) for n in range(len(index))}
+        for seed in range(50):
+            assert generate_template_story(KEYWORDS, "comedy", seed=seed) in stories
+
+    def test_encode_inverts_story(self):
+        index = StoryIndex()
+        for seed in range(30):
+            story = generate_template_story(KEYWORDS, seed=seed)
+            assert index.story(index.encode(story, KEYWORDS), KEYWORDS) == story
+        assert index.encode("An AI story.", KEYWORDS) is None
+
+    def test_decode_spans_genres(self):
+        index = StoryIndex()
+        assert [index.decode(g * PER_GENRE)[0] for g in range(len(GENRES))] == list(GENRES)
+
+    def test_out_of_range_raises(self):
+        index = StoryIndex("fantasy")
+        with pytest.raises(IndexError):
+            index.decode(len(index))
+        with pytest.raises(IndexError):
+            index.decode(-1)
+
+    def test_too_few_keywords(self):
+        index = StoryIndex("fantasy")
+        assert index.count_unique(["knight"]) == 0
+        assert index.story(0, ["knight"]) == "Please enter at least three keywords."
+        assert list(index.iter_shuffled(["knight"])) == []
+
+    def test_shuffled_enumeration_is_a_permutation(self):
+        index = StoryIndex("sci-fi")
+        shuffled = list(index.iter_shuffled(KEYWORDS, seed=1))
+        assert sorted(shuffled) == sorted(index.story(n, KEYWORDS) for n in range(len(index)))
+        assert shuffled != [index.story(n, KEYWORDS) for n in range(len(index))]
+
+    def test_shuffled_prefix_is_reproducible(self):
+        index = get_index("adventure")
+        first = list(itertools.islice(index.iter_shuffled(KEYWORDS, seed=7), 20))
+        again = list(itertools.islice(index.iter_shuffled(KEYWORDS, seed=7), 20))
+        assert first == again and len(set(first)) == 20
+
+    def test_shuffled_prefix_of_huge_index_is_cheap(self):
+        index = StoryIndex("sci-fi")
+        index._size = 10**15  # e.g. a template directory with hundreds of templates per section
+        with patch.object(index, "story", side_effect=lambda n, keywords: n):
+            picked = list(itertools.islice(index.iter_shuffled(KEYWORDS, seed=3), 1000))
+        assert len(set(picked)) == 1000
+        assert all(0 <= n < 10**15 for n in picked)
+
+
+class TestGenerateDistinctStories:
+    """Test cases for generate_distinct_stories()."""
+
+    def test_no_duplicates(self):
+        stories = generate_distinct_stories(KEYWORDS, 5000, seed=3)
+        assert len(set(stories)) == 5000
+
+    def test_seed_is_reproducible(self):
+        assert generate_distinct_stories(KEYWORDS, 10, "fantasy", seed=5) == \
+            generate_distinct_stories(KEYWORDS, 10, "fantasy", seed=5)
+
+    def test_too_many_raises(self):
+        with pytest.raises(ValueError):
+            generate_distinct_stories(KEYWORDS, PER_GENRE + 1, "fantasy")
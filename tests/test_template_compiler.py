@@ -0,0 +1,49 @@
+"""Tests for template_compiler module."""
+
+import pytest
+
+from src.templates import templates
+from src.template_compiler import (
+    COMPILED_TEMPLATES,
+    compile_template,
+    get_compiled,
+    render,
+)
+
+
+class TestCompileTemplate:
+    """Test cases for compile_template() and render()."""
+
+    def test_segments_split_literals_and_fields(self):
+        compiled = compile_template("A {character} in the {place}.")
+        assert compiled == (("A ", "character"), (" in the ", "place"), (".", None))
+
+    def test_render_matches_str_format(self):
+        values = {"character": "knight", "place": "forest", "object": "old sword"}
+        for genre, parts in templates.items():
+            for part_templates in parts.values():
+                for tmpl in part_templates:
+                    assert render(compile_template(tmpl), values) == tmpl.format(**values)
+
+    def test_escaped_braces_are_literal(self):
+        assert render(compile_template("{{x}} {place}"), {"place": "here"}) == "{x} here"
+
+    def test_format_spec_rejected(self):
+        with pytest.raises(ValueError):
+            compile_template("{place:>10}")
+
+
+class TestCompiledTemplates:
+    """Test cases for the import-time compiled cache."""
+
+    def test_every_template_precompiled(self):
+        for parts in templates.values():
+            for part_templates in parts.values():
+                for tmpl in part_templates:
+                    assert tmpl in COMPILED_TEMPLATES
+
+    def test_get_compiled_caches_new_template(self):
+        tmpl = "The {character} met a {object} at the {place}!"
+        compiled = get_compiled(tmpl)
+        assert get_compiled(tmpl) is compiled
+        COMPILED_TEMPLATES.pop(tmpl)
@@ -0,0 +1,154 @@
+"""Tests for template_store module. Each test loads templates from its own temp directory."""
+
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from src import template_store
+from src.story_generator import OBJECT_ADJECTIVES, generate_template_story
+from src.story_index import get_index
+from src.template_store import BUILTIN_ADJECTIVES, BUILTIN_TEMPLATES, TemplateStore
+from src.templates import GENRES, templates
+
+KEYWORDS = ["knight", "forest", "sword"]
+
+NOIR = {
+    "opening": ["Rain fell on the {place} when the {character} walked in."],
+    "middle": ["The {character} knew the {object} was trouble."],
+    "ending": ["The {place} kept its secrets, and the {character} kept the {object}."],
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TemplateStore(str(tmp_path), reload_interval=10, clock=FakeClock())
+    yield store
+    # Back to the built-in templates for the rest of the suite
+    TemplateStore("")._apply()
+
+
+def _write(path, data) -> None:
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def _touch(path, seconds: int) -> None:
+    """Moves a file's mtime forward so the change is visible at coarse mtime resolution."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+class TestTemplateStore:
+    """Test cases for TemplateStore."""
+
+    def test_new_genre_is_added(self, store, tmp_path):
+        _write(tmp_path / "noir.json", NOIR)
+        assert store.reload() is True
+        assert GENRES[-1] == "noir"
+        assert generate_template_story(KEYWORDS, "noir", seed=1).startswith("Rain fell on the forest")
+
+    def test_yaml_file(self, store, tmp_path):
+        (tmp_path / "western.yaml").write_text(
+            "opening: ['A {character} rode into the {place}.']\n"
+            "middle: ['The {object} glinted.']\n"
+            "ending: ['The {character} rode away.']\n",
+            encoding="utf-8",
+        )
+        store.reload()
+        assert "western" in GENRES
+
+    def test_unchanged_files_are_not_reparsed(self, store, tmp_path):
+        _write(tmp_path / "noir.json", NOIR)
+        _write(tmp_path / "western.json", {**NOIR, "genre": "western"})
+        store.reload()
+
+        _write(tmp_path / "noir.json", {**NOIR, "ending": ["The end of the {character}."]})
+        _touch(tmp_path / "noir.json", 1)
+        with patch("src.template_store._parse_file", wraps=template_store._parse_file) as parse:
+            assert store.reload() is True
+            assert store.reload() is False
+        assert [os.path.basename(c.args[0]) for c in parse.call_args_list] == ["noir.json"]
+        assert templates["noir"]["ending"] == ["The end of the {character}."]
+
+    def test_removed_file_restores_builtins(self, store, tmp_path):
+        _write(tmp_path / "noir.json", NOIR)
+        _write(tmp_path / "mystery.json", NOIR)
+        store.reload()
+        assert templates["mystery"] == NOIR
+
+        os.remove(tmp_path / "noir.json")
+        os.remove(tmp_path / "mystery.json")
+        assert store.reload() is True
+        assert "noir" not in GENRES and "noir" not in templates
+        assert templates["mystery"] == BUILTIN_TEMPLATES["mystery"]
+
+    def test_invalid_file_keeps_previous_content(self, store, tmp_path):
+        _write(tmp_path / "noir.json", NOIR)
+        store.reload()
+
+        _write(tmp_path / "noir.json", {**NOIR, "middle": ["The {villain} arrived."]})
+        _touch(tmp_path / "noir.json", 1)
+        _write(tmp_path / "broken.json", {"opening": []})
+        assert store.reload() is False
+        assert set(store.errors) == {str(tmp_path / "noir.json"), str(tmp_path / "broken.json")}
+        assert templates["noir"] == NOIR
+
+    def test_adjectives_file(self, store, tmp_path):
+        _write(tmp_path / "_adjectives.json", ["cursed"])
+        store.reload()
+        assert OBJECT_ADJECTIVES == ["cursed"]
+        TemplateStore("")._apply()
+        assert OBJECT_ADJECTIVES == BUILTIN_ADJECTIVES
+
+    def test_maybe_reload_waits_for_interval_or_request(self, store, tmp_path):
+        store.maybe_reload()
+        _write(tmp_path / "noir.json", NOIR)
+        assert store.maybe_reload() is False
+
+        store.request_reload()
+        assert store.maybe_reload() is True
+
+        _write(tmp_path / "western.json", {**NOIR, "genre": "western"})
+        store._clock.now += 11
+        assert store.maybe_reload() is True
+        assert "western" in GENRES
+
+    def test_story_index_rebuilt_after_reload(self, store, tmp_path):
+        before = len(get_index())
+        _write(tmp_path / "noir.json", NOIR)
+        store.reload()
+        # The noir opening has no {object}, so only middle and ending vary by adjective
+        assert len(get_index()) == before + (1 + len(OBJECT_ADJECTIVES)) ** 2
+
+    def test_large_library(self, store, tmp_path):
+        big = {section: [f"{section} {i}: the {{character}} and the {{object}}." for i in range(10_000)]
+               for section in ("opening", "middle", "ending")}
+        _write(tmp_path / "epic.json", big)
+        store.reload()
+        stories = {generate_template_story(KEYWORDS, "epic", seed=seed) for seed in range(50)}
+        assert len(stories) == 50
+
+
+class TestConfiguredDirectory:
+    """STORY_TEMPLATE_DIR is loaded without import cycles, whatever is imported first."""
+
+    @pytest.mark.parametrize(
+        "module", ["src.template_compiler", "src.template_store", "src.templates", "src.story_generator"]
+    )
+    def test_import_order(self, tmp_path, module):
+        _write(tmp_path / "noir.json", NOIR)
+        code = f"import {module}, src.story_generator, src.templates as t; print('noir' in t.GENRES)"
+        env = {**os.environ, "STORY_TEMPLATE_DIR": str(tmp_path)}
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+        assert proc.stdout.strip() == "True"